@@ -153,7 +153,8 @@ class IOSForensicsMCPServer:
                 length: Number of bytes to read
                 
             Returns:
-                Dictionary with file contents
+                Dictionary with file contents (binary content is base64 encoded;
+                spans over 16 MiB return no content, so read them in smaller ranges)
             """
             try:
                 abs_path = self._validate_path(path)
@@ -0,0 +1,14 @@
+# tests/conftest.py - Shared test setup
+
+import os
+import sys
+import types
+
+# The tools and utils packages import each other relative to the repository
+# root, so the root is registered as a package for the tests to import from
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'ios_forensics_mcp' not in sys.modules:
+    _package = types.ModuleType('ios_forensics_mcp')
+    _package.__path__ = [_REPO_ROOT]
+    sys.modules['ios_forensics_mcp'] = _package
@@ -0,0 +1,105 @@
+# tests/test_file_reader.py - Tests for the file reading utilities
+
+import base64
+import os
+
+import pytest
+
+from ios_forensics_mcp.tools.filesystem import file_reader
+
+
+TEXT = "Grüße aus München, naïve café — ünïcödé\n" * 200
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    """UTF-8 text file with non-ASCII characters"""
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(TEXT.encode('utf-8'))
+    return str(path)
+
+
+def test_stream_above_threshold(text_file, monkeypatch):
+    monkeypatch.setattr(file_reader, 'STREAM_THRESHOLD', 1024)
+    
+    result = file_reader.read_file(text_file)
+    
+    assert result['content'] is None
+    assert result['content_stream']
+    assert result['encoding'].lower() == 'utf-8'
+    assert ''.join(file_reader.iter_file_decoded(text_file, result['encoding'], chunk_size=1000)) == TEXT
+
+
+def test_stream_relabels_ascii_sample(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_reader, 'STREAM_THRESHOLD', 1024)
+    monkeypatch.setattr(file_reader, 'DETECTION_SAMPLE_SIZE', 512)
+    path = tmp_path / 'log.txt'
+    
+    # Only the sample is ASCII; the text after it is not
+    path.write_bytes(b'a' * 2048 + 'ü'.encode('utf-8'))
+    
+    result = file_reader.read_file(str(path))
+    
+    assert result['encoding'] == 'utf-8'
+    assert ''.join(file_reader.iter_file_decoded(str(path))) == 'a' * 2048 + 'ü'
+
+
+def test_binary_chunks_concatenate(tmp_path):
+    data = bytes(range(256)) * 40
+    path = tmp_path / 'blob.bin'
+    path.write_bytes(data)
+    
+    chunks = list(file_reader.iter_file_decoded(str(path), 'binary', chunk_size=1000))
+    
+    assert len(chunks) > 1
+    assert base64.b64decode(''.join(chunks)) == data
+    assert b''.join(base64.b64decode(chunk) for chunk in chunks) == data
+
+
+def test_binary_read_file_is_base64(tmp_path):
+    data = b'\x00\xff\x10binary'
+    path = tmp_path / 'blob.bin'
+    path.write_bytes(data)
+    
+    result = file_reader.read_file(str(path), encoding='binary')
+    
+    assert result['is_binary']
+    assert result['content_encoding'] == 'base64'
+    assert base64.b64decode(result['content']) == data
+
+
+@pytest.mark.parametrize('offset', [0, len("Grüße aus München, naïve café — ünïcödé\n".encode('utf-8')) * 3])
+def test_mapped_span_decodes_like_read_span(text_file, monkeypatch, offset):
+    expected = file_reader.read_file(text_file, offset=offset)
+    
+    monkeypatch.setattr(file_reader, 'MMAP_THRESHOLD', 1024)
+    mapped = file_reader.read_file(text_file, offset=offset)
+    
+    assert mapped['content'] == expected['content'] == TEXT.encode('utf-8')[offset:].decode('utf-8')
+    assert mapped['encoding'] == expected['encoding']
+
+
+def test_unmappable_span_falls_back_to_read(text_file, monkeypatch):
+    def fail_mmap(*args, **kwargs):
+        raise OSError(19, 'Operation not supported by device')
+    
+    monkeypatch.setattr(file_reader, 'MMAP_THRESHOLD', 1024)
+    monkeypatch.setattr(file_reader.mmap, 'mmap', fail_mmap)
+    
+    assert file_reader.read_file(text_file)['content'] == TEXT
+
+
+def test_detection_cache_misses_after_rewrite(tmp_path):
+    path = tmp_path / 'rewritten.txt'
+    path.write_bytes('café crème brûlée '.encode('utf-8') * 20)
+    first = file_reader.read_file(str(path))
+    
+    # Same path and offset, new contents and modification time
+    path.write_bytes('café crème brûlée '.encode('utf-16'))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    second = file_reader.read_file(str(path))
+    
+    assert first['encoding'].lower() == 'utf-8'
+    assert second['encoding'] == 'UTF-16'
+    assert second['content'] == 'café crème brûlée '
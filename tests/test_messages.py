@@ -0,0 +1,106 @@
+# tests/test_messages.py - Tests for SMS/iMessage analysis
+
+import sqlite3
+import contextlib
+
+import pytest
+
+from ios_forensics_mcp.tools.specialized import messages
+
+
+# 2020-01-01T00:00:00Z in Unix seconds and in Mac Absolute Time seconds
+KNOWN_UNIX = 1577836800
+KNOWN_MAC = KNOWN_UNIX - messages.MAC_ABSOLUTE_TO_UNIX_OFFSET
+
+# (ROWID, date, text): the same instant in seconds (iOS 10 and earlier) and
+# in nanoseconds (iOS 11+), an unset date, and texts with LIKE wildcards
+MESSAGE_ROWS = [
+    (1, KNOWN_MAC, 'meeting at 100% capacity'),
+    (2, KNOWN_MAC * 1000000000, 'file a_b.txt attached'),
+    (3, 0, 'scored 1000 points'),
+    (4, KNOWN_MAC - 60, 'see file axb.txt'),
+]
+
+MODERN_SCHEMA = """
+    CREATE TABLE chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT);
+    CREATE TABLE chat_message_join (chat_id INTEGER, message_id INTEGER);
+    CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT, service TEXT);
+    CREATE TABLE message (
+        ROWID INTEGER PRIMARY KEY, date INTEGER, handle_id INTEGER, text TEXT,
+        service TEXT, is_from_me INTEGER, is_read INTEGER, is_delivered INTEGER,
+        date_read INTEGER, date_delivered INTEGER, associated_message_guid TEXT,
+        cache_has_attachments INTEGER
+    );
+"""
+
+
+def _create_modern_db(db_path, wal=False):
+    """Create a modern (iOS 6+) message database, returning the writer if it is left open"""
+    conn = sqlite3.connect(db_path)
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA wal_autocheckpoint=0")
+    
+    conn.executescript(MODERN_SCHEMA)
+    conn.execute("INSERT INTO chat VALUES (1, '+15551234')")
+    conn.execute("INSERT INTO handle VALUES (1, '+15551234', 'iMessage')")
+    for rowid, date, text in MESSAGE_ROWS:
+        conn.execute(
+            "INSERT INTO message VALUES (?, ?, 1, ?, 'iMessage', 0, 1, 1, 0, 0, NULL, 0)",
+            (rowid, date, text)
+        )
+        conn.execute("INSERT INTO chat_message_join VALUES (1, ?)", (rowid,))
+    conn.commit()
+    
+    if wal:
+        # Closing the last connection would checkpoint the WAL
+        return conn
+    
+    conn.close()
+    return None
+
+
+@pytest.fixture(params=[False, True], ids=['plain', 'wal'])
+def message_db(request, tmp_path):
+    """Modern message database, read in place or, in WAL mode, through an indexed copy"""
+    db_path = str(tmp_path / 'sms.db')
+    writer = _create_modern_db(db_path, wal=request.param)
+    yield db_path
+    if writer is not None:
+        writer.close()
+
+
+def test_timestamps_converted_in_sql(message_db):
+    result = messages.analyze_messages(message_db)
+    by_id = {message['message_id']: message for message in result['messages']}
+    
+    assert result['db_version'] == 'modern'
+    for rowid in (1, 2):
+        assert by_id[rowid]['date'] == '2020-01-01T00:00:00'
+        assert by_id[rowid]['timestamp_unix'] == KNOWN_UNIX
+    
+    assert by_id[4]['date'] == '2019-12-31T23:59:00'
+    assert by_id[3]['date'] is None
+    assert by_id[3]['timestamp_unix'] is None
+
+
+def test_messages_ordered_by_raw_date(message_db):
+    result = messages.analyze_messages(message_db, limit=2)
+    
+    # Nanosecond dates sort above second dates, as in the source database
+    assert [message['message_id'] for message in result['messages']] == [2, 1]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('100%', [1]),
+    ('a_b', [2]),
+    ('_', [2]),
+    ('file', [2, 4]),
+    ('%', [1]),
+])
+def test_search_matches_wildcards_literally(message_db, query, expected):
+    result = messages.search_messages(message_db, query)
+    
+    assert sorted(message['message_id'] for message in result['results']) == expected
+    for message in result['results']:
+        assert f"****{query}****" in message['body_highlighted']
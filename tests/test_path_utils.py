@@ -0,0 +1,50 @@
+# tests/test_path_utils.py - Tests for the path utilities
+
+import os
+
+import pytest
+
+from ios_forensics_mcp.utils import path_utils
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Directory with matching files at the top level and in a subdirectory"""
+    (tmp_path / 'top.db').write_bytes(b'')
+    (tmp_path / 'notes.txt').write_bytes(b'')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'nested.DB').write_bytes(b'')
+    return tmp_path
+
+
+def _unreadable(path):
+    """os.scandir replacement that cannot read the given directory"""
+    real_scandir = os.scandir
+    
+    def scandir(directory):
+        if os.fspath(directory) == os.fspath(path):
+            raise PermissionError(13, 'Permission denied', os.fspath(directory))
+        return real_scandir(directory)
+    
+    return scandir
+
+
+def test_find_files_by_extension(tree):
+    recursive = path_utils.find_files_by_extension(str(tree), ['db'])
+    flat = path_utils.find_files_by_extension(str(tree), ['.db'], recursive=False)
+    
+    assert sorted(recursive) == sorted([str(tree / 'top.db'), str(tree / 'sub' / 'nested.DB')])
+    assert flat == [str(tree / 'top.db')]
+
+
+def test_non_recursive_search_raises_on_unreadable_base(tree, monkeypatch):
+    monkeypatch.setattr(os, 'scandir', _unreadable(tree))
+    
+    with pytest.raises(PermissionError):
+        path_utils.find_files_by_extension(str(tree), ['db'], recursive=False)
+
+
+def test_recursive_search_skips_unreadable_directories(tree, monkeypatch):
+    monkeypatch.setattr(os, 'scandir', _unreadable(tree / 'sub'))
+    
+    assert path_utils.find_files_by_extension(str(tree), ['db']) == [str(tree / 'top.db')]
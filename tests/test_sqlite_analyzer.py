@@ -0,0 +1,149 @@
+# tests/test_sqlite_analyzer.py - Tests for the SQLite analysis tools
+
+import os
+import sqlite3
+import contextlib
+
+import pytest
+
+from ios_forensics_mcp.tools.sqlite import analyzer
+
+
+PEOPLE = [('alice', 31), ('bob', 42), ('carol', 27), ('dave', 55)]
+
+
+@pytest.fixture
+def plain_db(tmp_path):
+    """Rollback-journal database with an ordinary table, a unique index and a custom index"""
+    db_path = str(tmp_path / 'plain.db')
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("CREATE TABLE people (name TEXT UNIQUE, age INTEGER)")
+        conn.executemany("INSERT INTO people VALUES (?, ?)", PEOPLE)
+        # 'sqlitex' would match an unescaped 'sqlite_%' pattern
+        conn.execute("CREATE INDEX sqlitex_people_age ON people(age)")
+        conn.commit()
+    
+    return db_path
+
+
+@pytest.fixture
+def quoted_db(tmp_path):
+    """Database whose table and column names need quoting"""
+    db_path = str(tmp_path / 'quoted.db')
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        conn.execute('CREATE TABLE "quo""te" ("we""ird" TEXT, "with space" INTEGER)')
+        conn.execute('INSERT INTO "quo""te" VALUES (\'x\', 1)')
+        conn.execute('CREATE TABLE "select" ("from" TEXT)')
+        conn.execute('INSERT INTO "select" VALUES (\'keyword\')')
+        conn.commit()
+    
+    return db_path
+
+
+@pytest.fixture
+def wal_db(tmp_path):
+    """WAL-mode database whose rows are still only in the WAL file"""
+    db_path = str(tmp_path / 'wal.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE people (name TEXT, age INTEGER)")
+    conn.executemany("INSERT INTO people VALUES (?, ?)", PEOPLE)
+    conn.commit()
+    
+    # Keep the writer open: closing the last connection checkpoints the WAL
+    yield db_path
+    conn.close()
+
+
+def test_get_table_data_pages(plain_db):
+    result = analyzer.get_table_data(plain_db, 'people', limit=2, offset=1)
+    
+    assert result['column_names'] == ['name', 'age']
+    assert [(row['name'], row['age']) for row in result['rows']] == PEOPLE[1:3]
+    assert result['row_count'] == 2
+    assert not result['has_more']
+    assert not result['used_temp_copy']
+
+
+def test_get_table_data_columns_and_quoted_name(plain_db):
+    result = analyzer.get_table_data(plain_db, '"people"', limit=10, columns=['age'])
+    
+    assert result['column_names'] == ['age']
+    assert sorted(row['age'] for row in result['rows']) == sorted(age for _, age in PEOPLE)
+
+
+def test_get_table_data_odd_names(quoted_db):
+    result = analyzer.get_table_data(quoted_db, 'quo"te', columns=['we"ird', 'with space'])
+    assert result['rows'] == [{'we"ird': 'x', 'with space': 1}]
+    
+    result = analyzer.get_table_data(quoted_db, 'select')
+    assert result['rows'] == [{'from': 'keyword'}]
+
+
+def test_analyze_schema_odd_names(quoted_db):
+    schema = analyzer.analyze_schema(quoted_db)
+    tables = {table['name']: table for table in schema['tables']}
+    
+    assert set(tables) == {'quo"te', 'select'}
+    assert [column['name'] for column in tables['quo"te']['columns']] == ['we"ird', 'with space']
+    assert tables['quo"te']['record_count'] == 1
+    assert tables['select']['record_count'] == 1
+
+
+def test_analyze_schema_skips_internal_indexes_only(plain_db):
+    schema = analyzer.analyze_schema(plain_db)
+    
+    # The UNIQUE constraint's sqlite_autoindex_people_1 is internal
+    assert [index['name'] for index in schema['indexes']] == ['sqlitex_people_age']
+
+
+def test_execute_query_reads_wal_through_copy(wal_db):
+    wal_path = f"{wal_db}-wal"
+    before = [os.stat(path) for path in (wal_db, wal_path)]
+    
+    result = analyzer.execute_query(wal_db, "SELECT count(*) AS n FROM people")
+    
+    assert result['rows'] == [{'n': len(PEOPLE)}]
+    assert result['used_temp_copy']
+    
+    # The evidence files are left as they were
+    after = [os.stat(path) for path in (wal_db, wal_path)]
+    assert [(s.st_size, s.st_mtime_ns) for s in after] == [(s.st_size, s.st_mtime_ns) for s in before]
+
+
+def test_analyze_schema_sees_wal_tables(wal_db):
+    schema = analyzer.analyze_schema(wal_db)
+    
+    assert schema['has_wal']
+    assert schema['used_temp_copy']
+    assert [table['name'] for table in schema['tables']] == ['people']
+    assert schema['tables'][0]['record_count'] == len(PEOPLE)
+
+
+def test_forensic_copy_of_plain_database(plain_db):
+    result = analyzer.execute_query(plain_db, "SELECT count(*) AS n FROM people", forensic_copy=True)
+    
+    assert result['rows'] == [{'n': len(PEOPLE)}]
+    assert result['used_temp_copy']
+
+
+def test_iter_query_does_not_hold_pool(wal_db):
+    batches = analyzer.iter_query(wal_db, "SELECT name FROM people ORDER BY rowid", batch=3)
+    first = next(batches)
+    
+    # A pooled query on the same database while the stream is open
+    assert analyzer.execute_query(wal_db, "SELECT 1 AS one")['rows'] == [{'one': 1}]
+    
+    rest = [row for rows in batches for row in rows]
+    assert [name for name, in first + rest] == [name for name, _ in PEOPLE]
+
+
+@pytest.mark.parametrize('query', [
+    "DROP TABLE people",
+    "SELECT 1; DELETE FROM people",
+    "   ",
+])
+def test_execute_query_rejects_unsafe_queries(plain_db, query):
+    with pytest.raises(ValueError):
+        analyzer.execute_query(plain_db, query)
@@ -0,0 +1,79 @@
+# tests/test_sqlite_freelist.py - Tests for the SQLite freelist parser
+
+import sqlite3
+import contextlib
+
+import pytest
+
+from ios_forensics_mcp.tools.sqlite.freelist import SQLiteFreelistParser, carve_deleted_tables
+
+
+@pytest.fixture
+def multi_trunk_db(tmp_path):
+    """Database with enough free pages to need several freelist trunk pages"""
+    db_path = str(tmp_path / 'multi.db')
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        # A 512-byte trunk page lists at most 126 leaves
+        conn.execute("PRAGMA page_size=512")
+        conn.execute("PRAGMA auto_vacuum=NONE")
+        conn.execute("CREATE TABLE filler (data BLOB)")
+        conn.executemany("INSERT INTO filler VALUES (?)", ((bytes([i % 256]) * 400,) for i in range(600)))
+        conn.commit()
+        conn.execute("DROP TABLE filler")
+        conn.commit()
+    
+    return db_path
+
+
+@pytest.fixture
+def cjk_db(tmp_path):
+    """UTF-8 database holding non-Latin message text"""
+    db_path = str(tmp_path / 'cjk.db')
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("CREATE TABLE message (text TEXT)")
+        conn.executemany("INSERT INTO message VALUES (?)", ((f"日本語のメッセージ {i}",) for i in range(10)))
+        conn.commit()
+    
+    return db_path
+
+
+def test_free_pages_match_freelist_count(multi_trunk_db):
+    with contextlib.closing(sqlite3.connect(multi_trunk_db)) as conn:
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    
+    parser = SQLiteFreelistParser(multi_trunk_db)
+    try:
+        assert freelist_count > 2 * 126
+        assert len(parser.free_pages) == freelist_count
+        assert len(set(parser.free_pages)) == freelist_count
+    finally:
+        parser.close()
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'\x05', (5, 1)),
+    (b'\x81\x00', (128, 2)),
+    (b'\x81\x80\x80\x80\x80\x80\x80\x80\x00', (1 << 57, 9)),
+    (b'\xff' * 9, ((1 << 64) - 1, 9)),
+    (b'\xff' * 9 + b'\x01', ((1 << 64) - 1, 9)),
+])
+def test_decode_varint(multi_trunk_db, data, expected):
+    parser = SQLiteFreelistParser.from_raw(multi_trunk_db)
+    try:
+        assert parser._decode_varint(b'\x00' + data, 1) == expected
+    finally:
+        parser.close()
+
+
+def test_carve_keeps_non_latin_text(cjk_db):
+    result = carve_deleted_tables(cjk_db)
+    values = [
+        value
+        for page in result['carved_pages']
+        for record in page['records']
+        for value in record['values'].values()
+    ]
+    
+    assert 'error' not in result
+    for i in range(10):
+        assert any(f"日本語のメッセージ {i}" in value for value in values)
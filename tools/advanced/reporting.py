@@ -1,17 +1,37 @@
 # tools/advanced/reporting.py - Forensic reporting tools
 
 import os
+import io
 import json
 import logging
 import tempfile
 import shutil
 import re
 import datetime
+import collections
+import concurrent.futures
 from typing import Dict, List, Optional, Any, Tuple, Union, BinaryIO, Callable
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Report output formats, shared by the generator class and the module-level helpers
+FORMAT_MARKDOWN = 'markdown'
+FORMAT_HTML = 'html'
+FORMAT_JSON = 'json'
+
+# Markdown bold text, converted to <strong> by the HTML converters
+_BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+
+# Markdown heading markers mapped to their HTML tags
+_HEADING_TAGS = {'#': 'h1', '##': 'h2', '###': 'h3'}
+
+# Markdown heading markers recognised by the executive HTML converter
+_EXECUTIVE_HEADING_TAGS = {'#': 'h1', '##': 'h2'}
+
+# Markdown list item markers rendered as <li> by the standard HTML converter
+_LIST_MARKERS = frozenset({'-', '*', '1.'})
+
 
 class ForensicReportGenerator:
     """
@@ -21,9 +41,9 @@ class ForensicReportGenerator:
     """
     
     # Report template formats
-    FORMAT_MARKDOWN = 'markdown'
-    FORMAT_HTML = 'html'
-    FORMAT_JSON = 'json'
+    FORMAT_MARKDOWN = FORMAT_MARKDOWN
+    FORMAT_HTML = FORMAT_HTML
+    FORMAT_JSON = FORMAT_JSON
     
     # Report templates
     TEMPLATE_STANDARD = 'standard'
@@ -128,84 +148,84 @@ class ForensicReportGenerator:
             Markdown report
         """
         # Build the report content
-        lines = []
+        report = io.StringIO()
         
         # Header
-        lines.append('# iOS Forensic Analysis Report')
-        lines.append('')
+        report.write('# iOS Forensic Analysis Report\n')
+        report.write('\n')
         
         # Case information
-        lines.append('## Case Information')
-        lines.append('')
-        lines.append(f"**Case Number:** {self.case_info.get('case_number')}")
-        lines.append(f"**Examiner:** {self.case_info.get('examiner')}")
-        lines.append(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}")
-        lines.append('')
+        report.write('## Case Information\n')
+        report.write('\n')
+        report.write(f"**Case Number:** {self.case_info.get('case_number')}\n")
+        report.write(f"**Examiner:** {self.case_info.get('examiner')}\n")
+        report.write(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}\n")
+        report.write('\n')
         
         # Device information
-        lines.append('## Device Information')
-        lines.append('')
+        report.write('## Device Information\n')
+        report.write('\n')
         device_info = self.case_info.get('device_info', {})
-        lines.append(f"**Model:** {device_info.get('model', 'Unknown')}")
-        lines.append(f"**iOS Version:** {device_info.get('os_version', 'Unknown')}")
-        lines.append(f"**Serial Number:** {device_info.get('serial_number', 'Unknown')}")
+        report.write(f"**Model:** {device_info.get('model', 'Unknown')}\n")
+        report.write(f"**iOS Version:** {device_info.get('os_version', 'Unknown')}\n")
+        report.write(f"**Serial Number:** {device_info.get('serial_number', 'Unknown')}\n")
         
         if 'imei' in device_info:
-            lines.append(f"**IMEI:** {device_info.get('imei')}")
+            report.write(f"**IMEI:** {device_info.get('imei')}\n")
         
         if 'extraction_method' in self.case_info:
-            lines.append(f"**Extraction Method:** {self.case_info.get('extraction_method')}")
+            report.write(f"**Extraction Method:** {self.case_info.get('extraction_method')}\n")
         
         if 'extraction_date' in self.case_info:
-            lines.append(f"**Extraction Date:** {self._format_datetime(self.case_info.get('extraction_date'))}")
+            report.write(f"**Extraction Date:** {self._format_datetime(self.case_info.get('extraction_date'))}\n")
         
-        lines.append('')
+        report.write('\n')
         
         # Executive summary
         if 'executive_summary' in self.case_info:
-            lines.append('## Executive Summary')
-            lines.append('')
-            lines.append(self.case_info.get('executive_summary'))
-            lines.append('')
+            report.write('## Executive Summary\n')
+            report.write('\n')
+            report.write(f"{self.case_info.get('executive_summary')}\n")
+            report.write('\n')
         
         # Key findings
         if 'key_findings' in data:
-            lines.append('## Key Findings')
-            lines.append('')
+            report.write('## Key Findings\n')
+            report.write('\n')
             
             findings = data.get('key_findings', [])
             for i, finding in enumerate(findings, 1):
-                lines.append(f"{i}. {finding}")
+                report.write(f"{i}. {finding}\n")
             
-            lines.append('')
+            report.write('\n')
         
         # Analysis sections
-        self._add_analysis_sections(lines, data)
+        self._add_analysis_sections(report, data)
         
         # Timeline
         if 'timeline' in data:
-            self._add_timeline_section(lines, data.get('timeline', []))
+            self._add_timeline_section(report, data.get('timeline', []))
         
         # Conclusion
         if 'conclusion' in self.case_info:
-            lines.append('## Conclusion')
-            lines.append('')
-            lines.append(self.case_info.get('conclusion'))
-            lines.append('')
+            report.write('## Conclusion\n')
+            report.write('\n')
+            report.write(f"{self.case_info.get('conclusion')}\n")
+            report.write('\n')
         
         # Appendices
         if 'appendices' in data:
-            lines.append('## Appendices')
-            lines.append('')
+            report.write('## Appendices\n')
+            report.write('\n')
             
             appendices = data.get('appendices', {})
             for title, content in appendices.items():
-                lines.append(f"### {title}")
-                lines.append('')
-                lines.append(content)
-                lines.append('')
+                report.write(f"### {title}\n")
+                report.write('\n')
+                report.write(f"{content}\n")
+                report.write('\n')
         
-        return '\n'.join(lines)
+        return self._finish_report(report)
     
     def _generate_standard_html(self, data: Dict[str, Any]) -> str:
         """
@@ -221,90 +241,87 @@ class ForensicReportGenerator:
         markdown_report = self._generate_standard_markdown(data)
         
         # Simple markdown to HTML conversion for basic elements
-        html_lines = []
+        html = io.StringIO()
         
         # HTML header
-        html_lines.append('<!DOCTYPE html>')
-        html_lines.append('<html lang="en">')
-        html_lines.append('<head>')
-        html_lines.append('    <meta charset="UTF-8">')
-        html_lines.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html_lines.append(f'    <title>iOS Forensic Report - {self.case_info.get("case_number")}</title>')
-        html_lines.append('    <style>')
-        html_lines.append('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; }')
-        html_lines.append('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }')
-        html_lines.append('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }')
-        html_lines.append('        h3 { color: #2c3e50; }')
-        html_lines.append('        table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }')
-        html_lines.append('        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }')
-        html_lines.append('        th { background-color: #f2f2f2; }')
-        html_lines.append('        tr:nth-child(even) { background-color: #f9f9f9; }')
-        html_lines.append('        .timeline-item { margin-bottom: 10px; padding-left: 20px; border-left: 2px solid #3498db; }')
-        html_lines.append('        .timeline-date { font-weight: bold; color: #3498db; }')
-        html_lines.append('        .key-value { margin-bottom: 5px; }')
-        html_lines.append('        .key { font-weight: bold; }')
-        html_lines.append('    </style>')
-        html_lines.append('</head>')
-        html_lines.append('<body>')
+        html.write('<!DOCTYPE html>\n')
+        html.write('<html lang="en">\n')
+        html.write('<head>\n')
+        html.write('    <meta charset="UTF-8">\n')
+        html.write('    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n')
+        html.write(f'    <title>iOS Forensic Report - {self.case_info.get("case_number")}</title>\n')
+        html.write('    <style>\n')
+        html.write('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; }\n')
+        html.write('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }\n')
+        html.write('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }\n')
+        html.write('        h3 { color: #2c3e50; }\n')
+        html.write('        table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }\n')
+        html.write('        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }\n')
+        html.write('        th { background-color: #f2f2f2; }\n')
+        html.write('        tr:nth-child(even) { background-color: #f9f9f9; }\n')
+        html.write('        .timeline-item { margin-bottom: 10px; padding-left: 20px; border-left: 2px solid #3498db; }\n')
+        html.write('        .timeline-date { font-weight: bold; color: #3498db; }\n')
+        html.write('        .key-value { margin-bottom: 5px; }\n')
+        html.write('        .key { font-weight: bold; }\n')
+        html.write('    </style>\n')
+        html.write('</head>\n')
+        html.write('<body>\n')
         
         # Convert markdown to HTML
         in_code_block = False
         in_list = False
         
         for line in markdown_report.split('\n'):
+            # Classify the line by its leading marker with a single table lookup
+            marker, separator, text = line.partition(' ')
+            heading_tag = _HEADING_TAGS.get(marker) if separator else None
+            
             # Headers
-            if line.startswith('# '):
-                html_lines.append(f'<h1>{line[2:]}</h1>')
-            elif line.startswith('## '):
-                html_lines.append(f'<h2>{line[3:]}</h2>')
-            elif line.startswith('### '):
-                html_lines.append(f'<h3>{line[4:]}</h3>')
+            if heading_tag:
+                html.write(f'<{heading_tag}>{text}</{heading_tag}>\n')
             # Lists
-            elif line.startswith('- '):
-                if not in_list:
-                    html_lines.append('<ul>')
-                    in_list = True
-                html_lines.append(f'<li>{line[2:]}</li>')
-            elif line.startswith('1. ') or line.startswith('* '):
+            elif separator and marker in _LIST_MARKERS:
                 if not in_list:
-                    html_lines.append('<ul>')
+                    html.write('<ul>\n')
                     in_list = True
-                html_lines.append(f'<li>{line[2:]}</li>')
+                html.write(f'<li>{line[2:]}</li>\n')
             # Code blocks
             elif line.startswith('```'):
                 if in_code_block:
-                    html_lines.append('</code></pre>')
+                    html.write('</code></pre>\n')
                     in_code_block = False
                 else:
-                    html_lines.append('<pre><code>')
+                    html.write('<pre><code>\n')
                     in_code_block = True
             # Bold text
             elif '**' in line:
-                line = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', line)
-                html_lines.append(f'<p>{line}</p>')
+                # A lone marker cannot open and close a bold span
+                if line.count('**') >= 2:
+                    line = _BOLD_PATTERN.sub(r'<strong>\1</strong>', line)
+                html.write(f'<p>{line}</p>\n')
             # Empty line
             elif line.strip() == '':
                 if in_list:
-                    html_lines.append('</ul>')
+                    html.write('</ul>\n')
                     in_list = False
                 else:
-                    html_lines.append('<br>')
+                    html.write('<br>\n')
             # Regular paragraph
             else:
-                html_lines.append(f'<p>{line}</p>')
+                html.write(f'<p>{line}</p>\n')
         
         # Close any open tags
         if in_list:
-            html_lines.append('</ul>')
+            html.write('</ul>\n')
         
         if in_code_block:
-            html_lines.append('</code></pre>')
+            html.write('</code></pre>\n')
         
         # HTML footer
-        html_lines.append('</body>')
-        html_lines.append('</html>')
+        html.write('</body>\n')
+        html.write('</html>')
         
-        return '\n'.join(html_lines)
+        return html.getvalue()
     
     def _generate_timeline_report(self, data: Dict[str, Any], format: str) -> str:
         """
@@ -348,32 +365,32 @@ class ForensicReportGenerator:
         Returns:
             Markdown report
         """
-        lines = []
+        report = io.StringIO()
         
         # Header
-        lines.append('# iOS Forensic Timeline Report')
-        lines.append('')
+        report.write('# iOS Forensic Timeline Report\n')
+        report.write('\n')
         
         # Case information
-        lines.append('## Case Information')
-        lines.append('')
-        lines.append(f"**Case Number:** {self.case_info.get('case_number')}")
-        lines.append(f"**Examiner:** {self.case_info.get('examiner')}")
-        lines.append(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}")
-        lines.append('')
+        report.write('## Case Information\n')
+        report.write('\n')
+        report.write(f"**Case Number:** {self.case_info.get('case_number')}\n")
+        report.write(f"**Examiner:** {self.case_info.get('examiner')}\n")
+        report.write(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}\n")
+        report.write('\n')
         
         # Device information
-        lines.append('## Device Information')
-        lines.append('')
+        report.write('## Device Information\n')
+        report.write('\n')
         device_info = self.case_info.get('device_info', {})
-        lines.append(f"**Model:** {device_info.get('model', 'Unknown')}")
-        lines.append(f"**iOS Version:** {device_info.get('os_version', 'Unknown')}")
-        lines.append('')
+        report.write(f"**Model:** {device_info.get('model', 'Unknown')}\n")
+        report.write(f"**iOS Version:** {device_info.get('os_version', 'Unknown')}\n")
+        report.write('\n')
         
         # Timeline statistics
-        lines.append('## Timeline Statistics')
-        lines.append('')
-        lines.append(f"**Total Events:** {len(timeline_data)}")
+        report.write('## Timeline Statistics\n')
+        report.write('\n')
+        report.write(f"**Total Events:** {len(timeline_data)}\n")
         
         if timeline_data:
             # Find date range
@@ -384,26 +401,23 @@ class ForensicReportGenerator:
                         dates.append(entry['timestamp'])
                 
                 if dates:
-                    lines.append(f"**Date Range:** {min(dates)} to {max(dates)}")
+                    report.write(f"**Date Range:** {min(dates)} to {max(dates)}\n")
             except Exception:
                 pass
             
             # Count event types
-            event_types = {}
-            for entry in timeline_data:
-                entry_type = entry.get('type', 'unknown')
-                event_types[entry_type] = event_types.get(entry_type, 0) + 1
+            event_types = collections.Counter(entry.get('type', 'unknown') for entry in timeline_data)
             
-            lines.append('')
-            lines.append('**Event Types:**')
+            report.write('\n')
+            report.write('**Event Types:**\n')
             for event_type, count in event_types.items():
-                lines.append(f"- {event_type}: {count}")
+                report.write(f"- {event_type}: {count}\n")
         
-        lines.append('')
+        report.write('\n')
         
         # Timeline
-        lines.append('## Timeline')
-        lines.append('')
+        report.write('## Timeline\n')
+        report.write('\n')
         
         # Sort by timestamp
         sorted_timeline = sorted(timeline_data, key=lambda x: x.get('timestamp', ''))
@@ -419,8 +433,8 @@ class ForensicReportGenerator:
             # Add date header if changed
             if date_part != current_date:
                 current_date = date_part
-                lines.append(f"### {date_part}")
-                lines.append('')
+                report.write(f"### {date_part}\n")
+                report.write('\n')
             
             # Format time part
             time_part = timestamp.split('T')[1] if 'T' in timestamp else ''
@@ -433,21 +447,21 @@ class ForensicReportGenerator:
             entry_type = entry.get('type', 'unknown')
             description = entry.get('description', 'No description')
             
-            lines.append(f"**{time_part}** - {entry_type}: {description}")
+            report.write(f"**{time_part}** - {entry_type}: {description}\n")
             
             # Add location if available
             if 'latitude' in entry and 'longitude' in entry:
                 lat = entry.get('latitude')
                 lon = entry.get('longitude')
-                lines.append(f"Location: {lat}, {lon}")
+                report.write(f"Location: {lat}, {lon}\n")
             
             # Add duration if available
             if 'duration_formatted' in entry:
-                lines.append(f"Duration: {entry.get('duration_formatted')}")
+                report.write(f"Duration: {entry.get('duration_formatted')}\n")
             
-            lines.append('')
+            report.write('\n')
         
-        return '\n'.join(lines)
+        return self._finish_report(report)
     
     def _generate_timeline_html(self, timeline_data: List[Dict[str, Any]]) -> str:
         """
@@ -463,56 +477,56 @@ class ForensicReportGenerator:
         markdown_report = self._generate_timeline_markdown(timeline_data)
         
         # Add HTML template with timeline styling
-        html_lines = []
+        html = io.StringIO()
         
         # HTML header
-        html_lines.append('<!DOCTYPE html>')
-        html_lines.append('<html lang="en">')
-        html_lines.append('<head>')
-        html_lines.append('    <meta charset="UTF-8">')
-        html_lines.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html_lines.append(f'    <title>iOS Forensic Timeline - {self.case_info.get("case_number")}</title>')
-        html_lines.append('    <style>')
-        html_lines.append('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; }')
-        html_lines.append('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }')
-        html_lines.append('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }')
-        html_lines.append('        h3 { color: #2c3e50; margin-top: 30px; border-bottom: 1px dashed #bdc3c7; }')
-        html_lines.append('        .timeline { position: relative; max-width: 1200px; margin: 0 auto; }')
-        html_lines.append('        .timeline::after { content: ""; position: absolute; width: 2px; background-color: #3498db; top: 0; bottom: 0; left: 50px; }')
-        html_lines.append('        .timeline-item { padding: 10px 40px 10px 70px; position: relative; background-color: inherit; width: 100%; box-sizing: border-box; }')
-        html_lines.append('        .timeline-item::after { content: ""; position: absolute; width: 12px; height: 12px; background-color: white; border: 2px solid #3498db; border-radius: 50%; z-index: 1; left: 44px; top: 15px; }')
-        html_lines.append('        .timeline-date { font-weight: bold; color: #3498db; }')
-        html_lines.append('        .timeline-type { color: #7f8c8d; font-style: italic; }')
-        html_lines.append('        .timeline-description { margin-top: 5px; }')
-        html_lines.append('        .timeline-location { color: #7f8c8d; margin-top: 5px; font-size: 0.9em; }')
-        html_lines.append('        .timeline-duration { color: #7f8c8d; font-size: 0.9em; }')
-        html_lines.append('    </style>')
-        html_lines.append('</head>')
-        html_lines.append('<body>')
+        html.write('<!DOCTYPE html>\n')
+        html.write('<html lang="en">\n')
+        html.write('<head>\n')
+        html.write('    <meta charset="UTF-8">\n')
+        html.write('    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n')
+        html.write(f'    <title>iOS Forensic Timeline - {self.case_info.get("case_number")}</title>\n')
+        html.write('    <style>\n')
+        html.write('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 20px; }\n')
+        html.write('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }\n')
+        html.write('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }\n')
+        html.write('        h3 { color: #2c3e50; margin-top: 30px; border-bottom: 1px dashed #bdc3c7; }\n')
+        html.write('        .timeline { position: relative; max-width: 1200px; margin: 0 auto; }\n')
+        html.write('        .timeline::after { content: ""; position: absolute; width: 2px; background-color: #3498db; top: 0; bottom: 0; left: 50px; }\n')
+        html.write('        .timeline-item { padding: 10px 40px 10px 70px; position: relative; background-color: inherit; width: 100%; box-sizing: border-box; }\n')
+        html.write('        .timeline-item::after { content: ""; position: absolute; width: 12px; height: 12px; background-color: white; border: 2px solid #3498db; border-radius: 50%; z-index: 1; left: 44px; top: 15px; }\n')
+        html.write('        .timeline-date { font-weight: bold; color: #3498db; }\n')
+        html.write('        .timeline-type { color: #7f8c8d; font-style: italic; }\n')
+        html.write('        .timeline-description { margin-top: 5px; }\n')
+        html.write('        .timeline-location { color: #7f8c8d; margin-top: 5px; font-size: 0.9em; }\n')
+        html.write('        .timeline-duration { color: #7f8c8d; font-size: 0.9em; }\n')
+        html.write('    </style>\n')
+        html.write('</head>\n')
+        html.write('<body>\n')
         
         # Custom HTML timeline instead of converting from markdown
-        html_lines.append('<h1>iOS Forensic Timeline Report</h1>')
+        html.write('<h1>iOS Forensic Timeline Report</h1>\n')
         
         # Case information
-        html_lines.append('<h2>Case Information</h2>')
-        html_lines.append('<div class="case-info">')
-        html_lines.append(f'<p><strong>Case Number:</strong> {self.case_info.get("case_number")}</p>')
-        html_lines.append(f'<p><strong>Examiner:</strong> {self.case_info.get("examiner")}</p>')
-        html_lines.append(f'<p><strong>Report Date:</strong> {self._format_datetime(self.case_info.get("report_date"))}</p>')
-        html_lines.append('</div>')
+        html.write('<h2>Case Information</h2>\n')
+        html.write('<div class="case-info">\n')
+        html.write(f'<p><strong>Case Number:</strong> {self.case_info.get("case_number")}</p>\n')
+        html.write(f'<p><strong>Examiner:</strong> {self.case_info.get("examiner")}</p>\n')
+        html.write(f'<p><strong>Report Date:</strong> {self._format_datetime(self.case_info.get("report_date"))}</p>\n')
+        html.write('</div>\n')
         
         # Device information
-        html_lines.append('<h2>Device Information</h2>')
-        html_lines.append('<div class="device-info">')
+        html.write('<h2>Device Information</h2>\n')
+        html.write('<div class="device-info">\n')
         device_info = self.case_info.get('device_info', {})
-        html_lines.append(f'<p><strong>Model:</strong> {device_info.get("model", "Unknown")}</p>')
-        html_lines.append(f'<p><strong>iOS Version:</strong> {device_info.get("os_version", "Unknown")}</p>')
-        html_lines.append('</div>')
+        html.write(f'<p><strong>Model:</strong> {device_info.get("model", "Unknown")}</p>\n')
+        html.write(f'<p><strong>iOS Version:</strong> {device_info.get("os_version", "Unknown")}</p>\n')
+        html.write('</div>\n')
         
         # Timeline statistics
-        html_lines.append('<h2>Timeline Statistics</h2>')
-        html_lines.append('<div class="timeline-stats">')
-        html_lines.append(f'<p><strong>Total Events:</strong> {len(timeline_data)}</p>')
+        html.write('<h2>Timeline Statistics</h2>\n')
+        html.write('<div class="timeline-stats">\n')
+        html.write(f'<p><strong>Total Events:</strong> {len(timeline_data)}</p>\n')
         
         if timeline_data:
             # Find date range
@@ -523,32 +537,29 @@ class ForensicReportGenerator:
                         dates.append(entry['timestamp'])
                 
                 if dates:
-                    html_lines.append(f'<p><strong>Date Range:</strong> {min(dates)} to {max(dates)}</p>')
+                    html.write(f'<p><strong>Date Range:</strong> {min(dates)} to {max(dates)}</p>\n')
             except Exception:
                 pass
             
             # Count event types
-            event_types = {}
-            for entry in timeline_data:
-                entry_type = entry.get('type', 'unknown')
-                event_types[entry_type] = event_types.get(entry_type, 0) + 1
+            event_types = collections.Counter(entry.get('type', 'unknown') for entry in timeline_data)
             
-            html_lines.append('<p><strong>Event Types:</strong></p>')
-            html_lines.append('<ul>')
+            html.write('<p><strong>Event Types:</strong></p>\n')
+            html.write('<ul>\n')
             for event_type, count in event_types.items():
-                html_lines.append(f'<li>{event_type}: {count}</li>')
-            html_lines.append('</ul>')
+                html.write(f'<li>{event_type}: {count}</li>\n')
+            html.write('</ul>\n')
         
-        html_lines.append('</div>')
+        html.write('</div>\n')
         
         # Timeline
-        html_lines.append('<h2>Timeline</h2>')
+        html.write('<h2>Timeline</h2>\n')
         
         # Sort by timestamp
         sorted_timeline = sorted(timeline_data, key=lambda x: x.get('timestamp', ''))
         
         # Group by date
-        html_lines.append('<div class="timeline">')
+        html.write('<div class="timeline">\n')
         current_date = None
         
         for entry in sorted_timeline:
@@ -561,11 +572,11 @@ class ForensicReportGenerator:
             if date_part != current_date:
                 if current_date is not None:
                     # Close previous date section
-                    html_lines.append('</div>')
+                    html.write('</div>\n')
                 
                 current_date = date_part
-                html_lines.append(f'<h3>{date_part}</h3>')
-                html_lines.append('<div class="timeline-date-group">')
+                html.write(f'<h3>{date_part}</h3>\n')
+                html.write('<div class="timeline-date-group">\n')
             
             # Format time part
             time_part = timestamp.split('T')[1] if 'T' in timestamp else ''
@@ -578,34 +589,34 @@ class ForensicReportGenerator:
             entry_type = entry.get('type', 'unknown')
             description = entry.get('description', 'No description')
             
-            html_lines.append('<div class="timeline-item">')
-            html_lines.append(f'<div class="timeline-date">{time_part}</div>')
-            html_lines.append(f'<div class="timeline-type">{entry_type}</div>')
-            html_lines.append(f'<div class="timeline-description">{description}</div>')
+            html.write('<div class="timeline-item">\n')
+            html.write(f'<div class="timeline-date">{time_part}</div>\n')
+            html.write(f'<div class="timeline-type">{entry_type}</div>\n')
+            html.write(f'<div class="timeline-description">{description}</div>\n')
             
             # Add location if available
             if 'latitude' in entry and 'longitude' in entry:
                 lat = entry.get('latitude')
                 lon = entry.get('longitude')
-                html_lines.append(f'<div class="timeline-location">Location: {lat}, {lon}</div>')
+                html.write(f'<div class="timeline-location">Location: {lat}, {lon}</div>\n')
             
             # Add duration if available
             if 'duration_formatted' in entry:
-                html_lines.append(f'<div class="timeline-duration">Duration: {entry.get("duration_formatted")}</div>')
+                html.write(f'<div class="timeline-duration">Duration: {entry.get("duration_formatted")}</div>\n')
             
-            html_lines.append('</div>')
+            html.write('</div>\n')
         
         # Close last date section
         if current_date is not None:
-            html_lines.append('</div>')
+            html.write('</div>\n')
         
-        html_lines.append('</div>')  # Close timeline
+        html.write('</div>\n')  # Close timeline
         
         # HTML footer
-        html_lines.append('</body>')
-        html_lines.append('</html>')
+        html.write('</body>\n')
+        html.write('</html>')
         
-        return '\n'.join(html_lines)
+        return html.getvalue()
     
     def _generate_executive_report(self, data: Dict[str, Any], format: str) -> str:
         """
@@ -646,79 +657,79 @@ class ForensicReportGenerator:
         Returns:
             Markdown report
         """
-        lines = []
+        report = io.StringIO()
         
         # Header
-        lines.append('# iOS Forensic Analysis - Executive Summary')
-        lines.append('')
+        report.write('# iOS Forensic Analysis - Executive Summary\n')
+        report.write('\n')
         
         # Case information
-        lines.append('## Case Information')
-        lines.append('')
-        lines.append(f"**Case Number:** {self.case_info.get('case_number')}")
-        lines.append(f"**Examiner:** {self.case_info.get('examiner')}")
-        lines.append(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}")
-        lines.append('')
+        report.write('## Case Information\n')
+        report.write('\n')
+        report.write(f"**Case Number:** {self.case_info.get('case_number')}\n")
+        report.write(f"**Examiner:** {self.case_info.get('examiner')}\n")
+        report.write(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}\n")
+        report.write('\n')
         
         # Device information
-        lines.append('## Device Information')
-        lines.append('')
+        report.write('## Device Information\n')
+        report.write('\n')
         device_info = self.case_info.get('device_info', {})
-        lines.append(f"**Model:** {device_info.get('model', 'Unknown')}")
-        lines.append(f"**iOS Version:** {device_info.get('os_version', 'Unknown')}")
-        lines.append(f"**Serial Number:** {device_info.get('serial_number', 'Unknown')}")
+        report.write(f"**Model:** {device_info.get('model', 'Unknown')}\n")
+        report.write(f"**iOS Version:** {device_info.get('os_version', 'Unknown')}\n")
+        report.write(f"**Serial Number:** {device_info.get('serial_number', 'Unknown')}\n")
         
         if 'imei' in device_info:
-            lines.append(f"**IMEI:** {device_info.get('imei')}")
+            report.write(f"**IMEI:** {device_info.get('imei')}\n")
         
         if 'extraction_method' in self.case_info:
-            lines.append(f"**Extraction Method:** {self.case_info.get('extraction_method')}")
+            report.write(f"**Extraction Method:** {self.case_info.get('extraction_method')}\n")
         
-        lines.append('')
+        report.write('\n')
         
         # Executive summary
-        lines.append('## Executive Summary')
-        lines.append('')
+        report.write('## Executive Summary\n')
+        report.write('\n')
         
         if 'executive_summary' in data:
-            lines.append(data.get('executive_summary'))
+            report.write(f"{data.get('executive_summary')}\n")
         else:
-            lines.append("No executive summary provided.")
+            report.write("No executive summary provided.\n")
         
-        lines.append('')
+        report.write('\n')
         
         # Key findings
-        lines.append('## Key Findings')
-        lines.append('')
+        report.write('## Key Findings\n')
+        report.write('\n')
         
         if 'key_findings' in data and data.get('key_findings'):
             findings = data.get('key_findings', [])
             for i, finding in enumerate(findings, 1):
-                lines.append(f"{i}. {finding}")
+                report.write(f"{i}. {finding}\n")
         else:
-            lines.append("No key findings provided.")
+            report.write("No key findings provided.\n")
         
-        lines.append('')
+        report.write('\n')
         
         # Conclusion
         if 'conclusions' in data:
-            lines.append('## Conclusions')
-            lines.append('')
-            lines.append(data.get('conclusions'))
-            lines.append('')
+            report.write('## Conclusions\n')
+            report.write('\n')
+            report.write(f"{data.get('conclusions')}\n")
+            report.write('\n')
         
         # Recommendations (if available)
         if 'recommendations' in data:
-            lines.append('## Recommendations')
-            lines.append('')
+            report.write('## Recommendations\n')
+            report.write('\n')
             
             recommendations = data.get('recommendations', [])
             for i, recommendation in enumerate(recommendations, 1):
-                lines.append(f"{i}. {recommendation}")
+                report.write(f"{i}. {recommendation}\n")
             
-            lines.append('')
+            report.write('\n')
         
-        return '\n'.join(lines)
+        return self._finish_report(report)
     
     def _generate_executive_html(self, data: Dict[str, Any]) -> str:
         """
@@ -734,83 +745,90 @@ class ForensicReportGenerator:
         markdown_report = self._generate_executive_markdown(data)
         
         # Simple HTML template
-        html_lines = []
+        html = io.StringIO()
         
         # HTML header
-        html_lines.append('<!DOCTYPE html>')
-        html_lines.append('<html lang="en">')
-        html_lines.append('<head>')
-        html_lines.append('    <meta charset="UTF-8">')
-        html_lines.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html_lines.append(f'    <title>iOS Forensic Analysis - Executive Summary - {self.case_info.get("case_number")}</title>')
-        html_lines.append('    <style>')
-        html_lines.append('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 40px; max-width: 800px; margin: 0 auto; }')
-        html_lines.append('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }')
-        html_lines.append('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; margin-top: 30px; }')
-        html_lines.append('        .key-value { margin-bottom: 10px; }')
-        html_lines.append('        .key { font-weight: bold; color: #2c3e50; }')
-        html_lines.append('        ol { padding-left: 20px; }')
-        html_lines.append('        li { margin-bottom: 10px; }')
-        html_lines.append('        .summary, .conclusions { line-height: 1.8; text-align: justify; }')
-        html_lines.append('    </style>')
-        html_lines.append('</head>')
-        html_lines.append('<body>')
+        html.write('<!DOCTYPE html>\n')
+        html.write('<html lang="en">\n')
+        html.write('<head>\n')
+        html.write('    <meta charset="UTF-8">\n')
+        html.write('    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n')
+        html.write(f'    <title>iOS Forensic Analysis - Executive Summary - {self.case_info.get("case_number")}</title>\n')
+        html.write('    <style>\n')
+        html.write('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 40px; max-width: 800px; margin: 0 auto; }\n')
+        html.write('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }\n')
+        html.write('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; margin-top: 30px; }\n')
+        html.write('        .key-value { margin-bottom: 10px; }\n')
+        html.write('        .key { font-weight: bold; color: #2c3e50; }\n')
+        html.write('        ol { padding-left: 20px; }\n')
+        html.write('        li { margin-bottom: 10px; }\n')
+        html.write('        .summary, .conclusions { line-height: 1.8; text-align: justify; }\n')
+        html.write('    </style>\n')
+        html.write('</head>\n')
+        html.write('<body>\n')
         
         # Convert markdown to HTML
         in_list = False
+        previous_line = ''
         
         for line in markdown_report.split('\n'):
+            # Classify the line by its leading marker with a single table lookup
+            marker, separator, text = line.partition(' ')
+            heading_tag = _EXECUTIVE_HEADING_TAGS.get(marker) if separator else None
+            
             # Headers
-            if line.startswith('# '):
-                html_lines.append(f'<h1>{line[2:]}</h1>')
-            elif line.startswith('## '):
-                html_lines.append(f'<h2>{line[3:]}</h2>')
+            if heading_tag:
+                html_line = f'<{heading_tag}>{text}</{heading_tag}>'
             # Lists
-            elif re.match(r'^\d+\. ', line):
+            elif separator and marker[-1:] == '.' and marker[:-1].isdecimal():
                 if not in_list:
-                    html_lines.append('<ol>')
+                    html.write('<ol>\n')
                     in_list = True
                 
-                item = re.sub(r'^\d+\. ', '', line)
-                html_lines.append(f'<li>{item}</li>')
+                html_line = f'<li>{text}</li>'
             # Bold text
             elif '**' in line:
-                if '**' in line and ':' in line:
+                if ':' in line:
                     # This is likely a key-value pair
                     parts = line.split(':', 1)
                     key = parts[0].replace('**', '')
                     value = parts[1].strip() if len(parts) > 1 else ''
                     
-                    html_lines.append(f'<div class="key-value"><span class="key">{key}:</span> {value}</div>')
+                    html_line = f'<div class="key-value"><span class="key">{key}:</span> {value}</div>'
                 else:
-                    line = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', line)
-                    html_lines.append(f'<p>{line}</p>')
+                    if line.count('**') >= 2:
+                        line = _BOLD_PATTERN.sub(r'<strong>\1</strong>', line)
+                    html_line = f'<p>{line}</p>'
             # Empty line
             elif line.strip() == '':
                 if in_list:
-                    html_lines.append('</ol>')
+                    html_line = '</ol>'
                     in_list = False
                 else:
-                    html_lines.append('<br>')
+                    html_line = '<br>'
             # Regular paragraph
             else:
                 container_class = ''
-                if 'Executive Summary' in html_lines[-1]:
+                if 'Executive Summary' in previous_line:
                     container_class = ' class="summary"'
-                elif 'Conclusions' in html_lines[-1]:
+                elif 'Conclusions' in previous_line:
                     container_class = ' class="conclusions"'
                 
-                html_lines.append(f'<p{container_class}>{line}</p>')
+                html_line = f'<p{container_class}>{line}</p>'
+            
+            html.write(html_line)
+            html.write('\n')
+            previous_line = html_line
         
         # Close any open tags
         if in_list:
-            html_lines.append('</ol>')
+            html.write('</ol>\n')
         
         # HTML footer
-        html_lines.append('</body>')
-        html_lines.append('</html>')
+        html.write('</body>\n')
+        html.write('</html>')
         
-        return '\n'.join(html_lines)
+        return html.getvalue()
     
     def _generate_technical_report(self, data: Dict[str, Any], format: str) -> str:
         """
@@ -847,75 +865,75 @@ class ForensicReportGenerator:
         Returns:
             Markdown report
         """
-        lines = []
+        report = io.StringIO()
         
         # Header
-        lines.append('# iOS Forensic Analysis - Technical Report')
-        lines.append('')
+        report.write('# iOS Forensic Analysis - Technical Report\n')
+        report.write('\n')
         
         # Case information
-        lines.append('## Case Information')
-        lines.append('')
-        lines.append(f"**Case Number:** {self.case_info.get('case_number')}")
-        lines.append(f"**Examiner:** {self.case_info.get('examiner')}")
-        lines.append(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}")
-        lines.append('')
+        report.write('## Case Information\n')
+        report.write('\n')
+        report.write(f"**Case Number:** {self.case_info.get('case_number')}\n")
+        report.write(f"**Examiner:** {self.case_info.get('examiner')}\n")
+        report.write(f"**Report Date:** {self._format_datetime(self.case_info.get('report_date'))}\n")
+        report.write('\n')
         
         # Device information
-        lines.append('## Device Information')
-        lines.append('')
+        report.write('## Device Information\n')
+        report.write('\n')
         device_info = self.case_info.get('device_info', {})
         
         # Create a table for device info
-        lines.append('| Property | Value |')
-        lines.append('|----------|-------|')
-        lines.append(f"| Model | {device_info.get('model', 'Unknown')} |")
-        lines.append(f"| iOS Version | {device_info.get('os_version', 'Unknown')} |")
-        lines.append(f"| Serial Number | {device_info.get('serial_number', 'Unknown')} |")
+        report.write('| Property | Value |\n')
+        report.write('|----------|-------|\n')
+        report.write(f"| Model | {device_info.get('model', 'Unknown')} |\n")
+        report.write(f"| iOS Version | {device_info.get('os_version', 'Unknown')} |\n")
+        report.write(f"| Serial Number | {device_info.get('serial_number', 'Unknown')} |\n")
         
         if 'imei' in device_info:
-            lines.append(f"| IMEI | {device_info.get('imei')} |")
+            report.write(f"| IMEI | {device_info.get('imei')} |\n")
         
         if 'udid' in device_info:
-            lines.append(f"| UDID | {device_info.get('udid')} |")
+            report.write(f"| UDID | {device_info.get('udid')} |\n")
         
         if 'capacity' in device_info:
-            lines.append(f"| Capacity | {device_info.get('capacity')} |")
+            report.write(f"| Capacity | {device_info.get('capacity')} |\n")
         
-        lines.append('')
+        report.write('\n')
         
         # Extraction information
         if 'extraction_info' in data:
-            lines.append('## Extraction Information')
-            lines.append('')
+            report.write('## Extraction Information\n')
+            report.write('\n')
             
             extraction_info = data.get('extraction_info', {})
             
-            lines.append('| Property | Value |')
-            lines.append('|----------|-------|')
-            lines.append(f"| Method | {extraction_info.get('method', 'Unknown')} |")
-            lines.append(f"| Tool | {extraction_info.get('tool', 'Unknown')} |")
-            lines.append(f"| Date | {self._format_datetime(extraction_info.get('date', ''))} |")
+            report.write('| Property | Value |\n')
+            report.write('|----------|-------|\n')
+            report.write(f"| Method | {extraction_info.get('method', 'Unknown')} |\n")
+            report.write(f"| Tool | {extraction_info.get('tool', 'Unknown')} |\n")
+            report.write(f"| Date | {self._format_datetime(extraction_info.get('date', ''))} |\n")
             
             if 'hash' in extraction_info:
-                lines.append(f"| Hash | {extraction_info.get('hash')} |")
+                report.write(f"| Hash | {extraction_info.get('hash')} |\n")
             
-            lines.append('')
+            report.write('\n')
         
         # Analysis methodology
         if 'methodology' in data:
-            lines.append('## Analysis Methodology')
-            lines.append('')
-            lines.append(data.get('methodology', ''))
-            lines.append('')
+            report.write('## Analysis Methodology\n')
+            report.write('\n')
+            report.write(f"{data.get('methodology', '')}\n")
+            report.write('\n')
         
         # Analysis sections with detailed technical content
-        self._add_technical_sections(lines, data)
+        self._add_technical_sections(report, data)
         
         # Technical findings
         if 'findings' in data:
-            lines.append('## Technical Findings')
-            lines.append('')
+            report.write('## Technical Findings\n')
+            report.write('\n')
             
             findings = data.get('findings', [])
             for i, finding in enumerate(findings, 1):
@@ -923,48 +941,48 @@ class ForensicReportGenerator:
                 finding_description = finding.get('description', '')
                 finding_evidence = finding.get('evidence', [])
                 
-                lines.append(f"### {finding_title}")
-                lines.append('')
-                lines.append(finding_description)
-                lines.append('')
+                report.write(f"### {finding_title}\n")
+                report.write('\n')
+                report.write(f"{finding_description}\n")
+                report.write('\n')
                 
                 if finding_evidence:
-                    lines.append('**Evidence:**')
-                    lines.append('')
+                    report.write('**Evidence:**\n')
+                    report.write('\n')
                     
                     for evidence in finding_evidence:
-                        lines.append(f"- {evidence}")
+                        report.write(f"- {evidence}\n")
                     
-                    lines.append('')
+                    report.write('\n')
         
         # Technical timeline
         if 'timeline' in data:
-            self._add_technical_timeline(lines, data.get('timeline', []))
+            self._add_technical_timeline(report, data.get('timeline', []))
         
         # Appendices
         if 'appendices' in data:
-            lines.append('## Appendices')
-            lines.append('')
+            report.write('## Appendices\n')
+            report.write('\n')
             
             appendices = data.get('appendices', {})
             for title, content in appendices.items():
-                lines.append(f"### {title}")
-                lines.append('')
-                lines.append(content)
-                lines.append('')
+                report.write(f"### {title}\n")
+                report.write('\n')
+                report.write(f"{content}\n")
+                report.write('\n')
         
         # References
         if 'references' in data:
-            lines.append('## References')
-            lines.append('')
+            report.write('## References\n')
+            report.write('\n')
             
             references = data.get('references', [])
             for i, reference in enumerate(references, 1):
-                lines.append(f"{i}. {reference}")
+                report.write(f"{i}. {reference}\n")
             
-            lines.append('')
+            report.write('\n')
         
-        return '\n'.join(lines)
+        return self._finish_report(report)
     
     def _generate_technical_html(self, data: Dict[str, Any]) -> str:
         """
@@ -980,31 +998,31 @@ class ForensicReportGenerator:
         markdown_report = self._generate_technical_markdown(data)
         
         # Simple HTML template
-        html_lines = []
+        html = io.StringIO()
         
         # HTML header
-        html_lines.append('<!DOCTYPE html>')
-        html_lines.append('<html lang="en">')
-        html_lines.append('<head>')
-        html_lines.append('    <meta charset="UTF-8">')
-        html_lines.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html_lines.append(f'    <title>iOS Forensic Analysis - Technical Report - {self.case_info.get("case_number")}</title>')
-        html_lines.append('    <style>')
-        html_lines.append('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 40px; }')
-        html_lines.append('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }')
-        html_lines.append('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; margin-top: 30px; }')
-        html_lines.append('        h3 { color: #2c3e50; }')
-        html_lines.append('        table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }')
-        html_lines.append('        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }')
-        html_lines.append('        th { background-color: #f2f2f2; }')
-        html_lines.append('        tr:nth-child(even) { background-color: #f9f9f9; }')
-        html_lines.append('        code { background-color: #f8f8f8; padding: 2px 4px; border-radius: 3px; font-family: monospace; }')
-        html_lines.append('        pre { background-color: #f8f8f8; padding: 10px; border-radius: 5px; overflow-x: auto; font-family: monospace; }')
-        html_lines.append('        .evidence-item { margin-left: 20px; padding-left: 10px; border-left: 3px solid #3498db; margin-bottom: 10px; }')
-        html_lines.append('        .technical-data { font-family: monospace; white-space: pre-wrap; }')
-        html_lines.append('    </style>')
-        html_lines.append('</head>')
-        html_lines.append('<body>')
+        html.write('<!DOCTYPE html>\n')
+        html.write('<html lang="en">\n')
+        html.write('<head>\n')
+        html.write('    <meta charset="UTF-8">\n')
+        html.write('    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n')
+        html.write(f'    <title>iOS Forensic Analysis - Technical Report - {self.case_info.get("case_number")}</title>\n')
+        html.write('    <style>\n')
+        html.write('        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 0; padding: 40px; }\n')
+        html.write('        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }\n')
+        html.write('        h2 { color: #2c3e50; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; margin-top: 30px; }\n')
+        html.write('        h3 { color: #2c3e50; }\n')
+        html.write('        table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }\n')
+        html.write('        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }\n')
+        html.write('        th { background-color: #f2f2f2; }\n')
+        html.write('        tr:nth-child(even) { background-color: #f9f9f9; }\n')
+        html.write('        code { background-color: #f8f8f8; padding: 2px 4px; border-radius: 3px; font-family: monospace; }\n')
+        html.write('        pre { background-color: #f8f8f8; padding: 10px; border-radius: 5px; overflow-x: auto; font-family: monospace; }\n')
+        html.write('        .evidence-item { margin-left: 20px; padding-left: 10px; border-left: 3px solid #3498db; margin-bottom: 10px; }\n')
+        html.write('        .technical-data { font-family: monospace; white-space: pre-wrap; }\n')
+        html.write('    </style>\n')
+        html.write('</head>\n')
+        html.write('<body>\n')
         
         # Convert markdown to HTML
         in_code_block = False
@@ -1012,13 +1030,13 @@ class ForensicReportGenerator:
         table_rows = []
         
         for line in markdown_report.split('\n'):
+            # Classify the line by its leading marker with a single table lookup
+            marker, separator, text = line.partition(' ')
+            heading_tag = _HEADING_TAGS.get(marker) if separator else None
+            
             # Headers
-            if line.startswith('# '):
-                html_lines.append(f'<h1>{line[2:]}</h1>')
-            elif line.startswith('## '):
-                html_lines.append(f'<h2>{line[3:]}</h2>')
-            elif line.startswith('### '):
-                html_lines.append(f'<h3>{line[4:]}</h3>')
+            if heading_tag:
+                html.write(f'<{heading_tag}>{text}</{heading_tag}>\n')
             # Tables
             elif line.startswith('|') and line.endswith('|'):
                 if not in_table:
@@ -1029,7 +1047,7 @@ class ForensicReportGenerator:
             # End of table
             elif in_table and line.strip() == '':
                 if table_rows:
-                    html_lines.append('<table>')
+                    html.write('<table>\n')
                     
                     # Process table rows
                     is_header_row = True
@@ -1043,66 +1061,68 @@ class ForensicReportGenerator:
                             continue
                         
                         if is_header_row and not is_separator_row:
-                            html_lines.append('<tr>')
+                            html.write('<tr>\n')
                             for cell in cells:
-                                html_lines.append(f'<th>{cell}</th>')
-                            html_lines.append('</tr>')
+                                html.write(f'<th>{cell}</th>\n')
+                            html.write('</tr>\n')
                             is_header_row = False
                         else:
-                            html_lines.append('<tr>')
+                            html.write('<tr>\n')
                             for cell in cells:
-                                html_lines.append(f'<td>{cell}</td>')
-                            html_lines.append('</tr>')
+                                html.write(f'<td>{cell}</td>\n')
+                            html.write('</tr>\n')
                     
-                    html_lines.append('</table>')
+                    html.write('</table>\n')
                 
                 in_table = False
                 table_rows = []
             # Code blocks
             elif line.startswith('```'):
                 if in_code_block:
-                    html_lines.append('</code></pre>')
+                    html.write('</code></pre>\n')
                     in_code_block = False
                 else:
                     lang = line[3:].strip()
-                    html_lines.append(f'<pre><code class="language-{lang}">')
+                    html.write(f'<pre><code class="language-{lang}">\n')
                     in_code_block = True
             # Lists
-            elif line.startswith('- '):
-                html_lines.append(f'<div class="evidence-item">{line[2:]}</div>')
+            elif separator and marker == '-':
+                html.write(f'<div class="evidence-item">{text}</div>\n')
             # Bold text
             elif '**' in line:
-                line = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', line)
-                html_lines.append(f'<p>{line}</p>')
+                # A lone marker cannot open and close a bold span
+                if line.count('**') >= 2:
+                    line = _BOLD_PATTERN.sub(r'<strong>\1</strong>', line)
+                html.write(f'<p>{line}</p>\n')
             # Empty line
             elif line.strip() == '' and not in_table:
-                html_lines.append('<br>')
+                html.write('<br>\n')
             # Regular paragraph
             elif not in_table and not in_code_block:
-                html_lines.append(f'<p>{line}</p>')
+                html.write(f'<p>{line}</p>\n')
             # Inside code block
             elif in_code_block:
-                html_lines.append(line)
+                html.write(f"{line}\n")
         
         # Close any open tags
         if in_table:
-            html_lines.append('</table>')
+            html.write('</table>\n')
         
         if in_code_block:
-            html_lines.append('</code></pre>')
+            html.write('</code></pre>\n')
         
         # HTML footer
-        html_lines.append('</body>')
-        html_lines.append('</html>')
+        html.write('</body>\n')
+        html.write('</html>')
         
-        return '\n'.join(html_lines)
+        return html.getvalue()
     
-    def _add_analysis_sections(self, lines: List[str], data: Dict[str, Any]) -> None:
+    def _add_analysis_sections(self, report: io.StringIO, data: Dict[str, Any]) -> None:
         """
         Add analysis sections to the report
         
         Args:
-            lines: List of report lines to append to
+            report: Report buffer to write to
             data: Forensic data
         """
         # Check for analysis sections
@@ -1110,76 +1130,76 @@ class ForensicReportGenerator:
             analysis = data['analysis']
             
             for section_title, section_data in analysis.items():
-                lines.append(f"## {section_title}")
-                lines.append('')
+                report.write(f"## {section_title}\n")
+                report.write('\n')
                 
                 if isinstance(section_data, str):
                     # Simple text section
-                    lines.append(section_data)
+                    report.write(f"{section_data}\n")
                 elif isinstance(section_data, dict):
                     # Complex section with subsections
                     if 'summary' in section_data:
-                        lines.append(section_data['summary'])
-                        lines.append('')
+                        report.write(f"{section_data['summary']}\n")
+                        report.write('\n')
                     
                     if 'findings' in section_data:
                         findings = section_data['findings']
                         if isinstance(findings, list):
                             for finding in findings:
                                 if isinstance(finding, str):
-                                    lines.append(f"- {finding}")
+                                    report.write(f"- {finding}\n")
                                 elif isinstance(finding, dict) and 'description' in finding:
-                                    lines.append(f"- {finding['description']}")
+                                    report.write(f"- {finding['description']}\n")
                             
-                            lines.append('')
+                            report.write('\n')
                         elif isinstance(findings, dict):
                             for key, value in findings.items():
-                                lines.append(f"### {key}")
-                                lines.append('')
-                                lines.append(value)
-                                lines.append('')
+                                report.write(f"### {key}\n")
+                                report.write('\n')
+                                report.write(f"{value}\n")
+                                report.write('\n')
                     
                     if 'data' in section_data:
                         data_content = section_data['data']
                         if isinstance(data_content, list):
                             for item in data_content:
                                 if isinstance(item, dict) and 'label' in item and 'value' in item:
-                                    lines.append(f"**{item['label']}:** {item['value']}")
+                                    report.write(f"**{item['label']}:** {item['value']}\n")
                             
-                            lines.append('')
+                            report.write('\n')
                         elif isinstance(data_content, dict):
-                            lines.append('| Property | Value |')
-                            lines.append('|----------|-------|')
+                            report.write('| Property | Value |\n')
+                            report.write('|----------|-------|\n')
                             
                             for key, value in data_content.items():
                                 if isinstance(value, (str, int, float, bool)):
-                                    lines.append(f"| {key} | {value} |")
+                                    report.write(f"| {key} | {value} |\n")
                             
-                            lines.append('')
+                            report.write('\n')
                 
                 elif isinstance(section_data, list):
                     # List of items
                     for item in section_data:
                         if isinstance(item, str):
-                            lines.append(f"- {item}")
+                            report.write(f"- {item}\n")
                         elif isinstance(item, dict) and 'description' in item:
-                            lines.append(f"- {item['description']}")
+                            report.write(f"- {item['description']}\n")
                     
-                    lines.append('')
+                    report.write('\n')
     
-    def _add_timeline_section(self, lines: List[str], timeline_data: List[Dict[str, Any]]) -> None:
+    def _add_timeline_section(self, report: io.StringIO, timeline_data: List[Dict[str, Any]]) -> None:
         """
         Add timeline section to the report
         
         Args:
-            lines: List of report lines to append to
+            report: Report buffer to write to
             timeline_data: Timeline entries
         """
         if not timeline_data:
             return
         
-        lines.append('## Timeline')
-        lines.append('')
+        report.write('## Timeline\n')
+        report.write('\n')
         
         # Sort timeline entries by timestamp
         sorted_timeline = sorted(timeline_data, key=lambda x: x.get('timestamp', ''))
@@ -1195,8 +1215,8 @@ class ForensicReportGenerator:
             # Add date header if changed
             if date_part != current_date:
                 current_date = date_part
-                lines.append(f"### {date_part}")
-                lines.append('')
+                report.write(f"### {date_part}\n")
+                report.write('\n')
             
             # Format time part
             time_part = timestamp.split('T')[1] if 'T' in timestamp else ''
@@ -1209,26 +1229,26 @@ class ForensicReportGenerator:
             entry_type = entry.get('type', 'unknown')
             description = entry.get('description', 'No description')
             
-            lines.append(f"**{time_part}** - {entry_type}: {description}")
+            report.write(f"**{time_part}** - {entry_type}: {description}\n")
             
             # Add location if available
             if 'latitude' in entry and 'longitude' in entry:
                 lat = entry.get('latitude')
                 lon = entry.get('longitude')
-                lines.append(f"Location: {lat}, {lon}")
+                report.write(f"Location: {lat}, {lon}\n")
             
             # Add duration if available
             if 'duration_formatted' in entry:
-                lines.append(f"Duration: {entry.get('duration_formatted')}")
+                report.write(f"Duration: {entry.get('duration_formatted')}\n")
             
-            lines.append('')
+            report.write('\n')
     
-    def _add_technical_sections(self, lines: List[str], data: Dict[str, Any]) -> None:
+    def _add_technical_sections(self, report: io.StringIO, data: Dict[str, Any]) -> None:
         """
         Add technical analysis sections to the report
         
         Args:
-            lines: List of report lines to append to
+            report: Report buffer to write to
             data: Forensic data
         """
         # Add technical analysis sections
@@ -1236,112 +1256,145 @@ class ForensicReportGenerator:
             technical_analysis = data['technical_analysis']
             
             for section_title, section_data in technical_analysis.items():
-                lines.append(f"## {section_title}")
-                lines.append('')
+                report.write(f"## {section_title}\n")
+                report.write('\n')
                 
                 if isinstance(section_data, str):
                     # Simple text section
-                    lines.append(section_data)
-                    lines.append('')
+                    report.write(f"{section_data}\n")
+                    report.write('\n')
                 elif isinstance(section_data, dict):
                     # Complex section with subsections
                     if 'description' in section_data:
-                        lines.append(section_data['description'])
-                        lines.append('')
+                        report.write(f"{section_data['description']}\n")
+                        report.write('\n')
                     
                     if 'technical_details' in section_data:
                         tech_details = section_data['technical_details']
                         
                         if isinstance(tech_details, str):
-                            lines.append('```')
-                            lines.append(tech_details)
-                            lines.append('```')
+                            report.write('```\n')
+                            report.write(f"{tech_details}\n")
+                            report.write('```\n')
                         elif isinstance(tech_details, dict):
-                            lines.append('```json')
-                            lines.append(json.dumps(tech_details, indent=2))
-                            lines.append('```')
+                            report.write('```json\n')
+                            # Serialize straight into the report buffer
+                            json.dump(tech_details, report, indent=2)
+                            report.write('\n```\n')
                         elif isinstance(tech_details, list):
                             for detail in tech_details:
                                 if isinstance(detail, dict) and 'key' in detail and 'value' in detail:
-                                    lines.append(f"**{detail['key']}:** {detail['value']}")
+                                    report.write(f"**{detail['key']}:** {detail['value']}\n")
                         
-                        lines.append('')
+                        report.write('\n')
                     
                     if 'artifacts' in section_data:
                         artifacts = section_data['artifacts']
-                        lines.append('### Artifacts')
-                        lines.append('')
+                        report.write('### Artifacts\n')
+                        report.write('\n')
                         
                         for artifact in artifacts:
                             if isinstance(artifact, dict):
                                 if 'path' in artifact:
-                                    lines.append(f"- **Path:** {artifact['path']}")
+                                    report.write(f"- **Path:** {artifact['path']}\n")
                                 if 'description' in artifact:
-                                    lines.append(f"  **Description:** {artifact['description']}")
+                                    report.write(f"  **Description:** {artifact['description']}\n")
                                 if 'hash' in artifact:
-                                    lines.append(f"  **Hash:** {artifact['hash']}")
-                                lines.append('')
+                                    report.write(f"  **Hash:** {artifact['hash']}\n")
+                                report.write('\n')
                             elif isinstance(artifact, str):
-                                lines.append(f"- {artifact}")
+                                report.write(f"- {artifact}\n")
                         
-                        lines.append('')
+                        report.write('\n')
                 
                 elif isinstance(section_data, list):
                     # List of items
                     for item in section_data:
                         if isinstance(item, str):
-                            lines.append(f"- {item}")
+                            report.write(f"- {item}\n")
                         elif isinstance(item, dict):
                             if 'title' in item and 'content' in item:
-                                lines.append(f"### {item['title']}")
-                                lines.append('')
-                                lines.append(item['content'])
-                                lines.append('')
+                                report.write(f"### {item['title']}\n")
+                                report.write('\n')
+                                report.write(f"{item['content']}\n")
+                                report.write('\n')
                             elif 'description' in item:
-                                lines.append(f"- {item['description']}")
+                                report.write(f"- {item['description']}\n")
                     
-                    lines.append('')
+                    report.write('\n')
     
-    def _add_technical_timeline(self, lines: List[str], timeline_data: List[Dict[str, Any]]) -> None:
+    def _add_technical_timeline(self, report: io.StringIO, timeline_data: List[Dict[str, Any]]) -> None:
         """
         Add technical timeline section to the report
         
         Args:
-            lines: List of report lines to append to
+            report: Report buffer to write to
             timeline_data: Timeline entries
         """
         if not timeline_data:
             return
         
-        lines.append('## Technical Timeline')
-        lines.append('')
+        report.write('## Technical Timeline\n')
+        report.write('\n')
         
         # Sort timeline entries by timestamp
         sorted_timeline = sorted(timeline_data, key=lambda x: x.get('timestamp', ''))
         
         # Create a table for the timeline
-        lines.append('| Timestamp | Type | Description | Technical Details |')
-        lines.append('|-----------|------|-------------|-------------------|')
+        report.write('| Timestamp | Type | Description | Technical Details |\n')
+        report.write('|-----------|------|-------------|-------------------|\n')
+        
+        # Extract each column in one pass, then emit every row with a single write
+        timestamps = [entry.get('timestamp', '') for entry in sorted_timeline]
+        entry_types = [entry.get('type', 'unknown') for entry in sorted_timeline]
+        descriptions = [entry.get('description', 'No description') for entry in sorted_timeline]
+        tech_details = [self._format_technical_details(entry.get('technical_details'))
+                        for entry in sorted_timeline]
+        
+        report.write(''.join(
+            f"| {timestamp} | {entry_type} | {description} | {details} |\n"
+            for timestamp, entry_type, description, details
+            in zip(timestamps, entry_types, descriptions, tech_details)
+        ))
+        
+        report.write('\n')
+    
+    def _format_technical_details(self, tech_details: Any) -> str:
+        """
+        Format the technical details of a timeline entry for a table cell
         
-        for entry in sorted_timeline:
-            timestamp = entry.get('timestamp', '')
-            entry_type = entry.get('type', 'unknown')
-            description = entry.get('description', 'No description')
-            
-            # Format technical details
-            tech_details = ''
-            if 'technical_details' in entry:
-                if isinstance(entry['technical_details'], dict):
-                    details = []
-                    for key, value in entry['technical_details'].items():
-                        details.append(f"{key}: {value}")
-                    tech_details = '<br>'.join(details)
-                elif isinstance(entry['technical_details'], str):
-                    tech_details = entry['technical_details']
+        Args:
+            tech_details: Technical details dictionary or string
             
-            lines.append(f"| {timestamp} | {entry_type} | {description} | {tech_details} |")
+        Returns:
+            Formatted technical details
+        """
+        if isinstance(tech_details, dict):
+            return '<br>'.join(f"{key}: {value}" for key, value in tech_details.items())
         
-        lines.append('')
+        if isinstance(tech_details, str):
+            return tech_details
+        
+        return ''
+    
+    def _finish_report(self, report: io.StringIO) -> str:
+        """
+        Return the contents of a report buffer
+        
+        Every line is written with a trailing newline, so the final one is
+        dropped to keep the output identical to a newline-joined list of lines.
+        
+        Args:
+            report: Report buffer
+        
+        Returns:
+            Report content
+        """
+        if report.tell():
+            report.seek(report.tell() - 1)
+            report.truncate()
+        
+        return report.getvalue()
     
     def _format_datetime(self, timestamp: Union[str, datetime.datetime, None]) -> str:
         """
@@ -1370,7 +1423,7 @@ class ForensicReportGenerator:
 
 
 def generate_report(data: Dict[str, Any], case_info: Dict[str, Any] = None, 
-                   template: str = 'standard', format: str = 'markdown',
+                   template: str = 'standard', format: str = FORMAT_MARKDOWN,
                    output_path: Optional[str] = None) -> str:
     """
     Generate a forensic report
@@ -1392,7 +1445,7 @@ def generate_report(data: Dict[str, Any], case_info: Dict[str, Any] = None,
 
 
 def generate_timeline_report(timeline_data: List[Dict[str, Any]], case_info: Dict[str, Any] = None,
-                           format: str = 'markdown', output_path: Optional[str] = None) -> str:
+                           format: str = FORMAT_MARKDOWN, output_path: Optional[str] = None) -> str:
     """
     Generate a timeline report
     
@@ -1412,7 +1465,7 @@ def generate_timeline_report(timeline_data: List[Dict[str, Any]], case_info: Dic
 
 
 def generate_technical_report(technical_data: Dict[str, Any], case_info: Dict[str, Any] = None,
-                            format: str = 'markdown', output_path: Optional[str] = None) -> str:
+                            format: str = FORMAT_MARKDOWN, output_path: Optional[str] = None) -> str:
     """
     Generate a technical report
     
@@ -1433,7 +1486,7 @@ def generate_technical_report(technical_data: Dict[str, Any], case_info: Dict[st
 
 def generate_executive_report(key_findings: List[str], executive_summary: str = None,
                             conclusions: str = None, case_info: Dict[str, Any] = None,
-                            format: str = 'markdown', output_path: Optional[str] = None) -> str:
+                            format: str = FORMAT_MARKDOWN, output_path: Optional[str] = None) -> str:
     """
     Generate an executive summary report
     
@@ -1461,4 +1514,48 @@ def generate_executive_report(key_findings: List[str], executive_summary: str =
         data['conclusions'] = conclusions
     
     generator = ForensicReportGenerator(case_info)
-    return generator.generate_report(data, 'executive', format, output_path)
\ No newline at end of file
+    return generator.generate_report(data, 'executive', format, output_path)
+
+
+def _generate_report_job(job: Tuple[Dict[str, Any], Optional[Dict[str, Any]], str, str, Optional[str]]) -> str:
+    """
+    Generate a single report from a batch job tuple
+    
+    The generator fills defaults into case_info, so it gets a copy: the
+    caller's dictionary stays unchanged whether the job runs in this
+    process or in a worker.
+    
+    Args:
+        job: Tuple of (data, case_info, template, format, output_path)
+        
+    Returns:
+        Generated report content
+    """
+    data, case_info, template, format, output_path = job
+    case_info = dict(case_info) if case_info else None
+    return generate_report(data, case_info, template, format, output_path)
+
+
+def generate_reports_batch(jobs: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]], str, str, Optional[str]]],
+                          max_workers: Optional[int] = None) -> List[str]:
+    """
+    Generate several independent reports in parallel
+    
+    Each report is built in a separate worker process, so large batches
+    (e.g. one report per device or suspect) use all available cores.
+    
+    Args:
+        jobs: List of (data, case_info, template, format, output_path) tuples
+        max_workers: Maximum number of worker processes (defaults to the CPU count)
+        
+    Returns:
+        Generated report contents, in the same order as the jobs
+    """
+    logger.info(f"Generating {len(jobs)} reports")
+    
+    # A process pool is not worth its start-up cost for a single report
+    if len(jobs) <= 1 or max_workers == 1:
+        return [_generate_report_job(job) for job in jobs]
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_generate_report_job, jobs))
@@ -2,6 +2,7 @@
 
 import os
 import stat
+from collections import deque
 from typing import Dict, List, Optional, Any, Union
 
 def list_directory(path: str, recursive: bool = False, show_hidden: bool = False) -> Dict[str, Any]:
@@ -22,7 +23,41 @@ def list_directory(path: str, recursive: bool = False, show_hidden: bool = False
     if not os.path.isdir(path):
         raise NotADirectoryError(f"Path is not a directory: {path}")
     
-    result = {
+    result = _new_listing(path)
+    
+    try:
+        subdirectories = _scan_directory(result, recursive, show_hidden)
+    except PermissionError as e:
+        raise PermissionError(f"Permission denied accessing directory: {path}. {str(e)}")
+    
+    # Descend with an explicit stack rather than recursion, so deep trees
+    # cannot exceed the interpreter's recursion limit
+    pending = deque(subdirectories)
+    while pending:
+        item_info = pending.pop()
+        
+        try:
+            pending.extend(_scan_directory(item_info['children'], recursive, show_hidden))
+        except (PermissionError, FileNotFoundError) as e:
+            del item_info['children']
+            if isinstance(e, PermissionError):
+                item_info['error'] = f"Permission denied accessing directory: {item_info['path']}. {str(e)}"
+            else:
+                item_info['error'] = str(e)
+    
+    return result
+
+def _new_listing(path: str) -> Dict[str, Any]:
+    """
+    Create an empty listing for a directory
+    
+    Args:
+        path: Path to the directory
+        
+    Returns:
+        Listing dictionary with no children and zero counts
+    """
+    return {
         'path': path,
         'name': os.path.basename(path),
         'is_directory': True,
@@ -33,36 +68,48 @@ def list_directory(path: str, recursive: bool = False, show_hidden: bool = False
             'total': 0
         }
     }
+
+def _scan_directory(listing: Dict[str, Any], recursive: bool, show_hidden: bool) -> List[Dict[str, Any]]:
+    """
+    Fill in the children and counts of a directory listing
     
-    # List directory contents
-    try:
-        items = os.listdir(path)
-        
-        # Filter hidden files if not showing them
-        if not show_hidden:
-            items = [item for item in items if not item.startswith('.')]
+    Args:
+        listing: Listing dictionary to update
+        recursive: Whether subdirectories get listings of their own
+        show_hidden: Whether to show hidden files
         
-        # Process each item
-        for item in items:
-            item_path = os.path.join(path, item)
+    Returns:
+        Item dictionaries of subdirectories whose listings still need scanning
+    """
+    children = listing['children']
+    count = listing['count']
+    subdirectories = []
+    
+    # scandir yields each name and type from a single directory read
+    with os.scandir(listing['path']) as entries:
+        for entry in entries:
+            # Filter hidden files if not showing them
+            if not show_hidden and entry.name.startswith('.'):
+                continue
             
             try:
-                # Get basic file stats
-                stat_info = os.stat(item_path)
-                is_dir = os.path.isdir(item_path)
+                # Get basic file stats; symlinks are followed, and the mode
+                # tells whether the target is a directory without another stat
+                stat_info = entry.stat()
+                is_dir = stat.S_ISDIR(stat_info.st_mode)
                 
                 # Update counts
                 if is_dir:
-                    result['count']['directories'] += 1
+                    count['directories'] += 1
                 else:
-                    result['count']['files'] += 1
+                    count['files'] += 1
                 
-                result['count']['total'] += 1
+                count['total'] += 1
                 
                 # Create item info
                 item_info = {
-                    'name': item,
-                    'path': item_path,
+                    'name': entry.name,
+                    'path': entry.path,
                     'is_directory': is_dir,
                     'size': stat_info.st_size,
                     'created': stat_info.st_ctime,
@@ -71,27 +118,23 @@ def list_directory(path: str, recursive: bool = False, show_hidden: bool = False
                     'permissions': stat.filemode(stat_info.st_mode)
                 }
                 
-                # If recursive and item is a directory, list its contents
+                # If recursive and item is a directory, its contents are
+                # listed once this directory is done
                 if recursive and is_dir:
-                    try:
-                        item_info['children'] = list_directory(item_path, recursive, show_hidden)
-                    except (PermissionError, FileNotFoundError) as e:
-                        item_info['error'] = str(e)
+                    item_info['children'] = _new_listing(entry.path)
+                    subdirectories.append(item_info)
                 
-                result['children'].append(item_info)
+                children.append(item_info)
                 
             except (PermissionError, FileNotFoundError) as e:
                 # Handle errors for individual items
-                result['children'].append({
-                    'name': item,
-                    'path': item_path,
+                children.append({
+                    'name': entry.name,
+                    'path': entry.path,
                     'error': str(e)
                 })
     
-    except PermissionError as e:
-        raise PermissionError(f"Permission denied accessing directory: {path}. {str(e)}")
-    
     # Sort children by name
-    result['children'].sort(key=lambda x: x['name'])
+    children.sort(key=lambda x: x['name'])
     
-    return result
\ No newline at end of file
+    return subdirectories
@@ -1,8 +1,53 @@
 # tools/filesystem/file_reader.py - File reading utilities
 
 import os
-import chardet
-from typing import Dict, Optional, Any, Union, BinaryIO
+import stat
+import mmap
+import base64
+import codecs
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Union, BinaryIO, Tuple, Iterator
+
+try:
+    # cChardet is a C++ drop-in replacement for chardet and is much faster
+    import cchardet as chardet
+except ImportError:
+    import chardet
+
+# Maximum number of bytes inspected when detecting the encoding of a file
+DETECTION_SAMPLE_SIZE = 64 * 1024
+
+# Size of the chunks fed to the incremental encoding detector
+DETECTION_CHUNK_SIZE = 4096
+
+# Number of leading bytes validated before decoding a whole span
+VALIDATION_PROBE_SIZE = 4096
+
+# Number of encoding detection results kept for files that are read again
+DETECTION_CACHE_SIZE = 1024
+
+# Spans larger than this are memory-mapped instead of read onto the heap
+MMAP_THRESHOLD = 1024 * 1024
+
+# Spans larger than this are not decoded inline but left to iter_file_decoded
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+# Byte order marks and the encodings they identify (UTF-32 before UTF-16,
+# since the UTF-32 little-endian mark starts with the UTF-16 one)
+BYTE_ORDER_MARKS = (
+    (b'\xef\xbb\xbf', 'UTF-8-SIG'),
+    (b'\xff\xfe\x00\x00', 'UTF-32'),
+    (b'\x00\x00\xfe\xff', 'UTF-32'),
+    (b'\xff\xfe', 'UTF-16'),
+    (b'\xfe\xff', 'UTF-16'),
+)
+
+# Encoding detection results by (path, mtime_ns, size, offset, sample
+# length), least recently used first
+_encoding_cache: 'OrderedDict[Tuple[str, int, int, int, int], Tuple[Optional[str], float]]' = OrderedDict()
+_encoding_cache_lock = threading.Lock()
 
 def read_file(path: str, encoding: str = 'auto', offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
     """
@@ -15,15 +60,24 @@ def read_file(path: str, encoding: str = 'auto', offset: int = 0, length: Option
         length: Number of bytes to read (None for entire file)
         
     Returns:
-        Dictionary with file contents and metadata
+        Dictionary with file contents and metadata; binary content is
+        base64 encoded and flagged with 'content_encoding'. Spans larger
+        than STREAM_THRESHOLD have no content and set 'content_stream';
+        read them with iter_file_decoded.
     """
-    if not os.path.exists(path):
+    # A single stat call covers the existence, type and size checks
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {path}")
     
-    if not os.path.isfile(path):
+    if stat.S_ISDIR(st.st_mode):
         raise IsADirectoryError(f"Path is a directory, not a file: {path}")
     
-    file_size = os.path.getsize(path)
+    if not stat.S_ISREG(st.st_mode):
+        raise IOError(f"Path is not a regular file: {path}")
+    
+    file_size = st.st_size
     
     # Validate offset and length
     if offset < 0:
@@ -43,7 +97,7 @@ def read_file(path: str, encoding: str = 'auto', offset: int = 0, length: Option
     # Prepare result dictionary
     result = {
         'path': path,
-        'name': os.path.basename(path),
+        'name': path.rpartition(os.sep)[2],
         'size': file_size,
         'offset': offset,
         'length': length,
@@ -52,50 +106,375 @@ def read_file(path: str, encoding: str = 'auto', offset: int = 0, length: Option
     
     # Read file content
     try:
-        with open(path, 'rb') as f:
-            f.seek(offset)
-            data = f.read(length)
+        # Identifies the span for cached encoding detection, which stays
+        # valid while the file's modification time and size are unchanged
+        span_key = (path, st.st_mtime_ns, file_size, offset)
         
-        # Handle encoding
-        if encoding.lower() == 'auto':
-            # Try to detect encoding
-            detection = chardet.detect(data)
-            detected_encoding = detection['encoding'] if detection['encoding'] else 'utf-8'
-            confidence = detection['confidence']
+        if length > STREAM_THRESHOLD:
+            # Too large to return as a single string; callers read the
+            # content incrementally with iter_file_decoded instead
+            result['content'] = None
+            result['content_stream'] = True
             
-            result['detected_encoding'] = detected_encoding
-            result['encoding_confidence'] = confidence
-            
-            try:
-                # Try to decode with detected encoding
-                content = data.decode(detected_encoding)
-                result['content'] = content
-                result['is_binary'] = False
+            if encoding.lower() == 'auto':
+                detected_encoding, confidence = _resolve_encoding(span_key, length)
+                result['detected_encoding'] = detected_encoding
+                result['encoding_confidence'] = confidence
                 result['encoding'] = detected_encoding
-            except UnicodeDecodeError:
-                # If decode fails, treat as binary
-                result['content'] = data.hex()
-                result['is_binary'] = True
-                result['encoding'] = 'binary'
-        
-        elif encoding.lower() == 'binary':
-            # Return binary data as hex
-            result['content'] = data.hex()
-            result['is_binary'] = True
+            
+            return result
         
-        else:
-            # Try specified encoding
-            try:
-                content = data.decode(encoding)
-                result['content'] = content
-                result['is_binary'] = False
-            except UnicodeDecodeError:
-                # If decode fails, treat as binary
-                result['content'] = data.hex()
-                result['is_binary'] = True
-                result['encoding'] = 'binary'
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            mapped = None
+            if length > MMAP_THRESHOLD:
+                # Map large spans rather than copying them onto the heap; the
+                # mapping must start on an allocation-granularity boundary
+                start = offset - offset % mmap.ALLOCATIONGRANULARITY
+                try:
+                    mapped = mmap.mmap(fd, offset + length - start, access=mmap.ACCESS_READ, offset=start)
+                except (ValueError, OSError):
+                    # Not every file can be mapped (e.g. on some network or
+                    # virtual filesystems, or if it shrank since the stat),
+                    # so read the span instead
+                    mapped = None
+            
+            if mapped is not None:
+                with mapped, memoryview(mapped)[offset - start:] as data:
+                    _decode_content(data, encoding, result, span_key)
+            else:
+                _decode_content(_read_span(fd, offset, length), encoding, result, span_key)
+        finally:
+            os.close(fd)
     
     except (PermissionError, IOError) as e:
         raise IOError(f"Error reading file {path}: {str(e)}")
     
-    return result
\ No newline at end of file
+    return result
+
+def read_files(paths: List[str], encoding: str = 'auto', max_workers: int = 8) -> List[Dict[str, Any]]:
+    """
+    Read several files concurrently
+    
+    Reads run on a thread pool so file I/O overlaps with detection and
+    decoding, which release the GIL in their native parts.
+    
+    Args:
+        paths: Paths to the files
+        encoding: File encoding ('auto', 'utf-8', 'binary', etc.)
+        max_workers: Maximum number of reader threads
+        
+    Returns:
+        List of read_file results in the same order as the paths; files
+        that cannot be read are reported with an 'error' entry
+    """
+    def read_one(path: str) -> Dict[str, Any]:
+        try:
+            return read_file(path, encoding)
+        except (OSError, ValueError, LookupError) as e:
+            # Handle errors for individual files
+            return {
+                'path': path,
+                'name': path.rpartition(os.sep)[2],
+                'error': str(e)
+            }
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_one, paths))
+
+def iter_file_decoded(path: str, encoding: str = 'auto', chunk_size: int = 1024 * 1024,
+                      offset: int = 0, length: Optional[int] = None) -> Iterator[str]:
+    """
+    Read and decode a file incrementally
+    
+    Used for spans too large for read_file to return inline. Undecodable
+    bytes are replaced rather than failing part-way through the stream.
+    
+    Args:
+        path: Path to the file
+        encoding: File encoding ('auto', 'utf-8', 'binary', etc.); binary
+            content is yielded as base64
+        chunk_size: Number of bytes read per chunk
+        offset: Starting byte offset
+        length: Number of bytes to read (None for rest of file)
+        
+    Yields:
+        Decoded content chunks
+    """
+    st = os.stat(path)
+    if length is None or offset + length > st.st_size:
+        length = max(st.st_size - offset, 0)
+    
+    encoding_mode = encoding.lower()
+    is_binary = encoding_mode == 'binary'
+    if is_binary:
+        # Keep chunks a multiple of 3 bytes so base64 pieces concatenate cleanly
+        chunk_size = max(chunk_size - chunk_size % 3, 3)
+    elif encoding_mode == 'auto':
+        encoding, _ = _resolve_encoding((path, st.st_mtime_ns, st.st_size, offset), length)
+    
+    def read_chunks() -> Iterator[bytes]:
+        with open(path, 'rb', buffering=0) as f:
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+    
+    if is_binary:
+        for chunk in read_chunks():
+            yield base64.b64encode(chunk).decode('ascii')
+    else:
+        yield from codecs.iterdecode(read_chunks(), encoding, errors='replace')
+
+def _decode_content(data: Union[bytes, bytearray, memoryview], encoding: str,
+                    result: Dict[str, Any], span_key: Tuple[str, int, int, int]) -> Dict[str, Any]:
+    """
+    Decode file data into the result dictionary
+    
+    Args:
+        data: File data (any buffer, including a view of a memory map)
+        encoding: Requested encoding ('auto', 'binary' or a codec name)
+        result: Result dictionary to update
+        span_key: (path, mtime_ns, size, offset) of the data, used to cache
+            encoding detection in auto mode
+        
+    Returns:
+        Updated result dictionary
+    """
+    # Handle encoding
+    encoding_mode = encoding.lower()
+    if encoding_mode == 'auto':
+        # Pure ASCII needs no detection and cannot fail to decode
+        if not isinstance(data, memoryview) and _is_plain_ascii(data):
+            result['detected_encoding'] = 'ascii'
+            result['encoding_confidence'] = 1.0
+            result['content'] = data.decode('ascii')
+            result['is_binary'] = False
+            result['encoding'] = 'ascii'
+            return result
+        
+        detected_encoding, confidence = _resolve_encoding(span_key, len(data), data)
+        
+        result['detected_encoding'] = detected_encoding
+        result['encoding_confidence'] = confidence
+        
+        # Try to decode with detected encoding
+        content = _decode_text(data, detected_encoding)
+        if content is not None:
+            result['content'] = content
+            result['is_binary'] = False
+            result['encoding'] = detected_encoding
+        else:
+            # If decode fails, treat as binary
+            result['content'] = base64.b64encode(data).decode('ascii')
+            result['is_binary'] = True
+            result['content_encoding'] = 'base64'
+            result['encoding'] = 'binary'
+    
+    elif encoding_mode == 'binary':
+        # Return binary data as base64
+        result['content'] = base64.b64encode(data).decode('ascii')
+        result['is_binary'] = True
+        result['content_encoding'] = 'base64'
+    
+    else:
+        # Try specified encoding
+        content = _decode_text(data, encoding)
+        if content is not None:
+            result['content'] = content
+            result['is_binary'] = False
+        else:
+            # If decode fails, treat as binary
+            result['content'] = base64.b64encode(data).decode('ascii')
+            result['is_binary'] = True
+            result['content_encoding'] = 'base64'
+            result['encoding'] = 'binary'
+    
+    return result
+
+def _decode_text(data: Union[bytes, bytearray, memoryview], encoding: str) -> Optional[str]:
+    """
+    Decode data as text, or return None if it is not valid in the encoding
+    
+    A strict incremental decoder validates the leading bytes first, so most
+    binary data is rejected after a small probe. A failed decode of the
+    whole buffer would also raise an error carrying a full copy of it.
+    
+    Args:
+        data: Data to decode
+        encoding: Codec name
+        
+    Returns:
+        Decoded text, or None if the data cannot be decoded
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        decoder.decode(bytes(data[:VALIDATION_PROBE_SIZE]), final=False)
+        return str(data, encoding)
+    except UnicodeDecodeError:
+        return None
+
+def _read_span(fd: int, offset: int, length: int) -> bytearray:
+    """
+    Read a span of bytes from an open file descriptor
+    
+    The span is read straight into a single preallocated buffer. os.preadv
+    fuses the seek and read into one syscall where available; elsewhere
+    (e.g. Windows) the reader falls back to lseek + read.
+    
+    Args:
+        fd: Open file descriptor
+        offset: Starting byte offset
+        length: Number of bytes to read
+        
+    Returns:
+        Bytes read (shorter than length only at end of file)
+    """
+    use_preadv = hasattr(os, 'preadv')
+    if not use_preadv and offset:
+        os.lseek(fd, offset, os.SEEK_SET)
+    
+    buffer = bytearray(length)
+    filled = 0
+    
+    with memoryview(buffer) as view:
+        # A single read is capped by the OS (about 2 GiB), so keep reading
+        # until the span is complete or the file ends
+        while filled < length:
+            if use_preadv:
+                count = os.preadv(fd, [view[filled:]], offset + filled)
+            else:
+                chunk = os.read(fd, length - filled)
+                count = len(chunk)
+                view[filled:filled + count] = chunk
+            
+            if not count:
+                break
+            
+            filled += count
+    
+    if filled < length:
+        del buffer[filled:]
+    
+    return buffer
+
+def _resolve_encoding(span_key: Tuple[str, int, int, int], length: int,
+                      data: Optional[Union[bytes, bytearray, memoryview]] = None) -> Tuple[str, float]:
+    """
+    Determine the encoding to decode a file span with in auto mode
+    
+    Args:
+        span_key: (path, mtime_ns, size, offset) of the span
+        length: Length of the span in bytes
+        data: Contents of the span if already in memory, sampled on a cache
+            miss instead of reading the file again
+        
+    Returns:
+        Tuple of (encoding, confidence)
+    """
+    detected_encoding, confidence = _detect_file_encoding(span_key, min(length, DETECTION_SAMPLE_SIZE), data)
+    detected_encoding = detected_encoding if detected_encoding else 'utf-8'
+    
+    # An ASCII verdict only covers the sample; UTF-8 decodes the same
+    # bytes and also accepts non-ASCII text later in the file
+    if DETECTION_SAMPLE_SIZE < length and detected_encoding.lower() == 'ascii':
+        detected_encoding = 'utf-8'
+    
+    return detected_encoding, confidence
+
+def _detect_file_encoding(span_key: Tuple[str, int, int, int], sample_length: int,
+                          data: Optional[Union[bytes, bytearray, memoryview]] = None) -> Tuple[Optional[str], float]:
+    """
+    Detect the encoding of a file span from a sample of its leading bytes
+    
+    Results are cached by span and sample length. The modification time and
+    size are part of the key only, so a changed file is sampled again
+    instead of reusing a stale result.
+    
+    Args:
+        span_key: (path, mtime_ns, size, offset) of the span
+        sample_length: Number of bytes to sample
+        data: Contents of the span if already in memory; otherwise the
+            sample is read from the file
+        
+    Returns:
+        Tuple of (detected encoding or None, confidence)
+    """
+    cache_key = span_key + (sample_length,)
+    with _encoding_cache_lock:
+        cached = _encoding_cache.get(cache_key)
+        if cached is not None:
+            _encoding_cache.move_to_end(cache_key)
+            return cached
+    
+    if data is not None:
+        sample = bytes(data[:sample_length])
+    else:
+        path, _, _, offset = span_key
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            sample = bytes(_read_span(fd, offset, sample_length))
+        finally:
+            os.close(fd)
+    
+    detection = _detect_encoding(sample)
+    detected = (detection['encoding'], detection['confidence'])
+    
+    with _encoding_cache_lock:
+        _encoding_cache[cache_key] = detected
+        while len(_encoding_cache) > DETECTION_CACHE_SIZE:
+            _encoding_cache.popitem(last=False)
+    
+    return detected
+
+def _detect_encoding(sample: bytes) -> Dict[str, Any]:
+    """
+    Detect the encoding of a byte sample
+    
+    Byte order marks and plain ASCII are recognised directly. Anything else
+    is fed to the detector in chunks so detection stops as soon as the
+    detector is confident, instead of always scanning every byte.
+    
+    Args:
+        sample: Bytes to inspect
+        
+    Returns:
+        Detection result with 'encoding' and 'confidence' keys
+    """
+    # A byte order mark identifies the encoding outright
+    for bom, bom_encoding in BYTE_ORDER_MARKS:
+        if sample.startswith(bom):
+            return {'encoding': bom_encoding, 'confidence': 1.0}
+    
+    # Plain ASCII needs no statistical detection
+    if _is_plain_ascii(sample):
+        return {'encoding': 'ascii', 'confidence': 1.0}
+    
+    detector = chardet.UniversalDetector()
+    
+    for start in range(0, len(sample), DETECTION_CHUNK_SIZE):
+        detector.feed(sample[start:start + DETECTION_CHUNK_SIZE])
+        if detector.done:
+            break
+    
+    detector.close()
+    return detector.result
+
+def _is_plain_ascii(data: Union[bytes, bytearray]) -> bool:
+    """
+    Check whether data is plain ASCII text
+    
+    ASCII bytes carrying the escape sequences of a 7-bit encoding such as
+    ISO-2022 or HZ are not considered plain ASCII.
+    
+    Args:
+        data: Bytes to check
+        
+    Returns:
+        True if the data is plain ASCII
+    """
+    return data.isascii() and b'\x1b' not in data and b'~{' not in data
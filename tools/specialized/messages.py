@@ -1,19 +1,291 @@
 # tools/specialized/messages.py - iOS Messages analysis tools
 
 import os
+import re
+import stat
 import sqlite3
+import contextlib
 import logging
-import tempfile
-import shutil
 import json
-from typing import Dict, List, Optional, Any, Tuple, Union
-from datetime import datetime
+import hashlib
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterator, Tuple, Union, Callable
+
+try:
+    # Hyperscan matches a whole keyword list in one pass over each message
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Import tools
-from tools.sqlite.analyzer import is_sqlite_database
+from ..sqlite.analyzer import is_sqlite_database
+from ..sqlite.connection_pool import ConnectionProfile, PooledConnection, pooled_connection, evict_pooled_connection
+
+# Magic string at the start of every SQLite 3 database file
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+# Offset between the Unix epoch (1970-01-01) and Mac Absolute Time (2001-01-01)
+MAC_ABSOLUTE_TO_UNIX_OFFSET = 978307200
+
+# Mac Absolute Time values above this are nanoseconds (iOS 11+), not seconds
+_MAC_NANOSECOND_THRESHOLD = 1000000000000
+
+# Attachment reference embedded in legacy message text
+_ATTACHMENT_PATTERN = re.compile(r'<Attachment:([^>]+)>')
+
+# Connection tuning for analysis on top of the pool's: keep LIKE
+# case-insensitive for ASCII (searches rely on it instead of LOWER())
+_ANALYSIS_PRAGMAS = """
+    PRAGMA case_sensitive_like=OFF;
+"""
+
+# Indexes matching the ORDER BY ... LIMIT of the analysis queries, created on
+# temporary copies so SQLite can walk a B-tree instead of sorting every row
+# (index name, table, column)
+_TEMP_COPY_INDEXES = (
+    ('forensic_tmp_message_date', 'message', 'date'),
+    ('forensic_tmp_attachment_created_date', 'attachment', 'created_date'),
+    ('forensic_tmp_messages_date', 'messages', 'date')
+)
+
+# Full-text index over message.text, built on temporary copies. The trigram
+# tokenizer lets SQLite answer substring LIKE patterns from the index, so
+# searches keep their semantics without scanning every message row.
+_MESSAGE_FTS_TABLE = 'forensic_tmp_message_fts'
+
+
+def _mac_time_to_unix_sql(column: str) -> str:
+    """
+    Build an SQL expression converting a Mac Absolute Time column to Unix seconds
+    
+    iOS 11+ stores nanoseconds and earlier versions store seconds; the
+    expression accepts both. Zero and NULL values evaluate to NULL.
+    
+    Args:
+        column: Column reference holding Mac Absolute Time
+        
+    Returns:
+        SQL expression yielding integer Unix seconds
+    """
+    return (
+        f"(CASE WHEN {column} > {_MAC_NANOSECOND_THRESHOLD} THEN {column} / 1000000000 "
+        f"ELSE NULLIF({column}, 0) END + {MAC_ABSOLUTE_TO_UNIX_OFFSET})"
+    )
+
+
+def _mac_time_to_iso_sql(column: str) -> str:
+    """
+    Build an SQL expression formatting a Mac Absolute Time column as ISO 8601 (UTC)
+    
+    Args:
+        column: Column reference holding Mac Absolute Time
+        
+    Returns:
+        SQL expression yielding an ISO 8601 string, or NULL if the column is unset
+    """
+    return f"strftime('%Y-%m-%dT%H:%M:%S', {_mac_time_to_unix_sql(column)}, 'unixepoch')"
+
+
+# Message queries for the modern schema (iOS 6+), with and without the handle
+# table (iOS 9+). Timestamps are converted by SQLite while the rows are produced.
+_MODERN_MESSAGES_QUERY = f"""
+    SELECT
+        m.ROWID as message_id,
+        m.date as timestamp,
+        {_mac_time_to_iso_sql('m.date')} as date,
+        {_mac_time_to_unix_sql('m.date')} as timestamp_unix,
+        h.id as contact_id,
+        CAST(m.text AS TEXT) as body,
+        m.service as service,
+        m.is_from_me as is_from_me,
+        m.is_read as is_read,
+        m.is_delivered as is_delivered,
+        m.date_read as date_read,
+        {_mac_time_to_iso_sql('m.date_read')} as date_read_formatted,
+        m.date_delivered as date_delivered,
+        {_mac_time_to_iso_sql('m.date_delivered')} as date_delivered_formatted,
+        c.chat_identifier as conversation_id,
+        m.associated_message_guid as reply_to_guid,
+        m.cache_has_attachments as has_attachments
+    FROM
+        message as m
+    LEFT JOIN
+        handle as h ON m.handle_id = h.ROWID
+    LEFT JOIN
+        chat_message_join as cmj ON m.ROWID = cmj.message_id
+    LEFT JOIN
+        chat as c ON cmj.chat_id = c.ROWID
+    ORDER BY
+        m.date DESC
+    LIMIT ?
+"""
+
+_MODERN_MESSAGES_QUERY_NO_HANDLE = f"""
+    SELECT
+        m.ROWID as message_id,
+        m.date as timestamp,
+        {_mac_time_to_iso_sql('m.date')} as date,
+        {_mac_time_to_unix_sql('m.date')} as timestamp_unix,
+        m.address as contact_id,
+        CAST(m.text AS TEXT) as body,
+        m.service as service,
+        m.is_from_me as is_from_me,
+        m.is_read as is_read,
+        m.is_delivered as is_delivered,
+        m.date_read as date_read,
+        {_mac_time_to_iso_sql('m.date_read')} as date_read_formatted,
+        m.date_delivered as date_delivered,
+        {_mac_time_to_iso_sql('m.date_delivered')} as date_delivered_formatted,
+        c.chat_identifier as conversation_id,
+        m.cache_has_attachments as has_attachments
+    FROM
+        message as m
+    LEFT JOIN
+        chat_message_join as cmj ON m.ROWID = cmj.message_id
+    LEFT JOIN
+        chat as c ON cmj.chat_id = c.ROWID
+    ORDER BY
+        m.date DESC
+    LIMIT ?
+"""
+
+
+# Message search queries. The modern template covers databases with and
+# without the handle table (iOS 9+); the remaining placeholders are filled in
+# by _build_search_query.
+_SEARCH_MODERN_TEMPLATE = """
+    SELECT
+        m.ROWID as message_id,
+        m.date as timestamp,
+        {date} as date,
+        {timestamp_unix} as timestamp_unix,
+        {contact_id} as contact_id,
+        m.text as body,
+        m.service as service,
+        m.is_from_me as is_from_me,
+        c.chat_identifier as conversation_id{highlight_column}
+    FROM
+        {message_source}{handle_join}
+    LEFT JOIN
+        chat_message_join as cmj ON m.ROWID = cmj.message_id
+    LEFT JOIN
+        chat as c ON cmj.chat_id = c.ROWID
+    WHERE
+        {text_match}
+    ORDER BY
+        m.date DESC
+    LIMIT :limit
+"""
+
+_SEARCH_LEGACY_TEMPLATE = """
+    SELECT
+        m.ROWID as message_id,
+        m.address as contact_id,
+        m.date as timestamp,
+        {date} as date,
+        {timestamp_unix} as timestamp_unix,
+        m.text as body,
+        m.service as service,
+        m.flags as flags,
+        m.group_id as group_id{highlight_column}
+    FROM
+        messages as m
+    WHERE
+        m.text LIKE :pattern ESCAPE '\\'
+    ORDER BY
+        m.date DESC
+    LIMIT :limit
+"""
+
+_SEARCH_FALLBACK_QUERY = """
+    SELECT *
+    FROM message
+    WHERE text LIKE :pattern ESCAPE '\\'
+    LIMIT :limit
+"""
+
+
+def _build_search_query(version: str, has_handle: bool, use_fts: bool, sql_highlight: bool) -> str:
+    """
+    Build the message search query for a schema
+    
+    Args:
+        version: Schema version identifier ('modern', 'legacy', or 'unknown')
+        has_handle: Whether the handle table exists (iOS 9+)
+        use_fts: Whether to narrow candidate rows with the full-text index
+        sql_highlight: Whether SQLite highlights the matches, which is done for
+            case-sensitive searches
+        
+    Returns:
+        SQL query taking :pattern, :phrase, :query and :limit parameters
+    """
+    if version not in ('modern', 'legacy'):
+        return _SEARCH_FALLBACK_QUERY
+    
+    # Case-sensitive highlighting is a plain substring replacement, which
+    # SQLite does while producing the rows
+    if sql_highlight:
+        highlight_column = ",\n        REPLACE(m.text, :query, '****' || :query || '****') as body_highlighted"
+    else:
+        highlight_column = ""
+    
+    if version == 'legacy':  # iOS 5 and earlier
+        return _SEARCH_LEGACY_TEMPLATE.format(
+            date=_mac_time_to_iso_sql('m.date'),
+            timestamp_unix=_mac_time_to_unix_sql('m.date'),
+            highlight_column=highlight_column
+        )
+    
+    # The trigram phrase match folds case beyond ASCII, so the LIKE still
+    # filters the candidates down to exactly the rows a plain scan returns
+    if use_fts:
+        message_source = f"{_MESSAGE_FTS_TABLE} as f JOIN message as m ON m.ROWID = f.rowid"
+        text_match = f"f.{_MESSAGE_FTS_TABLE} MATCH :phrase AND m.text LIKE :pattern ESCAPE '\\'"
+    else:
+        message_source = "message as m"
+        text_match = "m.text LIKE :pattern ESCAPE '\\'"
+    
+    return _SEARCH_MODERN_TEMPLATE.format(
+        date=_mac_time_to_iso_sql('m.date'),
+        timestamp_unix=_mac_time_to_unix_sql('m.date'),
+        contact_id='h.id' if has_handle else 'm.address',
+        highlight_column=highlight_column,
+        message_source=message_source,
+        handle_join="\n    LEFT JOIN\n        handle as h ON m.handle_id = h.ROWID" if has_handle else "",
+        text_match=text_match
+    )
+
+
+# Every search query, built once so each search reuses the same SQL text and
+# its prepared statement: (version, has_handle, use_fts, sql_highlight)
+_SEARCH_QUERIES = {
+    key: _build_search_query(*key)
+    for key in itertools.product(('modern', 'legacy', 'unknown'), (True, False), (True, False), (True, False))
+}
+
+
+@dataclass(frozen=True)
+class SchemaInfo:
+    """
+    Schema version and optional tables of a message database
+    
+    Attributes:
+        version: Schema version identifier ('modern', 'legacy', or 'unknown')
+        has_handle: Whether the handle table exists (iOS 9+)
+        has_chat_handle_join: Whether the chat_handle_join table exists
+        has_msg_pieces: Whether the legacy msg_pieces table exists
+        has_message_fts: Whether a full-text index over message text exists
+    """
+    version: str
+    has_handle: bool
+    has_chat_handle_join: bool
+    has_msg_pieces: bool
+    has_message_fts: bool = False
 
 
 def find_message_databases(ios_root: str) -> List[Dict]:
@@ -41,40 +313,55 @@ def find_message_databases(ios_root: str) -> List[Dict]:
     
     # Check Shared AppGroup containers for iOS 10+
     app_groups_path = os.path.join(ios_root, "private/var/mobile/Containers/Shared/AppGroup")
-    if os.path.exists(app_groups_path) and os.path.isdir(app_groups_path):
-        for app_group in os.listdir(app_groups_path):
-            app_group_path = os.path.join(app_groups_path, app_group)
-            if os.path.isdir(app_group_path):
-                # Check for message database in this app group
-                potential_db = os.path.join(app_group_path, "Library/SMS/sms.db")
-                if os.path.exists(potential_db):
-                    known_locations.append(potential_db)
+    try:
+        with os.scandir(app_groups_path) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
                 
-                potential_db = os.path.join(app_group_path, "Library/Messages/chat.db")
-                if os.path.exists(potential_db):
-                    known_locations.append(potential_db)
+                # Candidate message databases in this app group, checked below
+                known_locations.append(os.path.join(entry.path, "Library/SMS/sms.db"))
+                known_locations.append(os.path.join(entry.path, "Library/Messages/chat.db"))
+    except (FileNotFoundError, NotADirectoryError):
+        pass
     
     results = []
     
+    # Several candidates share a directory: list each directory once and only
+    # touch the files that are actually there
+    directory_entries = {}
+    
     for location in known_locations:
-        if os.path.exists(location) and is_sqlite_database(location):
+        parent, name = os.path.split(location)
+        
+        entries = directory_entries.get(parent)
+        if entries is None:
+            try:
+                entries = set(os.listdir(parent))
+            except OSError:
+                entries = set()
+            directory_entries[parent] = entries
+        
+        if name not in entries:
+            continue
+        
+        is_sqlite, size = _probe_sqlite_file(location)
+        
+        if is_sqlite:
             # Get basic info about the database
             db_info = {
                 'path': location,
-                'name': os.path.basename(location),
-                'size': os.path.getsize(location),
+                'name': name,
+                'size': size,
                 'relative_path': os.path.relpath(location, ios_root)
             }
             
             # Check if there are associated WAL/SHM files
-            wal_path = f"{location}-wal"
-            shm_path = f"{location}-shm"
-            
-            db_info['has_wal'] = os.path.exists(wal_path)
-            db_info['has_shm'] = os.path.exists(shm_path)
+            db_info['has_wal'] = f"{name}-wal" in entries
+            db_info['has_shm'] = f"{name}-shm" in entries
             
             if db_info['has_wal']:
-                db_info['wal_size'] = os.path.getsize(wal_path)
+                db_info['wal_size'] = os.path.getsize(f"{location}-wal")
             
             results.append(db_info)
     
@@ -82,6 +369,35 @@ def find_message_databases(ios_root: str) -> List[Dict]:
     return results
 
 
+def _probe_sqlite_file(path: str) -> Tuple[bool, int]:
+    """
+    Check the SQLite header of a file and get its size with a single open
+    
+    Args:
+        path: Path to the file to check
+        
+    Returns:
+        Tuple of whether the file is a SQLite database and its size in bytes
+        ((False, 0) if the file is missing, not a regular file, or unreadable)
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError:
+        return False, 0
+    
+    try:
+        file_stat = os.fstat(fd)
+        if not stat.S_ISREG(file_stat.st_mode):
+            return False, 0
+        
+        return os.read(fd, len(SQLITE_HEADER)) == SQLITE_HEADER, file_stat.st_size
+    except OSError as e:
+        logger.error(f"Error checking SQLite header for {path}: {e}")
+        return False, 0
+    finally:
+        os.close(fd)
+
+
 def analyze_messages(db_path: str, limit: int = 1000) -> Dict:
     """
     Analyze SMS/iMessage database
@@ -99,173 +415,242 @@ def analyze_messages(db_path: str, limit: int = 1000) -> Dict:
         raise ValueError(f"Not a valid SQLite database: {db_path}")
     
     try:
-        # Create a temporary copy of the database for forensic integrity
-        temp_dir = tempfile.mkdtemp()
-        temp_db_path = os.path.join(temp_dir, os.path.basename(db_path))
-        
-        # Copy the database file
-        shutil.copy2(db_path, temp_db_path)
-        
-        # Check for and handle WAL and SHM files
-        wal_path = f"{db_path}-wal"
-        shm_path = f"{db_path}-shm"
-        
-        if os.path.exists(wal_path):
-            temp_wal_path = f"{temp_db_path}-wal"
-            shutil.copy2(wal_path, temp_wal_path)
-            logger.info(f"Copied WAL file to temporary location: {temp_wal_path}")
-        
-        if os.path.exists(shm_path):
-            temp_shm_path = f"{temp_db_path}-shm"
-            shutil.copy2(shm_path, temp_shm_path)
-            logger.info(f"Copied SHM file to temporary location: {temp_shm_path}")
-        
-        # Open the temporary copy with SQLITE_OPEN_READONLY flag to prevent modification
-        uri = f"file:{temp_db_path}?mode=ro"
-        conn = sqlite3.connect(uri, uri=True)
-        conn.row_factory = sqlite3.Row
-        
-        # Execute "PRAGMA journal_mode=OFF" to prevent journal file creation
-        conn.execute("PRAGMA journal_mode=OFF")
-        
-        # Disable WAL mode to prevent modification
-        conn.execute("PRAGMA locking_mode=NORMAL")
-        
-        cursor = conn.cursor()
-        
-        # Determine database schema version
-        db_version = _determine_message_db_version(cursor)
-        
-        analysis_results = {
-            'db_path': db_path,
-            'db_version': db_version,
-            'messages': [],
-            'conversations': [],
-            'attachments': [],
-            'statistics': {},
-            'used_temp_copy': True
-        }
-        
-        # Analyze based on database version
-        if db_version == 'modern':  # iOS 6+ schema
-            analysis_results['messages'] = _analyze_modern_messages(cursor, limit)
-            analysis_results['conversations'] = _analyze_modern_conversations(cursor)
-            analysis_results['attachments'] = _analyze_modern_attachments(cursor, limit)
-        elif db_version == 'legacy':  # iOS 5 and earlier
-            analysis_results['messages'] = _analyze_legacy_messages(cursor, limit)
-            # Legacy database doesn't have dedicated conversation tracking
-            analysis_results['conversations'] = _infer_legacy_conversations(analysis_results['messages'])
-            analysis_results['attachments'] = _analyze_legacy_attachments(cursor, limit)
-        else:
-            analysis_results['error'] = f"Unknown message database schema version"
-        
-        # Generate statistics
-        total_messages = len(analysis_results['messages'])
-        total_conversations = len(analysis_results['conversations'])
-        total_attachments = len(analysis_results['attachments'])
-        
-        # Message type distribution
-        message_types = {}
-        for msg in analysis_results['messages']:
-            msg_type = msg.get('service', 'unknown')
-            message_types[msg_type] = message_types.get(msg_type, 0) + 1
+        with _forensic_connection(db_path) as forensic:
+            cursor = forensic.conn.cursor()
+            
+            try:
+                schema = forensic.info
+                db_version = schema.version
+                
+                analysis_results = {
+                    'db_path': db_path,
+                    'db_version': db_version,
+                    'messages': [],
+                    'conversations': [],
+                    'attachments': [],
+                    'statistics': {},
+                    'used_temp_copy': forensic.temp_path is not None
+                }
+                
+                # Analyze based on database version
+                if db_version == 'modern':  # iOS 6+ schema
+                    analysis_results['messages'] = _analyze_modern_messages(cursor, limit, schema)
+                    analysis_results['conversations'] = _analyze_modern_conversations(cursor, schema)
+                    analysis_results['attachments'] = _analyze_modern_attachments(cursor, limit)
+                elif db_version == 'legacy':  # iOS 5 and earlier
+                    analysis_results['messages'] = _analyze_legacy_messages(cursor, limit)
+                    # Legacy database doesn't have dedicated conversation tracking
+                    analysis_results['conversations'] = _infer_legacy_conversations(analysis_results['messages'])
+                    analysis_results['attachments'] = _analyze_legacy_attachments(cursor, limit, schema)
+                else:
+                    analysis_results['error'] = f"Unknown message database schema version"
+                
+                # Generate statistics over the whole database, independent of the limit
+                analysis_results['statistics'] = _compute_message_statistics(cursor, schema)
+            finally:
+                cursor.close()
         
-        # Date range
-        date_range = {
-            'min': None,
-            'max': None
-        }
+        return analysis_results
+    
+    except Exception as e:
+        logger.error(f"Error analyzing messages in {db_path}: {e}")
+        raise
+
+
+@contextlib.contextmanager
+def _forensic_connection(db_path: str, snapshot: bool = True) -> Iterator[PooledConnection]:
+    """
+    Hold a pooled forensic connection for exclusive use
+    
+    Args:
+        db_path: Path to the message database
+        snapshot: Whether to include transactions still held in the WAL
         
-        if total_messages > 0:
-            dates = [msg.get('date') for msg in analysis_results['messages'] if msg.get('date')]
-            if dates:
-                date_range['min'] = min(dates)
-                date_range['max'] = max(dates)
+    Yields:
+        Pooled connection, locked for the duration of the block, with the
+        detected schema as its info
+    """
+    forensic = None
+    try:
+        with pooled_connection(db_path, include_wal=snapshot, profile=_MESSAGES_PROFILE) as forensic:
+            yield forensic
+    except sqlite3.OperationalError:
+        # The connection may no longer be usable, e.g. if its temporary
+        # copy was removed: open a fresh one on the next call
+        if forensic is not None:
+            evict_pooled_connection(forensic)
+        raise
+
+
+def _sha256_file(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file
+    
+    Args:
+        path: Path to the file
         
-        # Attachment type distribution
-        attachment_types = {}
-        for att in analysis_results['attachments']:
-            att_type = att.get('mime_type', 'unknown').split('/')[0]
-            attachment_types[att_type] = attachment_types.get(att_type, 0) + 1
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    
+    return digest.hexdigest()
+
+
+def _decode_sqlite_text(value: bytes) -> str:
+    """
+    Decode a TEXT value returned by SQLite, replacing invalid UTF-8 sequences
+    
+    Args:
+        value: Raw UTF-8 bytes of the column value
         
-        analysis_results['statistics'] = {
-            'total_messages': total_messages,
-            'total_conversations': total_conversations,
-            'total_attachments': total_attachments,
-            'message_types': message_types,
-            'date_range': date_range,
-            'attachment_types': attachment_types
-        }
+    Returns:
+        Decoded string
+    """
+    return value.decode('utf-8', errors='replace')
+
+
+def _iter_row_dicts(cursor: sqlite3.Cursor) -> Iterator[Dict]:
+    """
+    Iterate the rows of an executed query as dictionaries keyed by column name
+    
+    The rows are plain tuples, so each one is turned into a dictionary
+    directly instead of going through an intermediate sqlite3.Row.
+    
+    Args:
+        cursor: SQLite cursor with an executed query
         
-        cursor.close()
-        conn.close()
+    Yields:
+        Dictionary for each row
+    """
+    columns = [description[0] for description in cursor.description]
+    for row in cursor:
+        yield dict(zip(columns, row))
+
+
+def _prepare_temp_copy(conn: sqlite3.Connection) -> None:
+    """
+    Index a checkpointed temporary copy of a message database
+    
+    The copy gets indexes on the columns the analysis queries sort by, a
+    full-text index over the message text for searches and planner
+    statistics.
+    
+    Args:
+        conn: Writable connection to the temporary database copy
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    for index_name, table, column in _TEMP_COPY_INDEXES:
+        if table not in tables:
+            continue
         
-        # Clean up temporary files
         try:
-            os.remove(temp_db_path)
-            if os.path.exists(f"{temp_db_path}-wal"):
-                os.remove(f"{temp_db_path}-wal")
-            if os.path.exists(f"{temp_db_path}-shm"):
-                os.remove(f"{temp_db_path}-shm")
-            os.rmdir(temp_dir)
-        except Exception as e:
-            logger.warning(f"Error cleaning up temporary files: {e}")
-        
-        return analysis_results
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({column} DESC)")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Error creating index {index_name} on temporary copy: {e}")
     
-    except Exception as e:
-        logger.error(f"Error analyzing messages in {db_path}: {e}")
-        raise
+    if 'message' in tables:
+        try:
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {_MESSAGE_FTS_TABLE}
+                USING fts5(text, content='message', content_rowid='ROWID', tokenize='trigram')
+            """)
+            conn.execute(f"INSERT INTO {_MESSAGE_FTS_TABLE}({_MESSAGE_FTS_TABLE}) VALUES('rebuild')")
+        except sqlite3.OperationalError as e:
+            # FTS5 or its trigram tokenizer may be missing from this SQLite build
+            logger.warning(f"Error creating full-text index on temporary copy: {e}")
+    
+    # Give the planner statistics for the handle and chat joins. The
+    # immutable analysis connection cannot write them, so they are
+    # gathered here, sampling at most 400 rows per index.
+    conn.execute("PRAGMA analysis_limit=400")
+    conn.execute("ANALYZE")
 
 
-def _determine_message_db_version(cursor: sqlite3.Cursor) -> str:
+def _setup_forensic_connection(conn: sqlite3.Connection, db_path: str) -> SchemaInfo:
     """
-    Determine the version of the message database schema
+    Tune a newly opened message database connection and detect its schema
     
     Args:
-        cursor: SQLite database cursor
+        conn: Read-only connection to the message database or its copy
+        db_path: Path to the original message database
         
     Returns:
-        Schema version identifier ('modern', 'legacy', or 'unknown')
+        Schema information of the database
     """
-    # Check for tables in modern schema (iOS 6+)
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='message'")
-    has_message_table = cursor.fetchone() is not None
+    # Record the state of the evidence the connection will reflect
+    logger.info(f"SHA-256 of {db_path}: {_sha256_file(db_path)}")
+    
+    conn.executescript(_ANALYSIS_PRAGMAS)
     
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='chat'")
-    has_chat_table = cursor.fetchone() is not None
+    # Decode text columns in the driver, tolerating invalid UTF-8; text
+    # columns stored as BLOBs are CAST to TEXT in the queries
+    conn.text_factory = _decode_sqlite_text
     
-    # Check for tables in legacy schema (iOS 5 and earlier)
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='messages'")
-    has_messages_table = cursor.fetchone() is not None
+    with contextlib.closing(conn.cursor()) as cursor:
+        return _determine_message_db_version(cursor)
+
+
+# Pool profile for message databases: temporary copies are indexed for the
+# analysis and search queries, and each connection carries its SchemaInfo
+_MESSAGES_PROFILE = ConnectionProfile('messages', prepare_copy=_prepare_temp_copy,
+                                      setup=_setup_forensic_connection)
+
+
+def _determine_message_db_version(cursor: sqlite3.Cursor) -> SchemaInfo:
+    """
+    Determine the version of the message database schema
     
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='msg_group'")
-    has_msg_group_table = cursor.fetchone() is not None
+    Args:
+        cursor: SQLite database cursor
+        
+    Returns:
+        Schema information with the version identifier and optional tables
+    """
+    # Look up every table of interest in a single query
+    cursor.execute(f"""
+        SELECT name FROM sqlite_master
+        WHERE type='table' AND name IN (
+            'message', 'chat', 'messages', 'msg_group', 'handle', 'chat_handle_join', 'msg_pieces',
+            '{_MESSAGE_FTS_TABLE}'
+        )
+    """)
+    tables = {row[0] for row in cursor.fetchall()}
     
-    if has_message_table and has_chat_table:
-        return 'modern'
-    elif has_messages_table and has_msg_group_table:
-        return 'legacy'
+    # Modern schema (iOS 6+) has message and chat, legacy schema (iOS 5 and
+    # earlier) has messages and msg_group
+    if 'message' in tables and 'chat' in tables:
+        version = 'modern'
+    elif 'messages' in tables and 'msg_group' in tables:
+        version = 'legacy'
+    # Try to make a best guess
+    elif 'message' in tables:
+        version = 'modern'
+    elif 'messages' in tables:
+        version = 'legacy'
     else:
-        # Try to make a best guess
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        if 'message' in tables:
-            return 'modern'
-        elif 'messages' in tables:
-            return 'legacy'
-        else:
-            return 'unknown'
+        version = 'unknown'
+    
+    return SchemaInfo(
+        version=version,
+        has_handle='handle' in tables,
+        has_chat_handle_join='chat_handle_join' in tables,
+        has_msg_pieces='msg_pieces' in tables,
+        has_message_fts=_MESSAGE_FTS_TABLE in tables
+    )
 
 
-def _analyze_modern_messages(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
+def _analyze_modern_messages(cursor: sqlite3.Cursor, limit: int, schema: SchemaInfo) -> List[Dict]:
     """
     Analyze messages in the modern schema (iOS 6+)
     
     Args:
         cursor: SQLite database cursor
         limit: Maximum number of messages to analyze
+        schema: Tables present in the database
         
     Returns:
         List of dictionaries with message information
@@ -273,100 +658,14 @@ def _analyze_modern_messages(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
     messages = []
     
     try:
-        # Check if the handle table exists (iOS 9+)
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='handle'")
-        has_handle_table = cursor.fetchone() is not None
-        
-        if has_handle_table:
-            # Modern schema with handle table (iOS 9+)
-            query = """
-                SELECT
-                    m.ROWID as message_id,
-                    m.date as timestamp,
-                    h.id as contact_id,
-                    m.text as body,
-                    m.service as service,
-                    m.is_from_me as is_from_me,
-                    m.is_read as is_read,
-                    m.is_delivered as is_delivered,
-                    m.date_read as date_read,
-                    m.date_delivered as date_delivered,
-                    c.chat_identifier as conversation_id,
-                    m.associated_message_guid as reply_to_guid,
-                    m.cache_has_attachments as has_attachments
-                FROM
-                    message as m
-                LEFT JOIN
-                    handle as h ON m.handle_id = h.ROWID
-                LEFT JOIN
-                    chat_message_join as cmj ON m.ROWID = cmj.message_id
-                LEFT JOIN
-                    chat as c ON cmj.chat_id = c.ROWID
-                ORDER BY
-                    m.date DESC
-                LIMIT ?
-            """
+        if schema.has_handle:
+            query = _MODERN_MESSAGES_QUERY
         else:
-            # Modern schema without handle table (iOS 6-8)
-            query = """
-                SELECT
-                    m.ROWID as message_id,
-                    m.date as timestamp,
-                    m.address as contact_id,
-                    m.text as body,
-                    m.service as service,
-                    m.is_from_me as is_from_me,
-                    m.is_read as is_read,
-                    m.is_delivered as is_delivered,
-                    m.date_read as date_read,
-                    m.date_delivered as date_delivered,
-                    c.chat_identifier as conversation_id,
-                    m.cache_has_attachments as has_attachments
-                FROM
-                    message as m
-                LEFT JOIN
-                    chat_message_join as cmj ON m.ROWID = cmj.message_id
-                LEFT JOIN
-                    chat as c ON cmj.chat_id = c.ROWID
-                ORDER BY
-                    m.date DESC
-                LIMIT ?
-            """
+            query = _MODERN_MESSAGES_QUERY_NO_HANDLE
         
+        # Iterate the cursor so rows are converted as SQLite produces them
         cursor.execute(query, (limit,))
-        rows = cursor.fetchall()
-        
-        for row in rows:
-            message = dict(row)
-            
-            # Convert timestamps
-            if message.get('timestamp'):
-                # iOS timestamps are in Mac Absolute Time (seconds since 2001-01-01)
-                # Convert to Unix timestamp (seconds since 1970-01-01)
-                mac_absolute_time = message['timestamp']
-                if mac_absolute_time:
-                    unix_timestamp = mac_absolute_time + 978307200  # Offset between epochs
-                    message['date'] = datetime.fromtimestamp(unix_timestamp / 1e9).isoformat()
-                    message['timestamp_unix'] = unix_timestamp
-            
-            if message.get('date_read'):
-                date_read = message['date_read']
-                if date_read:
-                    unix_timestamp = date_read + 978307200
-                    message['date_read_formatted'] = datetime.fromtimestamp(unix_timestamp / 1e9).isoformat()
-            
-            if message.get('date_delivered'):
-                date_delivered = message['date_delivered']
-                if date_delivered:
-                    unix_timestamp = date_delivered + 978307200
-                    message['date_delivered_formatted'] = datetime.fromtimestamp(unix_timestamp / 1e9).isoformat()
-            
-            # Clean up binary data in text
-            if message.get('body') and isinstance(message['body'], bytes):
-                try:
-                    message['body'] = message['body'].decode('utf-8', errors='replace')
-                except Exception:
-                    message['body'] = f"<binary data: {len(message['body'])} bytes>"
+        for message in _iter_row_dicts(cursor):
             
             # Make boolean values actual booleans
             for key in ['is_from_me', 'is_read', 'is_delivered', 'has_attachments']:
@@ -380,28 +679,52 @@ def _analyze_modern_messages(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
         # Try a simplified query as fallback
         try:
             cursor.execute("SELECT * FROM message ORDER BY date DESC LIMIT ?", (limit,))
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                messages.append(dict(row))
+            messages.extend(_iter_row_dicts(cursor))
         except Exception as e2:
             logger.error(f"Error with fallback message query: {e2}")
     
     return messages
 
 
-def _analyze_modern_conversations(cursor: sqlite3.Cursor) -> List[Dict]:
+def _analyze_modern_conversations(cursor: sqlite3.Cursor, schema: SchemaInfo) -> List[Dict]:
     """
     Analyze conversations in the modern schema (iOS 6+)
     
     Args:
         cursor: SQLite database cursor
+        schema: Tables present in the database
         
     Returns:
         List of dictionaries with conversation information
     """
     conversations = []
     
+    # Get the participants of every conversation up front
+    participants_by_chat = defaultdict(list)
+    if schema.has_chat_handle_join:
+        # iOS 9+ schema
+        try:
+            cursor.execute("""
+                SELECT
+                    chj.chat_id as chat_id,
+                    h.id as identifier,
+                    h.service as service,
+                    h.country as country
+                FROM
+                    handle as h
+                JOIN
+                    chat_handle_join as chj ON h.ROWID = chj.handle_id
+            """)
+            
+            for chat_id, identifier, service, country in cursor.fetchall():
+                participants_by_chat[chat_id].append({
+                    'identifier': identifier,
+                    'service': service,
+                    'country': country
+                })
+        except Exception as e:
+            logger.warning(f"Error getting conversation participants: {e}")
+    
     try:
         query = """
             SELECT
@@ -423,45 +746,15 @@ def _analyze_modern_conversations(cursor: sqlite3.Cursor) -> List[Dict]:
         """
         
         cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        for row in rows:
-            conversation = dict(row)
+        for conversation in _iter_row_dicts(cursor):
             
             # Make boolean values actual booleans
             for key in ['is_archived']:
                 if key in conversation and conversation[key] is not None:
                     conversation[key] = bool(conversation[key])
             
-            # Get participants
-            try:
-                # Check if handle_join is available
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='chat_handle_join'")
-                has_chat_handle_join = cursor.fetchone() is not None
-                
-                if has_chat_handle_join:
-                    # iOS 9+ schema
-                    cursor.execute("""
-                        SELECT
-                            h.id as identifier,
-                            h.service as service,
-                            h.country as country
-                        FROM
-                            handle as h
-                        JOIN
-                            chat_handle_join as chj ON h.ROWID = chj.handle_id
-                        WHERE
-                            chj.chat_id = ?
-                    """, (conversation['conversation_id'],))
-                    
-                    participants = [dict(row) for row in cursor.fetchall()]
-                    conversation['participants'] = participants
-                else:
-                    # Earlier iOS versions don't have a direct participants table
-                    conversation['participants'] = []
-            except Exception as e:
-                logger.warning(f"Error getting conversation participants: {e}")
-                conversation['participants'] = []
+            # Earlier iOS versions don't have a direct participants table
+            conversation['participants'] = participants_by_chat.get(conversation['conversation_id'], [])
             
             conversations.append(conversation)
     
@@ -470,10 +763,7 @@ def _analyze_modern_conversations(cursor: sqlite3.Cursor) -> List[Dict]:
         # Try a simplified query as fallback
         try:
             cursor.execute("SELECT * FROM chat")
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                conversations.append(dict(row))
+            conversations.extend(_iter_row_dicts(cursor))
         except Exception as e2:
             logger.error(f"Error with fallback conversation query: {e2}")
     
@@ -502,12 +792,15 @@ def _analyze_modern_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
                 a.transfer_name as transfer_name,
                 a.total_bytes as size,
                 a.created_date as created_date,
+                {created_date} as created_date_formatted,
                 a.start_date as start_date,
+                {start_date} as start_date_formatted,
                 a.transfer_state as transfer_state,
                 a.is_outgoing as is_outgoing,
                 m.ROWID as message_id,
-                m.text as message_text,
-                m.date as message_date
+                CAST(m.text AS TEXT) as message_text,
+                m.date as message_date,
+                {message_date} as message_date_formatted
             FROM
                 attachment as a
             LEFT JOIN
@@ -517,21 +810,14 @@ def _analyze_modern_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
             ORDER BY
                 a.created_date DESC
             LIMIT ?
-        """
+        """.format(
+            created_date=_mac_time_to_iso_sql('a.created_date'),
+            start_date=_mac_time_to_iso_sql('a.start_date'),
+            message_date=_mac_time_to_iso_sql('m.date')
+        )
         
         cursor.execute(query, (limit,))
-        rows = cursor.fetchall()
-        
-        for row in rows:
-            attachment = dict(row)
-            
-            # Convert timestamps
-            for key in ['created_date', 'start_date', 'message_date']:
-                if attachment.get(key):
-                    mac_absolute_time = attachment[key]
-                    if mac_absolute_time:
-                        unix_timestamp = mac_absolute_time + 978307200  # Offset between epochs
-                        attachment[f"{key}_formatted"] = datetime.fromtimestamp(unix_timestamp / 1e9).isoformat()
+        for attachment in _iter_row_dicts(cursor):
             
             # Make boolean values actual booleans
             for key in ['is_outgoing']:
@@ -557,10 +843,7 @@ def _analyze_modern_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
         # Try a simplified query as fallback
         try:
             cursor.execute("SELECT * FROM attachment LIMIT ?", (limit,))
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                attachments.append(dict(row))
+            attachments.extend(_iter_row_dicts(cursor))
         except Exception as e2:
             logger.error(f"Error with fallback attachment query: {e2}")
     
@@ -586,11 +869,13 @@ def _analyze_legacy_messages(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
                 m.ROWID as message_id,
                 m.address as contact_id,
                 m.date as timestamp,
-                m.text as body,
+                {date} as date,
+                {timestamp_unix} as timestamp_unix,
+                CAST(m.text AS TEXT) as body,
                 m.flags as flags,
                 m.service as service,
                 m.group_id as group_id,
-                m.subject as subject,
+                CAST(m.subject AS TEXT) as subject,
                 m.madrid_flags as madrid_flags,
                 m.madrid_error as madrid_error,
                 m.read as is_read
@@ -599,22 +884,13 @@ def _analyze_legacy_messages(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
             ORDER BY
                 m.date DESC
             LIMIT ?
-        """
+        """.format(
+            date=_mac_time_to_iso_sql('m.date'),
+            timestamp_unix=_mac_time_to_unix_sql('m.date')
+        )
         
         cursor.execute(query, (limit,))
-        rows = cursor.fetchall()
-        
-        for row in rows:
-            message = dict(row)
-            
-            # Convert timestamps
-            if message.get('timestamp'):
-                # iOS timestamps are in Mac Absolute Time (seconds since 2001-01-01)
-                mac_absolute_time = message['timestamp']
-                if mac_absolute_time:
-                    unix_timestamp = mac_absolute_time + 978307200  # Offset between epochs
-                    message['date'] = datetime.fromtimestamp(unix_timestamp).isoformat()
-                    message['timestamp_unix'] = unix_timestamp
+        for message in _iter_row_dicts(cursor):
             
             # Determine message direction based on flags
             if 'flags' in message:
@@ -637,16 +913,97 @@ def _analyze_legacy_messages(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
         # Try a simplified query as fallback
         try:
             cursor.execute("SELECT * FROM messages ORDER BY date DESC LIMIT ?", (limit,))
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                messages.append(dict(row))
+            messages.extend(_iter_row_dicts(cursor))
         except Exception as e2:
             logger.error(f"Error with fallback legacy message query: {e2}")
     
     return messages
 
 
+def _compute_message_statistics(cursor: sqlite3.Cursor, schema: SchemaInfo) -> Dict:
+    """
+    Compute message statistics with SQL aggregates
+    
+    Counts, the service distribution, the date range and the attachment type
+    distribution are aggregated by SQLite over the whole database. Legacy
+    databases without msg_pieces count messages that reference an attachment.
+    
+    Args:
+        cursor: SQLite database cursor
+        schema: Schema version and tables present in the database
+        
+    Returns:
+        Dictionary with message statistics
+    """
+    statistics = {
+        'total_messages': 0,
+        'total_conversations': 0,
+        'total_attachments': 0,
+        'message_types': {},
+        'date_range': {
+            'min': None,
+            'max': None
+        },
+        'attachment_types': {}
+    }
+    
+    if schema.version == 'modern':
+        message_table = 'message'
+        conversation_count_query = "SELECT COUNT(*) FROM chat"
+        attachment_types_query = f"""
+            SELECT {_mime_category_sql('mime_type')} as category, COUNT(*)
+            FROM attachment
+            GROUP BY category
+        """
+    elif schema.version == 'legacy':
+        message_table = 'messages'
+        conversation_count_query = "SELECT COUNT(DISTINCT address) FROM messages WHERE address != ''"
+        
+        if schema.has_msg_pieces:
+            attachment_types_query = f"""
+                SELECT {_mime_category_sql('content_type')} as category, COUNT(*)
+                FROM msg_pieces
+                GROUP BY category
+            """
+        else:
+            attachment_types_query = """
+                SELECT 'unknown', COUNT(*)
+                FROM messages
+                WHERE text LIKE '%<Attachment:%'
+                HAVING COUNT(*) > 0
+            """
+    else:
+        return statistics
+    
+    try:
+        cursor.execute(f"""
+            SELECT COALESCE(service, 'unknown') as service_name, COUNT(*)
+            FROM {message_table}
+            GROUP BY service_name
+        """)
+        statistics['message_types'] = {service: count for service, count in cursor.fetchall()}
+        statistics['total_messages'] = sum(statistics['message_types'].values())
+        
+        cursor.execute(f"""
+            SELECT {_mac_time_to_iso_sql('MIN(date)')}, {_mac_time_to_iso_sql('MAX(date)')}
+            FROM {message_table}
+            WHERE date > 0
+        """)
+        statistics['date_range']['min'], statistics['date_range']['max'] = cursor.fetchone()
+        
+        cursor.execute(conversation_count_query)
+        statistics['total_conversations'] = cursor.fetchone()[0]
+        
+        cursor.execute(attachment_types_query)
+        statistics['attachment_types'] = {category: count for category, count in cursor.fetchall()}
+        statistics['total_attachments'] = sum(statistics['attachment_types'].values())
+    
+    except Exception as e:
+        logger.error(f"Error computing message statistics: {e}")
+    
+    return statistics
+
+
 def _infer_legacy_conversations(messages: List[Dict]) -> List[Dict]:
     """
     Infer conversations from legacy messages
@@ -658,36 +1015,40 @@ def _infer_legacy_conversations(messages: List[Dict]) -> List[Dict]:
         List of dictionaries with inferred conversation information
     """
     conversations = {}
+    conversation_numbers = itertools.count(1)
     
     for message in messages:
         contact_id = message.get('contact_id')
         if not contact_id:
             continue
         
-        if contact_id not in conversations:
-            conversations[contact_id] = {
-                'conversation_id': f"inferred_{len(conversations) + 1}",
+        conversation = conversations.get(contact_id)
+        if conversation is None:
+            service = message.get('service', 'unknown')
+            conversation = conversations[contact_id] = {
+                'conversation_id': f"inferred_{next(conversation_numbers)}",
                 'identifier': contact_id,
-                'service': message.get('service', 'unknown'),
+                'service': service,
                 'message_count': 0,
                 'participants': [{
                     'identifier': contact_id,
-                    'service': message.get('service', 'unknown')
+                    'service': service
                 }]
             }
         
-        conversations[contact_id]['message_count'] += 1
+        conversation['message_count'] += 1
     
     return list(conversations.values())
 
 
-def _analyze_legacy_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict]:
+def _analyze_legacy_attachments(cursor: sqlite3.Cursor, limit: int, schema: SchemaInfo) -> List[Dict]:
     """
     Analyze attachments in the legacy schema (iOS 5 and earlier)
     
     Args:
         cursor: SQLite database cursor
         limit: Maximum number of attachments to analyze
+        schema: Tables present in the database
         
     Returns:
         List of dictionaries with attachment information
@@ -695,11 +1056,7 @@ def _analyze_legacy_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
     attachments = []
     
     try:
-        # Check if msg_pieces table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='msg_pieces'")
-        has_msg_pieces = cursor.fetchone() is not None
-        
-        if has_msg_pieces:
+        if schema.has_msg_pieces:
             query = """
                 SELECT
                     p.ROWID as attachment_id,
@@ -708,27 +1065,18 @@ def _analyze_legacy_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
                     p.data as data,
                     p.flags as flags,
                     m.ROWID as message_id,
-                    m.text as message_text,
-                    m.date as message_date
+                    CAST(m.text AS TEXT) as message_text,
+                    m.date as message_date,
+                    {message_date} as message_date_formatted
                 FROM
                     msg_pieces as p
                 JOIN
                     messages as m ON p.message_id = m.ROWID
                 LIMIT ?
-            """
+            """.format(message_date=_mac_time_to_iso_sql('m.date'))
             
             cursor.execute(query, (limit,))
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                attachment = dict(row)
-                
-                # Convert timestamps
-                if attachment.get('message_date'):
-                    mac_absolute_time = attachment['message_date']
-                    if mac_absolute_time:
-                        unix_timestamp = mac_absolute_time + 978307200  # Offset between epochs
-                        attachment['message_date_formatted'] = datetime.fromtimestamp(unix_timestamp).isoformat()
+            for attachment in _iter_row_dicts(cursor):
                 
                 # Replace binary data with length information
                 if 'data' in attachment and attachment['data'] is not None:
@@ -742,46 +1090,31 @@ def _analyze_legacy_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
             cursor.execute("""
                 SELECT
                     ROWID as message_id,
-                    text as message_text,
-                    date as message_date
+                    CAST(text AS TEXT) as message_text,
+                    date as message_date,
+                    {message_date} as message_date_formatted
                 FROM
                     messages
                 WHERE
                     text LIKE '%<Attachment:%'
                 LIMIT ?
-            """, (limit,))
-            
-            rows = cursor.fetchall()
+            """.format(message_date=_mac_time_to_iso_sql('date')), (limit,))
             
-            for row in rows:
-                message = dict(row)
+            for message in _iter_row_dicts(cursor):
                 
                 # Extract attachment references from text
                 text = message.get('message_text', '')
-                if isinstance(text, bytes):
-                    try:
-                        text = text.decode('utf-8', errors='replace')
-                    except Exception:
-                        text = str(text)
-                
-                import re
-                attachment_refs = re.findall(r'<Attachment:([^>]+)>', text)
+                attachment_refs = _ATTACHMENT_PATTERN.findall(text)
                 
                 for ref in attachment_refs:
                     attachment = {
                         'message_id': message['message_id'],
                         'reference': ref,
                         'inferred': True,
-                        'message_date': message.get('message_date')
+                        'message_date': message.get('message_date'),
+                        'message_date_formatted': message.get('message_date_formatted')
                     }
                     
-                    # Convert timestamp
-                    if attachment.get('message_date'):
-                        mac_absolute_time = attachment['message_date']
-                        if mac_absolute_time:
-                            unix_timestamp = mac_absolute_time + 978307200  # Offset between epochs
-                            attachment['message_date_formatted'] = datetime.fromtimestamp(unix_timestamp).isoformat()
-                    
                     attachments.append(attachment)
     
     except Exception as e:
@@ -790,6 +1123,22 @@ def _analyze_legacy_attachments(cursor: sqlite3.Cursor, limit: int) -> List[Dict
     return attachments
 
 
+def _mime_category_sql(column: str) -> str:
+    """
+    Build an SQL expression extracting the top-level type of a MIME type column
+    
+    Args:
+        column: Column reference holding a MIME type
+        
+    Returns:
+        SQL expression yielding the part before '/', or 'unknown' if unset
+    """
+    return (
+        f"COALESCE(CASE WHEN instr({column}, '/') > 0 "
+        f"THEN substr({column}, 1, instr({column}, '/') - 1) ELSE {column} END, 'unknown')"
+    )
+
+
 def extract_message_statistics(db_path: str) -> Dict:
     """
     Extract message statistics from SMS/iMessage database
@@ -808,7 +1157,8 @@ def extract_message_statistics(db_path: str) -> Dict:
     return analysis.get('statistics', {})
 
 
-def search_messages(db_path: str, query: str, case_sensitive: bool = False, limit: int = 100) -> Dict:
+def search_messages(db_path: str, query: str, case_sensitive: bool = False, limit: int = 100,
+                    forensic_snapshot: bool = True, highlight: bool = True) -> Dict:
     """
     Search for messages containing specific text
     
@@ -817,6 +1167,11 @@ def search_messages(db_path: str, query: str, case_sensitive: bool = False, limi
         query: Search query
         case_sensitive: Whether to perform case-sensitive search
         limit: Maximum number of results to return
+        forensic_snapshot: Whether to include transactions still held in the
+            WAL, which requires a temporary checkpointed copy of the database.
+            Otherwise the database file is searched in place without copying.
+        highlight: Whether to add a body_highlighted copy of each message
+            body with the matches marked (default True)
         
     Returns:
         Dictionary with search results
@@ -827,286 +1182,285 @@ def search_messages(db_path: str, query: str, case_sensitive: bool = False, limi
         raise ValueError(f"Not a valid SQLite database: {db_path}")
     
     try:
-        # Create a temporary copy of the database for forensic integrity
-        temp_dir = tempfile.mkdtemp()
-        temp_db_path = os.path.join(temp_dir, os.path.basename(db_path))
-        
-        # Copy the database file
-        shutil.copy2(db_path, temp_db_path)
-        
-        # Check for and handle WAL and SHM files
-        wal_path = f"{db_path}-wal"
-        shm_path = f"{db_path}-shm"
-        
-        has_wal = os.path.exists(wal_path)
-        has_shm = os.path.exists(shm_path)
-        
-        if has_wal:
-            temp_wal_path = f"{temp_db_path}-wal"
-            shutil.copy2(wal_path, temp_wal_path)
-            logger.info(f"Found and copied WAL file: {wal_path}")
+        has_wal = os.path.exists(f"{db_path}-wal")
+        has_shm = os.path.exists(f"{db_path}-shm")
         
-        if has_shm:
-            temp_shm_path = f"{temp_db_path}-shm"
-            shutil.copy2(shm_path, temp_shm_path)
-            logger.info(f"Found and copied SHM file: {shm_path}")
-        
-        # Open the temporary copy with SQLITE_OPEN_READONLY flag
-        uri = f"file:{temp_db_path}?mode=ro"
-        conn = sqlite3.connect(uri, uri=True)
-        conn.row_factory = sqlite3.Row
-        
-        # Execute "PRAGMA journal_mode=OFF" to prevent journal file creation
-        conn.execute("PRAGMA journal_mode=OFF")
-        
-        # Disable WAL mode to prevent modification
-        conn.execute("PRAGMA locking_mode=NORMAL")
-        
-        cursor = conn.cursor()
-        
-        # Determine database schema version
-        db_version = _determine_message_db_version(cursor)
-        
-        # Build the search query based on schema version
-        if db_version == 'modern':  # iOS 6+ schema
-            # Check if the handle table exists (iOS 9+)
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='handle'")
-            has_handle_table = cursor.fetchone() is not None
+        with _forensic_connection(db_path, forensic_snapshot) as forensic:
+            cursor = forensic.conn.cursor()
             
-            if has_handle_table:
-                # Modern schema with handle table (iOS 9+)
-                if case_sensitive:
-                    sql_query = """
-                        SELECT
-                            m.ROWID as message_id,
-                            m.date as timestamp,
-                            h.id as contact_id,
-                            m.text as body,
-                            m.service as service,
-                            m.is_from_me as is_from_me,
-                            c.chat_identifier as conversation_id
-                        FROM
-                            message as m
-                        LEFT JOIN
-                            handle as h ON m.handle_id = h.ROWID
-                        LEFT JOIN
-                            chat_message_join as cmj ON m.ROWID = cmj.message_id
-                        LEFT JOIN
-                            chat as c ON cmj.chat_id = c.ROWID
-                        WHERE
-                            m.text LIKE ?
-                        ORDER BY
-                            m.date DESC
-                        LIMIT ?
-                    """
-                else:
-                    sql_query = """
-                        SELECT
-                            m.ROWID as message_id,
-                            m.date as timestamp,
-                            h.id as contact_id,
-                            m.text as body,
-                            m.service as service,
-                            m.is_from_me as is_from_me,
-                            c.chat_identifier as conversation_id
-                        FROM
-                            message as m
-                        LEFT JOIN
-                            handle as h ON m.handle_id = h.ROWID
-                        LEFT JOIN
-                            chat_message_join as cmj ON m.ROWID = cmj.message_id
-                        LEFT JOIN
-                            chat as c ON cmj.chat_id = c.ROWID
-                        WHERE
-                            LOWER(m.text) LIKE LOWER(?)
-                        ORDER BY
-                            m.date DESC
-                        LIMIT ?
-                    """
-            else:
-                # Modern schema without handle table (iOS 6-8)
-                if case_sensitive:
-                    sql_query = """
-                        SELECT
-                            m.ROWID as message_id,
-                            m.date as timestamp,
-                            m.address as contact_id,
-                            m.text as body,
-                            m.service as service,
-                            m.is_from_me as is_from_me,
-                            c.chat_identifier as conversation_id
-                        FROM
-                            message as m
-                        LEFT JOIN
-                            chat_message_join as cmj ON m.ROWID = cmj.message_id
-                        LEFT JOIN
-                            chat as c ON cmj.chat_id = c.ROWID
-                        WHERE
-                            m.text LIKE ?
-                        ORDER BY
-                            m.date DESC
-                        LIMIT ?
-                    """
-                else:
-                    sql_query = """
-                        SELECT
-                            m.ROWID as message_id,
-                            m.date as timestamp,
-                            m.address as contact_id,
-                            m.text as body,
-                            m.service as service,
-                            m.is_from_me as is_from_me,
-                            c.chat_identifier as conversation_id
-                        FROM
-                            message as m
-                        LEFT JOIN
-                            chat_message_join as cmj ON m.ROWID = cmj.message_id
-                        LEFT JOIN
-                            chat as c ON cmj.chat_id = c.ROWID
-                        WHERE
-                            LOWER(m.text) LIKE LOWER(?)
-                        ORDER BY
-                            m.date DESC
-                        LIMIT ?
-                    """
-        elif db_version == 'legacy':  # iOS 5 and earlier
-            if case_sensitive:
-                sql_query = """
-                    SELECT
-                        m.ROWID as message_id,
-                        m.address as contact_id,
-                        m.date as timestamp,
-                        m.text as body,
-                        m.service as service,
-                        m.flags as flags,
-                        m.group_id as group_id
-                    FROM
-                        messages as m
-                    WHERE
-                        m.text LIKE ?
-                    ORDER BY
-                        m.date DESC
-                    LIMIT ?
-                """
-            else:
-                sql_query = """
-                    SELECT
-                        m.ROWID as message_id,
-                        m.address as contact_id,
-                        m.date as timestamp,
-                        m.text as body,
-                        m.service as service,
-                        m.flags as flags,
-                        m.group_id as group_id
-                    FROM
-                        messages as m
-                    WHERE
-                        LOWER(m.text) LIKE LOWER(?)
-                    ORDER BY
-                        m.date DESC
-                    LIMIT ?
-                """
-        else:
-            # Generic fallback query
-            if case_sensitive:
-                sql_query = """
-                    SELECT *
-                    FROM message
-                    WHERE text LIKE ?
-                    LIMIT ?
-                """
-            else:
-                sql_query = """
-                    SELECT *
-                    FROM message
-                    WHERE LOWER(text) LIKE LOWER(?)
-                    LIMIT ?
-                """
-        
-        # Execute the search query
-        search_pattern = f'%{query}%'
-        cursor.execute(sql_query, (search_pattern, limit))
-        rows = cursor.fetchall()
-        
-        # Process results
-        search_results = []
-        for row in rows:
-            message = dict(row)
-            
-            # Convert timestamps
-            if message.get('timestamp'):
-                # iOS timestamps are in Mac Absolute Time (seconds since 2001-01-01)
-                mac_absolute_time = message['timestamp']
-                if mac_absolute_time:
-                    unix_timestamp = mac_absolute_time + 978307200  # Offset between epochs
-                    message['date'] = datetime.fromtimestamp(unix_timestamp / 1e9).isoformat()
-                    message['timestamp_unix'] = unix_timestamp
-            
-            # Make boolean values actual booleans
-            for key in ['is_from_me']:
-                if key in message and message[key] is not None:
-                    message[key] = bool(message[key])
-            
-            # For legacy schema, determine message direction based on flags
-            if db_version == 'legacy' and 'flags' in message:
-                # Bit 1 is set for outgoing messages
-                message['is_from_me'] = bool(message['flags'] & 0x01)
-            
-            # Highlight the matching text
-            if 'body' in message and message['body']:
-                text_body = message['body']
-                if isinstance(text_body, bytes):
-                    try:
-                        text_body = text_body.decode('utf-8', errors='replace')
-                    except Exception:
-                        text_body = str(text_body)
-                
-                # Create a highlighted version
-                try:
-                    if case_sensitive:
-                        message['body_highlighted'] = text_body.replace(
-                            query, f"****{query}****"
-                        )
-                    else:
-                        # Case-insensitive replacement is more complex
-                        import re
-                        pattern = re.compile(re.escape(query), re.IGNORECASE)
-                        message['body_highlighted'] = pattern.sub(
-                            lambda m: f"****{m.group(0)}****", text_body
-                        )
-                except Exception as e:
-                    logger.warning(f"Error highlighting text: {e}")
-                    message['body_highlighted'] = text_body
-            
-            search_results.append(message)
-        
-        cursor.close()
-        conn.close()
-        
-        # Clean up temporary files
-        try:
-            os.remove(temp_db_path)
-            if os.path.exists(f"{temp_db_path}-wal"):
-                os.remove(f"{temp_db_path}-wal")
-            if os.path.exists(f"{temp_db_path}-shm"):
-                os.remove(f"{temp_db_path}-shm")
-            os.rmdir(temp_dir)
-        except Exception as e:
-            logger.warning(f"Error cleaning up temporary files: {e}")
+            try:
+                search_results = _search_message_rows(
+                    cursor, forensic.info, query, case_sensitive, limit, highlight
+                )
+            finally:
+                cursor.close()
         
         # Return the search results
         return {
             'db_path': db_path,
             'query': query,
             'case_sensitive': case_sensitive,
+            'highlighted': highlight,
             'result_count': len(search_results),
             'has_more': len(search_results) >= limit,
             'results': search_results,
             'has_wal': has_wal,
             'has_shm': has_shm,
+            'db_version': forensic.info.version
+        }
+    
+    except Exception as e:
+        logger.error(f"Error searching messages in {db_path}: {e}")
+        raise
+
+
+def batch_search_messages(db_path: str, queries: List[str], case_sensitive: bool = False,
+                          limit: int = 100, forensic_snapshot: bool = True) -> Dict:
+    """
+    Search for messages containing any of several keywords in a single pass
+    
+    Every message is read once and matched against the whole keyword list,
+    with Hyperscan if it is installed and a single combined regular
+    expression otherwise.
+    
+    Args:
+        db_path: Path to the message database
+        queries: Keywords to search for
+        case_sensitive: Whether to perform case-sensitive search
+        limit: Maximum number of results to return
+        forensic_snapshot: Whether to include transactions still held in the
+            WAL, see search_messages
+        
+    Returns:
+        Dictionary with search results; each result lists its matched_queries
+    """
+    logger.info(f"Searching messages in {db_path} for {len(queries)} keywords")
+    
+    if not is_sqlite_database(db_path):
+        raise ValueError(f"Not a valid SQLite database: {db_path}")
+    
+    keywords = [query for query in queries if query]
+    if not keywords:
+        raise ValueError("No search keywords given")
+    
+    try:
+        match_keywords = _build_keyword_matcher(keywords, case_sensitive)
+        
+        with _forensic_connection(db_path, forensic_snapshot) as forensic:
+            db_version = forensic.info.version
+            cursor = forensic.conn.cursor()
+            
+            try:
+                # Every message with text, newest first, without a row limit:
+                # the limit applies to the messages that match
+                sql_query = _SEARCH_QUERIES[(db_version, forensic.info.has_handle, False, False)]
+                cursor.execute(sql_query, {'pattern': '%', 'phrase': '', 'query': '', 'limit': -1})
+                
+                search_results = []
+                for message in _iter_row_dicts(cursor):
+                    if not message.get('body'):
+                        continue
+                    
+                    matched_queries, highlighted = match_keywords(message['body'])
+                    if not matched_queries:
+                        continue
+                    
+                    _normalize_search_result(message, db_version)
+                    message['body_highlighted'] = highlighted
+                    message['matched_queries'] = matched_queries
+                    search_results.append(message)
+                    
+                    if len(search_results) >= limit:
+                        break
+            finally:
+                cursor.close()
+        
+        return {
+            'db_path': db_path,
+            'queries': keywords,
+            'case_sensitive': case_sensitive,
+            'result_count': len(search_results),
+            'has_more': len(search_results) >= limit,
+            'results': search_results,
+            'matcher': 'hyperscan' if hyperscan is not None else 're',
             'db_version': db_version
         }
     
     except Exception as e:
         logger.error(f"Error searching messages in {db_path}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def _escape_like(value: str) -> str:
+    """
+    Escape the LIKE wildcards in a string, for use with ESCAPE '\\'
+    
+    Args:
+        value: Literal text to match
+        
+    Returns:
+        Text with backslash, percent and underscore characters escaped
+    """
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_message_rows(cursor: sqlite3.Cursor, schema: SchemaInfo, query: str,
+                         case_sensitive: bool, limit: int, highlight: bool = True) -> List[Dict]:
+    """
+    Run a message text search and highlight the matches
+    
+    Args:
+        cursor: SQLite database cursor
+        schema: Schema information of the database
+        query: Search query
+        case_sensitive: Whether to perform case-sensitive search
+        limit: Maximum number of results to return
+        highlight: Whether to highlight the matches in each message body
+        
+    Returns:
+        List of matching messages
+    """
+    db_version = schema.version
+    
+    # Modern schema searches narrow their candidate rows with the trigram
+    # index when the temporary copy has one and the query spans a trigram
+    use_fts = schema.has_message_fts and len(query) >= 3
+    sql_query = _SEARCH_QUERIES[(db_version, schema.has_handle, use_fts, highlight and case_sensitive)]
+    
+    # Execute the search query. The query is matched literally: LIKE
+    # wildcards are escaped and the full-text phrase is quoted.
+    cursor.execute(sql_query, {
+        'pattern': f"%{_escape_like(query)}%",
+        'phrase': '"' + query.replace('"', '""') + '"',
+        'query': query,
+        'limit': limit
+    })
+    
+    # Matches are highlighted with one pattern compiled for the whole result set
+    highlight_pattern = re.compile(re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+    
+    # Process results
+    search_results = []
+    for message in _iter_row_dicts(cursor):
+        _normalize_search_result(message, db_version)
+        
+        # Highlight the matching text, unless SQLite already did
+        if highlight:
+            if not message.get('body'):
+                message.pop('body_highlighted', None)
+            elif 'body_highlighted' not in message:
+                message['body_highlighted'] = highlight_pattern.sub(r'****\g<0>****', message['body'])
+        
+        search_results.append(message)
+    
+    return search_results
+
+
+def _normalize_search_result(message: Dict, db_version: str) -> None:
+    """
+    Normalize the message direction of a search result in place
+    
+    Args:
+        message: Search result row
+        db_version: Schema version identifier
+    """
+    # Make boolean values actual booleans
+    for key in ['is_from_me']:
+        if key in message and message[key] is not None:
+            message[key] = bool(message[key])
+    
+    # For legacy schema, determine message direction based on flags
+    if db_version == 'legacy' and 'flags' in message:
+        # Bit 1 is set for outgoing messages
+        message['is_from_me'] = bool(message['flags'] & 0x01)
+
+
+def _build_keyword_matcher(keywords: List[str], case_sensitive: bool) -> Callable[[str], Tuple[List[str], str]]:
+    """
+    Build a function matching a message body against a list of keywords
+    
+    Args:
+        keywords: Non-empty keywords to search for
+        case_sensitive: Whether to perform case-sensitive search
+        
+    Returns:
+        Function taking a message body and returning the keywords found in
+        it and the body with every match highlighted
+    """
+    if hyperscan is not None:
+        return _build_hyperscan_matcher(keywords, case_sensitive)
+    
+    # Longest keywords first, so a keyword is not cut short by its own prefix
+    alternation = '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    pattern = re.compile(alternation, 0 if case_sensitive else re.IGNORECASE)
+    needles = keywords if case_sensitive else [keyword.lower() for keyword in keywords]
+    
+    def match_keywords(body: str) -> Tuple[List[str], str]:
+        highlighted, match_count = pattern.subn(r'****\g<0>****', body)
+        if not match_count:
+            return [], body
+        
+        # Keywords nested in a longer match are not reported by the
+        # alternation, so look each one up in the matching body
+        haystack = body if case_sensitive else body.lower()
+        matched = [keyword for keyword, needle in zip(keywords, needles) if needle in haystack]
+        return matched, highlighted
+    
+    return match_keywords
+
+
+def _build_hyperscan_matcher(keywords: List[str], case_sensitive: bool) -> Callable[[str], Tuple[List[str], str]]:
+    """
+    Build a keyword matching function backed by a Hyperscan database
+    
+    Args:
+        keywords: Non-empty keywords to search for
+        case_sensitive: Whether to perform case-sensitive search
+        
+    Returns:
+        Function taking a message body and returning the keywords found in
+        it and the body with every match highlighted
+    """
+    flags = hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_UTF8
+    if not case_sensitive:
+        flags |= hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UCP
+    
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        expressions=[re.escape(keyword).encode('utf-8') for keyword in keywords],
+        ids=list(range(len(keywords))),
+        elements=len(keywords),
+        flags=[flags] * len(keywords)
+    )
+    
+    def match_keywords(body: str) -> Tuple[List[str], str]:
+        data = body.encode('utf-8')
+        spans = []
+        
+        def on_match(keyword_id: int, start: int, end: int, match_flags: int, context: Any) -> None:
+            spans.append((start, end, keyword_id))
+        
+        database.scan(data, match_event_handler=on_match)
+        if not spans:
+            return [], body
+        
+        # Merge overlapping matches and highlight each merged span once
+        spans.sort()
+        merged = []
+        for start, end, _ in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        
+        parts = []
+        position = 0
+        for start, end in merged:
+            parts.extend((data[position:start], b'****', data[start:end], b'****'))
+            position = end
+        parts.append(data[position:])
+        
+        matched = [keywords[keyword_id] for keyword_id in sorted({span[2] for span in spans})]
+        return matched, b''.join(parts).decode('utf-8')
+    
+    return match_keywords
@@ -1,18 +1,57 @@
 # tools/sqlite/analyzer.py - SQLite database analysis tools
 
 import os
+import re
+import stat
+import struct
+import itertools
+import mmap
 import sqlite3
+import contextlib
+import functools
+import concurrent.futures
 import json
 import logging
-from typing import Dict, List, Optional, Any, Tuple, Union
+import time
+import urllib.parse
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Iterator, Tuple, Union
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Import utilities
-from ...utils.path_utils import find_files_by_extension, is_common_database_path
+from ...utils.path_utils import iter_files_by_extension, is_common_database_path
+from .connection_pool import pooled_connection, dedicated_connection, database_fingerprint
 
 
+# Potentially destructive keywords execute_query refuses, matched as whole
+# whitespace-separated words in any case
+_FORBIDDEN_KEYWORDS_RE = re.compile(
+    r'(?<!\S)(?:DROP|DELETE|UPDATE|INSERT|ALTER|ATTACH|DETACH|PRAGMA)(?!\S)',
+    re.IGNORECASE
+)
+
+# WAL file header: magic, format version, page size, checkpoint sequence,
+# two salts and two checksums, all big-endian
+_WAL_HEADER = struct.Struct('>8I')
+_WAL_MAGICS = (0x377f0682, 0x377f0683)
+
+# Rollback journal header: 8 magic bytes, then big-endian record count,
+# checksum nonce, initial database size in pages, sector size and page size
+_JOURNAL_MAGIC = b'\xd9\xd5\x05\xf9\x20\xa1\x63\xd7'
+_JOURNAL_HEADER = struct.Struct('>5I')
+
+# File extensions of candidate SQLite databases
+DATABASE_EXTENSIONS = frozenset({'db', 'sqlite', 'sqlitedb', 'sqlite3', 'db3'})
+
+# Threads used to probe candidate files in find_databases
+_PROBE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Most SELECTs SQLite accepts in one compound statement
+# (SQLITE_MAX_COMPOUND_SELECT)
+_MAX_COMPOUND_SELECT = 500
+
 def is_sqlite_database(file_path: str) -> bool:
     """
     Check if a file is a valid SQLite database
@@ -23,9 +62,33 @@ def is_sqlite_database(file_path: str) -> bool:
     Returns:
         True if the file is a valid SQLite database, False otherwise
     """
-    if not os.path.isfile(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return False
+    
+    if not stat.S_ISREG(file_stat.st_mode):
         return False
     
+    return _is_sqlite_file(file_path, file_stat.st_mtime_ns, file_stat.st_size)
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_sqlite_file(file_path: str, mtime_ns: int, size: int) -> bool:
+    """
+    Check a regular file for the SQLite magic header, caching the answer
+    
+    The modification time and size are part of the cache key, so a file that
+    changes is checked again.
+    
+    Args:
+        file_path: Path to the file to check
+        mtime_ns: Modification time of the file in nanoseconds
+        size: Size of the file in bytes
+        
+    Returns:
+        True if the file starts with the SQLite header, False otherwise
+    """
     # Check for SQLite magic header (first 16 bytes)
     try:
         with open(file_path, 'rb') as f:
@@ -50,66 +113,100 @@ def find_databases(base_path: str) -> List[Dict]:
     """
     logger.info(f"Searching for SQLite databases in {base_path}")
     
-    # Find files with common SQLite extensions
-    candidates = find_files_by_extension(
-        base_path,
-        ['db', 'sqlite', 'sqlitedb', 'sqlite3', 'db3'],
-        recursive=True
-    )
+    # Find files with common SQLite extensions. The directory tree is walked
+    # lazily, so probing starts on the first candidates while the rest of
+    # the tree is still being listed.
+    candidates = iter_files_by_extension(base_path, DATABASE_EXTENSIONS, recursive=True)
+    
+    # Probing is almost entirely waiting on file reads, which release the
+    # GIL, so candidates are checked in parallel; map keeps their order
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_PROBE_WORKERS) as executor:
+        databases = [db_info for db_info in executor.map(_probe_database, candidates) if db_info is not None]
     
-    databases = []
+    logger.info(f"Found {len(databases)} SQLite databases")
+    return databases
+
+
+def _probe_database(candidate: str) -> Optional[Dict]:
+    """
+    Check whether a candidate file is a SQLite database and read its table list
     
-    for candidate in candidates:
+    Args:
+        candidate: Path to the candidate file
+        
+    Returns:
+        Dictionary with database information, or None if the file is not a
+        SQLite database
+    """
+    try:
+        # One stat serves both the header check cache and the size
+        candidate_stat = os.stat(candidate)
+        if not (stat.S_ISREG(candidate_stat.st_mode)
+                and _is_sqlite_file(candidate, candidate_stat.st_mtime_ns, candidate_stat.st_size)):
+            return None
+        
+        # Check if this is a known iOS database
+        is_known, description = is_common_database_path(candidate)
+        
+        # Get database info
+        db_info = {
+            'path': candidate,
+            'name': os.path.basename(candidate),
+            'size': candidate_stat.st_size,
+            'is_known': is_known,
+        }
+        
+        if is_known and description:
+            db_info['description'] = description
+        
+        # Get basic schema info. The database is never opened for writing,
+        # which would checkpoint its WAL or roll back a hot journal, and is
+        # not copied either: probing is a quick look at many files. An
+        # immutable open ignores the WAL, so a non-empty one is flagged as
+        # possibly holding tables not listed here.
         try:
-            if is_sqlite_database(candidate):
-                # Check if this is a known iOS database
-                is_known, description = is_common_database_path(candidate)
-                
-                # Get database info
-                db_info = {
-                    'path': candidate,
-                    'name': os.path.basename(candidate),
-                    'size': os.path.getsize(candidate),
-                    'is_known': is_known,
-                }
-                
-                if is_known and description:
-                    db_info['description'] = description
-                
-                # Get basic schema info
-                try:
-                    conn = sqlite3.connect(candidate)
-                    cursor = conn.cursor()
-                    
-                    # Get table count
-                    cursor.execute("SELECT COUNT(name) FROM sqlite_master WHERE type='table'")
-                    table_count = cursor.fetchone()[0]
-                    db_info['table_count'] = table_count
-                    
-                    # Get table list
-                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                    tables = [row[0] for row in cursor.fetchall()]
-                    db_info['tables'] = tables
-                    
-                    conn.close()
-                except Exception as e:
-                    logger.warning(f"Could not read schema for {candidate}: {e}")
-                    db_info['error'] = str(e)
-                
-                databases.append(db_info)
+            db_info['wal_pending'] = database_fingerprint(candidate)[3] > 0
+            
+            uri = f"file:{urllib.parse.quote(candidate)}?mode=ro&immutable=1&nolock=1"
+            with contextlib.closing(sqlite3.connect(uri, uri=True)) as conn:
+                table_count, tables = _list_tables(conn)
+            
+            db_info['table_count'] = table_count
+            db_info['tables'] = tables
         except Exception as e:
-            logger.error(f"Error checking {candidate}: {e}")
+            logger.warning(f"Could not read schema for {candidate}: {e}")
+            db_info['error'] = str(e)
+        
+        return db_info
+    except Exception as e:
+        logger.error(f"Error checking {candidate}: {e}")
+        return None
+
+
+def _list_tables(conn: sqlite3.Connection) -> Tuple[int, List[str]]:
+    """
+    List the tables of a database
     
-    logger.info(f"Found {len(databases)} SQLite databases")
-    return databases
+    Args:
+        conn: Connection to the database
+        
+    Returns:
+        Tuple of (table count, table names)
+    """
+    # Get table list; the count follows from it
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    
+    return len(tables), tables
 
 
-def analyze_schema(db_path: str) -> Dict:
+def analyze_schema(db_path: str, forensic_copy: bool = False) -> Dict:
     """
     Analyze the schema of a SQLite database
     
     Args:
         db_path: Path to the SQLite database
+        forensic_copy: Whether to read a temporary copy of the database
+            instead of opening the original as immutable
         
     Returns:
         Dictionary with database schema information
@@ -120,129 +217,62 @@ def analyze_schema(db_path: str) -> Dict:
         raise ValueError(f"Not a valid SQLite database: {db_path}")
     
     try:
-        # Create a temporary copy of the database for forensic integrity
-        import tempfile
-        import shutil
-        
-        temp_dir = tempfile.mkdtemp()
-        temp_db_path = os.path.join(temp_dir, os.path.basename(db_path))
-        
-        # Copy the database file
-        shutil.copy2(db_path, temp_db_path)
-        
-        # Check for and handle WAL and SHM files
         wal_path = f"{db_path}-wal"
         shm_path = f"{db_path}-shm"
         
-        if os.path.exists(wal_path):
-            temp_wal_path = f"{temp_db_path}-wal"
-            shutil.copy2(wal_path, temp_wal_path)
-            logger.info(f"Copied WAL file to temporary location: {temp_wal_path}")
-        
-        if os.path.exists(shm_path):
-            temp_shm_path = f"{temp_db_path}-shm"
-            shutil.copy2(shm_path, temp_shm_path)
-            logger.info(f"Copied SHM file to temporary location: {temp_shm_path}")
-        
-        # Open the temporary copy with SQLITE_OPEN_READONLY flag to prevent modification
-        # Use URI format to specify flags
-        uri = f"file:{temp_db_path}?mode=ro"
-        conn = sqlite3.connect(uri, uri=True)
-        
-        # Execute "PRAGMA journal_mode=OFF" to prevent journal file creation
-        conn.execute("PRAGMA journal_mode=OFF")
-        
-        # Disable WAL mode to prevent modification of the WAL file
-        conn.execute("PRAGMA locking_mode=NORMAL")
-        
-        cursor = conn.cursor()
-        
-        # Get database metadata
-        is_known, description = is_common_database_path(db_path)
-        
-        schema_info = {
-            'path': db_path,
-            'name': os.path.basename(db_path),
-            'is_known': is_known,
-            'tables': [],
-            'indexes': [],
-            'triggers': [],
-            'has_wal': os.path.exists(wal_path),
-            'has_shm': os.path.exists(shm_path),
-            'used_temp_copy': True
-        }
-        
-        if is_known and description:
-            schema_info['description'] = description
-        
-        # Get tables
-        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table'")
-        for name, sql in cursor.fetchall():
-            table_info = {'name': name, 'sql': sql, 'columns': []}
+        with pooled_connection(db_path, forensic_copy) as pooled, contextlib.closing(pooled.conn.cursor()) as cursor:
+            # Get database metadata
+            is_known, description = is_common_database_path(db_path)
             
-            # Get columns
-            try:
-                cursor.execute(f"PRAGMA table_info({name})")
-                for cid, column_name, column_type, not_null, default_value, pk in cursor.fetchall():
-                    column_info = {
-                        'cid': cid,
-                        'name': column_name,
-                        'type': column_type,
-                        'not_null': bool(not_null),
-                        'default_value': default_value,
-                        'primary_key': bool(pk)
-                    }
-                    table_info['columns'].append(column_info)
-            except Exception as e:
-                logger.warning(f"Could not get column info for table {name}: {e}")
-                table_info['error'] = f"Could not get column info: {str(e)}"
+            schema_info = {
+                'path': db_path,
+                'name': os.path.basename(db_path),
+                'is_known': is_known,
+                'tables': [],
+                'indexes': [],
+                'triggers': [],
+                'has_wal': os.path.exists(wal_path),
+                'has_shm': os.path.exists(shm_path),
+                'used_temp_copy': pooled.temp_path is not None
+            }
             
-            # Get record count
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM {name}")
-                table_info['record_count'] = cursor.fetchone()[0]
-            except Exception as e:
-                logger.warning(f"Could not get record count for table {name}: {e}")
-                table_info['record_count'] = "Error"
+            if is_known and description:
+                schema_info['description'] = description
             
-            schema_info['tables'].append(table_info)
-        
-        # Get indexes
-        cursor.execute("SELECT name, tbl_name, sql FROM sqlite_master WHERE type='index'")
-        for name, table_name, sql in cursor.fetchall():
-            if name.startswith('sqlite_'):  # Skip internal indexes
-                continue
+            # Get tables
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table'")
+            tables = cursor.fetchall()
+            table_names = [name for name, _ in tables]
+            
+            # Get columns and record counts for all tables at once
+            columns, column_errors = _get_table_columns(cursor, table_names)
+            record_counts = _count_table_records(cursor, table_names)
+            
+            for name, sql in tables:
+                table_info = {'name': name, 'sql': sql, 'columns': columns.get(name, [])}
+                if name in column_errors:
+                    table_info['error'] = f"Could not get column info: {column_errors[name]}"
                 
-            index_info = {
-                'name': name,
-                'table': table_name,
-                'sql': sql
-            }
-            schema_info['indexes'].append(index_info)
-        
-        # Get triggers
-        cursor.execute("SELECT name, tbl_name, sql FROM sqlite_master WHERE type='trigger'")
-        for name, table_name, sql in cursor.fetchall():
-            trigger_info = {
-                'name': name,
-                'table': table_name,
-                'sql': sql
-            }
-            schema_info['triggers'].append(trigger_info)
-        
-        cursor.close()
-        conn.close()
-        
-        # Clean up temporary files
-        try:
-            os.remove(temp_db_path)
-            if os.path.exists(f"{temp_db_path}-wal"):
-                os.remove(f"{temp_db_path}-wal")
-            if os.path.exists(f"{temp_db_path}-shm"):
-                os.remove(f"{temp_db_path}-shm")
-            os.rmdir(temp_dir)
-        except Exception as e:
-            logger.warning(f"Error cleaning up temporary files: {e}")
+                table_info['record_count'] = record_counts[name]
+                schema_info['tables'].append(table_info)
+            
+            # Get indexes, skipping internal ones; '_' is a LIKE wildcard,
+            # so it is escaped to match only the literal 'sqlite_' prefix
+            schema_info['indexes'] = [
+                {'name': name, 'table': table_name, 'sql': sql}
+                for name, table_name, sql in cursor.execute(
+                    "SELECT name, tbl_name, sql FROM sqlite_master "
+                    "WHERE type='index' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"
+                )
+            ]
+            
+            # Get triggers
+            schema_info['triggers'] = [
+                {'name': name, 'table': table_name, 'sql': sql}
+                for name, table_name, sql in cursor.execute(
+                    "SELECT name, tbl_name, sql FROM sqlite_master WHERE type='trigger'"
+                )
+            ]
         
         return schema_info
     
@@ -251,14 +281,136 @@ def analyze_schema(db_path: str) -> Dict:
         raise
 
 
-def execute_query(db_path: str, query: str, params: Optional[Dict[str, Any]] = None) -> Dict:
+def _get_table_columns(cursor: sqlite3.Cursor,
+                       table_names: List[str]) -> Tuple[Dict[str, List[Dict]], Dict[str, str]]:
+    """
+    Get column information for every table in one query
+    
+    Args:
+        cursor: Database cursor
+        table_names: Names of the tables in the database
+        
+    Returns:
+        Tuple of (column dictionaries by table name, error messages by table
+        name for tables whose columns could not be read)
+    """
+    try:
+        cursor.execute("""
+            SELECT m.name, p.cid, p.name, p.type, p."notnull", p.dflt_value, p.pk
+            FROM sqlite_master AS m
+            JOIN pragma_table_info(m.name) AS p
+            WHERE m.type = 'table'
+            ORDER BY m.name, p.cid
+        """)
+        return {
+            name: [_column_info(row[1:]) for row in rows]
+            for name, rows in itertools.groupby(cursor.fetchall(), key=itemgetter(0))
+        }, {}
+    except sqlite3.Error as e:
+        # A single unreadable table, e.g. a virtual table whose module is
+        # missing, fails the whole query: fall back to one table at a time
+        logger.warning(f"Could not get column info in bulk, reading tables one by one: {e}")
+    
+    columns = {}
+    errors = {}
+    for name in table_names:
+        try:
+            cursor.execute(
+                'SELECT cid, name, type, "notnull", dflt_value, pk FROM pragma_table_info(?)',
+                (name,)
+            )
+            columns[name] = [_column_info(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.warning(f"Could not get column info for table {name}: {e}")
+            errors[name] = str(e)
+    
+    return columns, errors
+
+
+def _column_info(row: Tuple) -> Dict:
+    """
+    Convert a pragma_table_info row to a column dictionary
+    
+    Args:
+        row: Tuple of (cid, name, type, notnull, dflt_value, pk)
+        
+    Returns:
+        Dictionary with column information
+    """
+    cid, column_name, column_type, not_null, default_value, pk = row
+    return {
+        'cid': cid,
+        'name': column_name,
+        'type': column_type,
+        'not_null': not_null != 0,
+        'default_value': default_value,
+        'primary_key': pk != 0
+    }
+
+
+def _count_table_records(cursor: sqlite3.Cursor, table_names: List[str]) -> Dict[str, Union[int, str]]:
+    """
+    Count the records of every table, batching the counts into UNION ALL queries
+    
+    Args:
+        cursor: Database cursor
+        table_names: Names of the tables to count
+        
+    Returns:
+        Dictionary of record counts by table name, "Error" for tables that
+        could not be counted
+    """
+    counts = {}
+    for start in range(0, len(table_names), _MAX_COMPOUND_SELECT):
+        batch = table_names[start:start + _MAX_COMPOUND_SELECT]
+        query = " UNION ALL ".join(
+            f"SELECT {i}, COUNT(*) FROM {_quote_identifier(name)}"
+            for i, name in enumerate(batch)
+        )
+        
+        try:
+            cursor.execute(query)
+            for i, count in cursor.fetchall():
+                counts[batch[i]] = count
+            continue
+        except sqlite3.Error as e:
+            logger.warning(f"Could not count records in bulk, counting tables one by one: {e}")
+        
+        for name in batch:
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {_quote_identifier(name)}")
+                counts[name] = cursor.fetchone()[0]
+            except Exception as e:
+                logger.warning(f"Could not get record count for table {name}: {e}")
+                counts[name] = "Error"
+    
+    return counts
+
+
+def _quote_identifier(name: str) -> str:
+    """
+    Quote a table or column name for use in SQL
+    
+    Args:
+        name: Identifier to quote
+        
+    Returns:
+        Identifier in double quotes, with embedded double quotes doubled
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def execute_query(db_path: str, query: str, params: Optional[Union[Dict[str, Any], Tuple]] = None,
+                  forensic_copy: bool = False) -> Dict:
     """
     Execute a SQL query against a SQLite database
     
     Args:
         db_path: Path to the SQLite database
         query: SQL query to execute
-        params: Query parameters (optional)
+        params: Query parameters, by name or by position (optional)
+        forensic_copy: Whether to read a temporary copy of the database
+            instead of opening the original as immutable
         
     Returns:
         Dictionary with query results
@@ -268,98 +420,30 @@ def execute_query(db_path: str, query: str, params: Optional[Dict[str, Any]] = N
     if not is_sqlite_database(db_path):
         raise ValueError(f"Not a valid SQLite database: {db_path}")
     
-    # Validate query to prevent SQL injection
-    query = query.strip()
-    if not query:
-        raise ValueError("Empty query")
-    
-    # Disallow multiple statements
-    if ";" in query[:-1]:  # Allow trailing semicolon
-        raise ValueError("Multiple SQL statements are not allowed")
-    
-    # Disallow potentially destructive operations
-    forbidden_keywords = ["DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "ATTACH", "DETACH", "PRAGMA"]
-    for keyword in forbidden_keywords:
-        if keyword in query.upper().split():
-            raise ValueError(f"Operation not allowed: {keyword}")
+    query = _validate_query(query)
     
     try:
-        # Create a temporary copy of the database for forensic integrity
-        import tempfile
-        import shutil
-        
-        temp_dir = tempfile.mkdtemp()
-        temp_db_path = os.path.join(temp_dir, os.path.basename(db_path))
-        
-        # Copy the database file
-        shutil.copy2(db_path, temp_db_path)
-        
-        # Check for and handle WAL and SHM files
-        wal_path = f"{db_path}-wal"
-        shm_path = f"{db_path}-shm"
-        
-        if os.path.exists(wal_path):
-            temp_wal_path = f"{temp_db_path}-wal"
-            shutil.copy2(wal_path, temp_wal_path)
-            logger.info(f"Copied WAL file to temporary location: {temp_wal_path}")
-        
-        if os.path.exists(shm_path):
-            temp_shm_path = f"{temp_db_path}-shm"
-            shutil.copy2(shm_path, temp_shm_path)
-            logger.info(f"Copied SHM file to temporary location: {temp_shm_path}")
-        
-        # Open the temporary copy with SQLITE_OPEN_READONLY flag to prevent modification
-        # Use URI format to specify flags
-        uri = f"file:{temp_db_path}?mode=ro"
-        conn = sqlite3.connect(uri, uri=True)
-        conn.row_factory = sqlite3.Row  # Return results as dictionaries
-        
-        # Execute "PRAGMA journal_mode=OFF" to prevent journal file creation
-        conn.execute("PRAGMA journal_mode=OFF")
-        
-        # Disable WAL mode to prevent modification of the WAL file
-        conn.execute("PRAGMA locking_mode=NORMAL")
-        
-        cursor = conn.cursor()
-        
-        # Execute the query
-        start_time = os.times()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        
-        # Get column names
-        column_names = [description[0] for description in cursor.description] if cursor.description else []
-        
-        # Fetch results (limit to 1000 rows for performance)
-        MAX_ROWS = 1000
-        rows = cursor.fetchmany(MAX_ROWS)
-        row_count = len(rows)
-        has_more = row_count == MAX_ROWS
-        
-        # Convert rows to dictionaries
-        results = []
-        for row in rows:
-            results.append({column_names[i]: row[i] for i in range(len(column_names))})
-        
-        # Get execution time
-        end_time = os.times()
-        execution_time = (end_time.user - start_time.user) + (end_time.system - start_time.system)
-        
-        cursor.close()
-        conn.close()
-        
-        # Clean up temporary files
-        try:
-            os.remove(temp_db_path)
-            if os.path.exists(f"{temp_db_path}-wal"):
-                os.remove(f"{temp_db_path}-wal")
-            if os.path.exists(f"{temp_db_path}-shm"):
-                os.remove(f"{temp_db_path}-shm")
-            os.rmdir(temp_dir)
-        except Exception as e:
-            logger.warning(f"Error cleaning up temporary files: {e}")
+        with pooled_connection(db_path, forensic_copy) as pooled, contextlib.closing(pooled.conn.cursor()) as cursor:
+            # Execute the query; the pooled connection keeps it compiled
+            # for the next call with the same SQL
+            start_time = time.perf_counter_ns()
+            cursor.execute(query, params or ())
+            
+            # Get column names
+            column_names = [description[0] for description in cursor.description] if cursor.description else []
+            
+            # Fetch results (limit to 1000 rows for performance)
+            MAX_ROWS = 1000
+            cursor.arraysize = MAX_ROWS
+            rows = cursor.fetchmany()
+            row_count = len(rows)
+            has_more = row_count == MAX_ROWS
+            
+            # Convert the plain tuple rows to dictionaries
+            results = [dict(zip(column_names, row)) for row in rows]
+            
+            # Get execution time in seconds of wall-clock time
+            execution_time = (time.perf_counter_ns() - start_time) / 1e9
         
         return {
             'column_names': column_names,
@@ -368,7 +452,7 @@ def execute_query(db_path: str, query: str, params: Optional[Dict[str, Any]] = N
             'has_more': has_more,
             'execution_time': execution_time,
             'query': query,
-            'used_temp_copy': True
+            'used_temp_copy': pooled.temp_path is not None
         }
     
     except Exception as e:
@@ -376,7 +460,71 @@ def execute_query(db_path: str, query: str, params: Optional[Dict[str, Any]] = N
         raise
 
 
-def get_table_data(db_path: str, table_name: str, limit: int = 100, offset: int = 0) -> Dict:
+def iter_query(db_path: str, query: str, params: Optional[Union[Dict[str, Any], Tuple]] = None,
+               batch: int = 1000, forensic_copy: bool = False) -> Iterator[List[Tuple]]:
+    """
+    Execute a SQL query against a SQLite database, streaming all result rows
+    
+    Unlike execute_query, the results are not capped: the rows are read from
+    a single cursor in batches, so exporting a large table takes one pass and
+    only one batch is held in memory at a time. The rows come from a
+    connection of the generator's own, closed once it is exhausted or closed,
+    so pooled queries on the same database are not held up in between.
+    
+    Args:
+        db_path: Path to the SQLite database
+        query: SQL query to execute
+        params: Query parameters, by name or by position (optional)
+        batch: Number of rows per batch
+        forensic_copy: Whether to read a temporary copy of the database
+            instead of opening the original as immutable
+        
+    Yields:
+        Lists of up to batch rows, each row a tuple in column order
+    """
+    logger.info(f"Streaming query on {db_path}")
+    
+    if not is_sqlite_database(db_path):
+        raise ValueError(f"Not a valid SQLite database: {db_path}")
+    
+    query = _validate_query(query)
+    
+    with dedicated_connection(db_path, forensic_copy) as conn, contextlib.closing(conn.cursor()) as cursor:
+        cursor.arraysize = batch
+        cursor.execute(query, params or ())
+        while rows := cursor.fetchmany():
+            yield rows
+
+
+def _validate_query(query: str) -> str:
+    """
+    Check that a query is a single statement that does not modify the database
+    
+    Args:
+        query: SQL query to check
+        
+    Returns:
+        Query with surrounding whitespace removed
+    """
+    # Validate query to prevent SQL injection
+    query = query.strip()
+    if not query:
+        raise ValueError("Empty query")
+    
+    # Disallow multiple statements
+    if ";" in query[:-1]:  # Allow trailing semicolon
+        raise ValueError("Multiple SQL statements are not allowed")
+    
+    # Disallow potentially destructive operations
+    forbidden = _FORBIDDEN_KEYWORDS_RE.search(query)
+    if forbidden:
+        raise ValueError(f"Operation not allowed: {forbidden.group(0).upper()}")
+    
+    return query
+
+
+def get_table_data(db_path: str, table_name: str, limit: int = 100, offset: int = 0,
+                   columns: Optional[List[str]] = None) -> Dict:
     """
     Get data from a table in a SQLite database
     
@@ -385,16 +533,20 @@ def get_table_data(db_path: str, table_name: str, limit: int = 100, offset: int
         table_name: Name of the table
         limit: Maximum number of rows to return
         offset: Offset for pagination
+        columns: Names of the columns to return (optional, all columns by default)
         
     Returns:
         Dictionary with table data
     """
-    # Validate table name to prevent SQL injection
+    # Accept table names passed already quoted
     table_name = table_name.strip('\'"`[]')
     
-    # Build and execute query
-    query = f"SELECT * FROM '{table_name}' LIMIT ? OFFSET ?"
-    params = {'limit': limit, 'offset': offset}
+    # Build and execute query. Identifiers are quoted to prevent SQL
+    # injection, and the paging values are bound so the SQL text, and with
+    # it the cached prepared statement, is the same for every page.
+    column_list = ', '.join(_quote_identifier(column) for column in columns) if columns else '*'
+    query = f"SELECT {column_list} FROM {_quote_identifier(table_name)} LIMIT ? OFFSET ?"
+    params = (limit, offset)
     
     return execute_query(db_path, query, params)
 
@@ -419,56 +571,53 @@ def recover_deleted_records(db_path: str, table_name: Optional[str] = None) -> D
     # A complete implementation would analyze free pages and unallocated space
     
     try:
-        # Open the database file in binary mode to scan for record fragments
-        with open(db_path, 'rb') as f:
-            content = f.read()
-        
         recovered_data = {
             'path': db_path,
             'name': os.path.basename(db_path),
             'recovered': []
         }
         
-        # Connect to get schema information
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get tables to analyze
-        tables_to_analyze = []
-        if table_name:
-            # Validate table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-            if cursor.fetchone():
-                tables_to_analyze.append(table_name)
+        # Locate the freed space inside b-tree pages, where deleted records
+        # linger until the space is reused
+        recovered_data.update(_scan_freeblocks(db_path))
+        
+        # Get schema information
+        with pooled_connection(db_path) as pooled, contextlib.closing(pooled.conn.cursor()) as cursor:
+            # Get tables to analyze
+            tables_to_analyze = []
+            if table_name:
+                # Validate table exists
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+                if cursor.fetchone():
+                    tables_to_analyze.append(table_name)
+                else:
+                    raise ValueError(f"Table does not exist: {table_name}")
             else:
-                raise ValueError(f"Table does not exist: {table_name}")
-        else:
-            # Get all tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables_to_analyze = [row[0] for row in cursor.fetchall()]
-        
-        # Analyze each table
-        for table in tables_to_analyze:
-            table_data = {
-                'table': table,
-                'possible_records': []
-            }
-            
-            # Get column names
-            cursor.execute(f"PRAGMA table_info({table})")
-            columns = [row[1] for row in cursor.fetchall()]
-            table_data['columns'] = columns
-            
-            # Simple heuristic recovery based on known patterns
-            # This is a placeholder for a more sophisticated recovery algorithm
-            # In a real implementation, this would analyze free pages and unallocated space
+                # Get all tables
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                tables_to_analyze = [row[0] for row in cursor.fetchall()]
             
-            # For now, just report that recovery requires a more sophisticated approach
-            table_data['message'] = "Full recovery of deleted records requires advanced forensic techniques that analyze database file structure directly. Consider using specialized SQLite forensic tools for complete recovery."
-            
-            recovered_data['recovered'].append(table_data)
+            # Analyze each table
+            for table in tables_to_analyze:
+                table_data = {
+                    'table': table,
+                    'possible_records': []
+                }
+                
+                # Get column names
+                cursor.execute("SELECT name FROM pragma_table_info(?)", (table,))
+                columns = [row[0] for row in cursor.fetchall()]
+                table_data['columns'] = columns
+                
+                # Simple heuristic recovery based on known patterns
+                # This is a placeholder for a more sophisticated recovery algorithm
+                # In a real implementation, this would analyze free pages and unallocated space
+                
+                # For now, just report that recovery requires a more sophisticated approach
+                table_data['message'] = "Full recovery of deleted records requires advanced forensic techniques that analyze database file structure directly. Consider using specialized SQLite forensic tools for complete recovery."
+                
+                recovered_data['recovered'].append(table_data)
         
-        conn.close()
         return recovered_data
     
     except Exception as e:
@@ -476,6 +625,81 @@ def recover_deleted_records(db_path: str, table_name: Optional[str] = None) -> D
         raise
 
 
+def _scan_freeblocks(db_path: str) -> Dict:
+    """
+    Walk the freeblock chain of every b-tree page in a database file
+    
+    Freeblocks are the gaps left inside a page when cells are deleted, so
+    they are where remnants of deleted records are found. The file is
+    memory-mapped and scanned page by page rather than read into memory.
+    
+    Args:
+        db_path: Path to the SQLite database
+        
+    Returns:
+        Dictionary with the page size, freeblock count and total size, and
+        the location of the first MAX_FREEBLOCKS freeblocks, plus
+        freeblock_error if the header holds no valid page size
+    """
+    MAX_FREEBLOCKS = 1000
+    
+    freeblocks = []
+    freeblock_count = 0
+    freeblock_bytes = 0
+    
+    with open(db_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, 'madvise'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        
+        # Page size is a big-endian 16-bit value at offset 16, where 1 means 65536
+        page_size = int.from_bytes(mm[16:18], 'big')
+        if page_size == 1:
+            page_size = 65536
+        
+        # A valid page size is a power of two from 512 to 65536; a damaged
+        # or zeroed header cannot be used to find the pages
+        if page_size < 512 or page_size & (page_size - 1):
+            logger.warning(f"Invalid page size {page_size} in {db_path}, skipping freeblock scan")
+            return {
+                'page_size': page_size,
+                'freeblock_count': 0,
+                'freeblock_bytes': 0,
+                'freeblocks': [],
+                'freeblock_error': f"Invalid page size in database header: {page_size}"
+            }
+        
+        for page_number in range(1, len(mm) // page_size + 1):
+            page_start = (page_number - 1) * page_size
+            
+            # The first page starts with the 100-byte database header
+            header_start = page_start + 100 if page_number == 1 else page_start
+            if mm[header_start] not in (2, 5, 10, 13):  # Not a b-tree page
+                continue
+            
+            # Follow the chain of (next offset, size) pairs; offsets must
+            # increase, which also stops loops in corrupt pages
+            offset = int.from_bytes(mm[header_start + 1:header_start + 3], 'big')
+            previous = 0
+            while previous < offset <= page_size - 4:
+                block = page_start + offset
+                next_offset = int.from_bytes(mm[block:block + 2], 'big')
+                size = int.from_bytes(mm[block + 2:block + 4], 'big')
+                
+                freeblock_count += 1
+                freeblock_bytes += size
+                if len(freeblocks) < MAX_FREEBLOCKS:
+                    freeblocks.append({'page': page_number, 'offset': offset, 'size': size})
+                
+                previous, offset = offset, next_offset
+    
+    return {
+        'page_size': page_size,
+        'freeblock_count': freeblock_count,
+        'freeblock_bytes': freeblock_bytes,
+        'freeblocks': freeblocks
+    }
+
+
 def analyze_journal_files(db_path: str) -> Dict:
     """
     Analyze SQLite journal and WAL files for a database
@@ -511,6 +735,7 @@ def analyze_journal_files(db_path: str) -> Dict:
             'size': os.path.getsize(journal_path),
             'type': 'rollback-journal'
         }
+        journal_data.update(_read_journal_header(journal_path))
         journal_info['journal_files'].append(journal_data)
     
     # Analyze WAL file if it exists
@@ -520,6 +745,7 @@ def analyze_journal_files(db_path: str) -> Dict:
             'size': os.path.getsize(wal_path),
             'type': 'write-ahead log'
         }
+        wal_data.update(_read_wal_header(wal_path))
         journal_info['journal_files'].append(wal_data)
     
     # Analyze SHM file if it exists
@@ -532,3 +758,71 @@ def analyze_journal_files(db_path: str) -> Dict:
         journal_info['journal_files'].append(shm_data)
     
     return journal_info
+
+
+def _read_wal_header(wal_path: str) -> Dict:
+    """
+    Decode the 32-byte header of a WAL file
+    
+    Args:
+        wal_path: Path to the WAL file
+        
+    Returns:
+        Dictionary with whether the header is valid and, if so, its fields
+    """
+    with open(wal_path, 'rb') as f:
+        header = f.read(_WAL_HEADER.size)
+    
+    if len(header) < _WAL_HEADER.size:
+        return {'valid': False}
+    
+    magic, file_format, page_size, checkpoint_seq, salt1, salt2, checksum1, checksum2 = _WAL_HEADER.unpack(header)
+    if magic not in _WAL_MAGICS:
+        return {'valid': False}
+    
+    return {
+        'valid': True,
+        'header': {
+            'magic': f"0x{magic:08x}",
+            'file_format': file_format,
+            'page_size': page_size,
+            'checkpoint_seq': checkpoint_seq,
+            'salt': (salt1, salt2),
+            'checksum': (checksum1, checksum2),
+            # The low bit of the magic selects the byte order of frame checksums
+            'checksum_big_endian': bool(magic & 1)
+        }
+    }
+
+
+def _read_journal_header(journal_path: str) -> Dict:
+    """
+    Decode the header of a rollback journal
+    
+    Args:
+        journal_path: Path to the journal file
+        
+    Returns:
+        Dictionary with whether the header is valid and, if so, its fields.
+        A journal whose header was zeroed after a commit is not valid.
+    """
+    header_size = len(_JOURNAL_MAGIC) + _JOURNAL_HEADER.size
+    with open(journal_path, 'rb') as f:
+        header = f.read(header_size)
+    
+    if len(header) < header_size or not header.startswith(_JOURNAL_MAGIC):
+        return {'valid': False}
+    
+    record_count, nonce, initial_pages, sector_size, page_size = _JOURNAL_HEADER.unpack_from(header, len(_JOURNAL_MAGIC))
+    
+    return {
+        'valid': True,
+        'header': {
+            # 0xffffffff means the record count is given by the file size
+            'record_count': None if record_count == 0xffffffff else record_count,
+            'nonce': nonce,
+            'initial_page_count': initial_pages,
+            'sector_size': sector_size,
+            'page_size': page_size
+        }
+    }
@@ -0,0 +1,567 @@
+# tools/sqlite/connection_pool.py - Shared pool of read-only SQLite connections
+
+import os
+import sys
+import ctypes
+import atexit
+import sqlite3
+import contextlib
+import hashlib
+import logging
+import threading
+import tempfile
+import shutil
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """
+    How pooled connections are prepared for one kind of analysis
+    
+    Attributes:
+        name: Name of the profile; connections and scratch copies are kept
+            apart per profile
+        prepare_copy: Called with a writable connection to a checkpointed
+            scratch copy, e.g. to add indexes the analysis queries rely on
+        setup: Called with each opened connection and the database path; the
+            result is kept as the pooled connection's info
+    """
+    name: str
+    prepare_copy: Optional[Callable[[sqlite3.Connection], None]] = None
+    setup: Optional[Callable[[sqlite3.Connection, str], Any]] = None
+
+
+@dataclass
+class PooledConnection:
+    """
+    Read-only connection to a database, kept open between queries
+    
+    Attributes:
+        key: Pool key of the connection
+        conn: SQLite connection, opened as immutable
+        fingerprint: Fingerprint of the database files the connection reflects
+        temp_path: Path of the scratch copy the connection reads, if one was
+            needed
+        info: Result of the profile's setup function, if it has one
+        lock: Serializes use of the connection across threads
+        users: Number of threads holding or waiting for the connection,
+            guarded by the pool lock
+        closed: Whether the connection was evicted; it is closed once no
+            thread uses it any more
+        discard_copy: Whether the copy is out of date and is removed along
+            with the connection
+    """
+    key: Tuple[str, bool, bool, str]
+    conn: sqlite3.Connection
+    fingerprint: Tuple[int, ...]
+    temp_path: Optional[str] = None
+    info: Any = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    users: int = 0
+    closed: bool = False
+    discard_copy: bool = False
+
+
+# Profile for plain queries, with no extra preparation
+DEFAULT_PROFILE = ConnectionProfile('default')
+
+# Maximum number of databases kept open between queries
+CONNECTION_POOL_SIZE = 8
+
+# Tuning for pooled connections: memory-map up to 256 MiB of the file, keep a
+# 64 MiB page cache that survives between queries, sort in memory and refuse
+# any write on the connection on top of the immutable open
+_POOLED_CONNECTION_PRAGMAS = """
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA query_only=1;
+"""
+
+# Scratch directory for this process, holding the copies pooled
+# connections read. Copies are kept when their connection is evicted from
+# the pool, so reopening an unchanged database does not copy it again; the
+# directory is removed at exit.
+_SCRATCH_DIR = tempfile.mkdtemp(prefix='ios-forensics-')
+
+# Maximum number of scratch copies kept for reuse after their connection
+# was closed; past it the least recently kept copies are removed
+SCRATCH_COPY_LIMIT = 8
+
+# Paths of scratch copies kept for reuse, least recently kept first,
+# guarded by the pool lock
+_retained_copies: 'OrderedDict[str, None]' = OrderedDict()
+
+# Open pooled connections by database path, copy mode, WAL mode and
+# profile name, least recently used first
+_connection_pool: 'OrderedDict[Tuple[str, bool, bool, str], PooledConnection]' = OrderedDict()
+_connection_pool_lock = threading.Lock()
+
+# Connections being opened outside the pool lock, by pool key, each with
+# an event set once it is in the pool or failed to open
+_opening_connections: 'Dict[Tuple[str, bool, bool, str], threading.Event]' = {}
+
+
+@contextlib.contextmanager
+def pooled_connection(db_path: str, forensic_copy: bool = False, include_wal: bool = True,
+                      profile: ConnectionProfile = DEFAULT_PROFILE) -> Iterator[PooledConnection]:
+    """
+    Hold a pooled connection for exclusive use
+    
+    Args:
+        db_path: Path to the SQLite database
+        forensic_copy: Whether to read a temporary copy of the database
+        include_wal: Whether to include transactions still held in the WAL;
+            without them the database file is read as is
+        profile: How the connection is prepared
+        
+    Yields:
+        Pooled connection, locked for the duration of the block
+    """
+    while True:
+        pooled = _get_pooled_connection(db_path, forensic_copy, include_wal, profile)
+        try:
+            with pooled.lock:
+                # Another thread may have evicted it before the lock was taken
+                if pooled.closed:
+                    continue
+                yield pooled
+                return
+        finally:
+            _release_pooled_connection(pooled)
+
+
+@contextlib.contextmanager
+def dedicated_connection(db_path: str, forensic_copy: bool = False,
+                         include_wal: bool = True) -> Iterator[sqlite3.Connection]:
+    """
+    Open a private read-only connection to a database, outside the pool
+    
+    Meant for callers that keep a connection busy for as long as their
+    caller likes, such as a generator streaming rows, and so must not hold
+    a pooled connection's lock. A copy, when one is needed, is made for this
+    connection alone and removed with it.
+    
+    Args:
+        db_path: Path to the SQLite database
+        forensic_copy: Whether to read a temporary copy of the database
+        include_wal: Whether to include transactions still held in the WAL;
+            without them the database file is read as is
+        
+    Yields:
+        SQLite connection, closed when the block exits
+    """
+    needs_copy = forensic_copy or (include_wal and database_fingerprint(db_path)[3] > 0)
+    
+    with contextlib.ExitStack() as stack:
+        read_path = db_path
+        if needs_copy:
+            temp_dir = stack.enter_context(tempfile.TemporaryDirectory(dir=_SCRATCH_DIR))
+            read_path = os.path.join(temp_dir, os.path.basename(db_path))
+            _make_scratch_copy(db_path, read_path, include_wal, DEFAULT_PROFILE)
+        
+        conn = stack.enter_context(contextlib.closing(_connect_immutable(read_path)))
+        yield conn
+
+
+def evict_pooled_connection(pooled: PooledConnection) -> None:
+    """
+    Remove a pooled connection from the pool and close it, e.g. after it
+    stopped being usable
+    
+    Args:
+        pooled: Pooled connection to evict
+    """
+    with _connection_pool_lock:
+        # It may already have been replaced or evicted by another thread
+        if _connection_pool.get(pooled.key) is not pooled:
+            return
+        
+        del _connection_pool[pooled.key]
+        _retire_pooled_connection(pooled)
+
+
+def _get_pooled_connection(db_path: str, forensic_copy: bool, include_wal: bool,
+                           profile: ConnectionProfile) -> PooledConnection:
+    """
+    Get a pooled read-only connection to a database, opening it if needed
+    
+    Connections are reused while the database and its WAL are unchanged, so
+    any copy is made once and prepared statements stay compiled across calls.
+    Opening, which may hash, copy and index the database, happens outside the
+    pool lock; other callers for the same key wait for it instead of opening
+    a second connection.
+    
+    Args:
+        db_path: Path to the SQLite database
+        forensic_copy: Whether to read a temporary copy of the database
+        include_wal: Whether to include transactions still held in the WAL
+        profile: How the connection is prepared
+        
+    Returns:
+        Pooled connection
+    """
+    fingerprint = database_fingerprint(db_path)
+    pool_key = (db_path, forensic_copy, include_wal, profile.name)
+    
+    while True:
+        with _connection_pool_lock:
+            pooled = _connection_pool.get(pool_key)
+            if pooled is not None:
+                if pooled.fingerprint == fingerprint:
+                    _connection_pool.move_to_end(pool_key)
+                    pooled.users += 1
+                    return pooled
+                
+                # The files changed since the connection was opened, so its
+                # copy is out of date as well
+                del _connection_pool[pool_key]
+                pooled.discard_copy = True
+                _retire_pooled_connection(pooled)
+            
+            opening = _opening_connections.get(pool_key)
+            if opening is None:
+                opening = _opening_connections[pool_key] = threading.Event()
+                break
+        
+        # Another thread is opening this connection: look again once it is done
+        opening.wait()
+    
+    try:
+        pooled = _open_pooled_connection(pool_key, fingerprint, profile)
+    except Exception:
+        with _connection_pool_lock:
+            del _opening_connections[pool_key]
+        opening.set()
+        raise
+    
+    with _connection_pool_lock:
+        del _opening_connections[pool_key]
+        _connection_pool[pool_key] = pooled
+        if pooled.temp_path is not None:
+            # A connection closed meanwhile may have kept the same copy
+            _retained_copies.pop(pooled.temp_path, None)
+        
+        while len(_connection_pool) > CONNECTION_POOL_SIZE:
+            _, evicted = _connection_pool.popitem(last=False)
+            _retire_pooled_connection(evicted)
+        
+        pooled.users += 1
+    
+    opening.set()
+    return pooled
+
+
+def _release_pooled_connection(pooled: PooledConnection) -> None:
+    """
+    Give up a pooled connection taken with _get_pooled_connection, closing
+    it if it was evicted in the meantime and this was its last user
+    
+    Args:
+        pooled: Pooled connection to release
+    """
+    with _connection_pool_lock:
+        pooled.users -= 1
+        if pooled.closed and pooled.users == 0:
+            _close_pooled_connection(pooled)
+
+
+def _open_pooled_connection(pool_key: Tuple[str, bool, bool, str], fingerprint: Tuple[int, ...],
+                            profile: ConnectionProfile) -> PooledConnection:
+    """
+    Open a database read-only without modifying it
+    
+    Args:
+        pool_key: Pool key of the connection, (database path, copy mode, WAL
+            mode, profile name)
+        fingerprint: Fingerprint of the database files, see database_fingerprint
+        profile: How the connection is prepared
+        
+    Returns:
+        Pooled connection
+    """
+    db_path, forensic_copy, include_wal, _ = pool_key
+    
+    # Committed pages in a non-empty WAL have to be folded into the
+    # database before it can be read as immutable, which must not happen
+    # on the evidence itself: only then, or when asked for, is a copy made
+    needs_copy = forensic_copy or (include_wal and fingerprint[3] > 0)
+    
+    try:
+        if needs_copy:
+            read_path = _scratch_copy_path(pool_key, fingerprint)
+            
+            # Take a kept copy back before it can be removed to make room
+            # for others
+            with _connection_pool_lock:
+                _retained_copies.pop(read_path, None)
+            if os.path.exists(read_path):
+                logger.info(f"Reusing temporary copy of {db_path}: {read_path}")
+            else:
+                _make_scratch_copy(db_path, read_path, include_wal, profile)
+        else:
+            read_path = db_path
+        
+        # The connection outlives a single call, so keep enough prepared
+        # statements around for repeated and paginated queries to stay compiled
+        conn = _connect_immutable(read_path, cached_statements=256)
+        try:
+            info = profile.setup(conn, db_path) if profile.setup is not None else None
+        except Exception:
+            conn.close()
+            raise
+    except Exception:
+        if needs_copy:
+            _remove_scratch_copy(read_path)
+        raise
+    
+    return PooledConnection(key=pool_key, conn=conn, fingerprint=fingerprint,
+                            temp_path=read_path if needs_copy else None, info=info)
+
+
+def _connect_immutable(read_path: str, cached_statements: int = 128) -> sqlite3.Connection:
+    """
+    Open a database file as immutable, tuned for reading
+    
+    SQLite opens the file read-only, skips locking and never creates
+    journal, WAL or SHM files, so the original evidence stays unmodified.
+    
+    Args:
+        read_path: Path to the database file
+        cached_statements: Number of prepared statements the connection keeps
+        
+    Returns:
+        SQLite connection, usable from any thread
+    """
+    uri = f"file:{urllib.parse.quote(read_path)}?mode=ro&immutable=1&nolock=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=cached_statements)
+    try:
+        conn.executescript(_POOLED_CONNECTION_PRAGMAS)
+    except Exception:
+        conn.close()
+        raise
+    
+    return conn
+
+
+def _scratch_copy_path(pool_key: Tuple[str, bool, bool, str], fingerprint: Tuple[int, ...]) -> str:
+    """
+    Get the path of the scratch copy of a database in a given state
+    
+    Args:
+        pool_key: Pool key of the connection reading the copy
+        fingerprint: Fingerprint of the database files, see database_fingerprint
+        
+    Returns:
+        Path in the scratch directory, the same for every call with the same
+        pool key and fingerprint
+    """
+    digest = hashlib.blake2b(repr((pool_key, fingerprint)).encode(), digest_size=16).hexdigest()
+    return os.path.join(_SCRATCH_DIR, f"{digest}.db")
+
+
+def _make_scratch_copy(db_path: str, temp_db_path: str, include_wal: bool,
+                       profile: ConnectionProfile) -> None:
+    """
+    Copy a database and its WAL file and fold the WAL into the copy
+    
+    Args:
+        db_path: Path to the SQLite database
+        temp_db_path: Path of the copy to create
+        include_wal: Whether to copy the WAL along with the database
+        profile: Profile the copy is prepared for
+    """
+    # Copy the database file
+    fast_copy(db_path, temp_db_path)
+    
+    # Copy the WAL file. The SHM index is not copied: SQLite rebuilds it
+    # from the WAL when the copy is checkpointed.
+    wal_path = f"{db_path}-wal"
+    if include_wal and os.path.exists(wal_path):
+        temp_wal_path = f"{temp_db_path}-wal"
+        fast_copy(wal_path, temp_wal_path)
+        logger.info(f"Copied WAL file to temporary location: {temp_wal_path}")
+    
+    # An immutable connection ignores the WAL, so fold it into the copy
+    # first and switch the copy back to rollback journaling. The copy is
+    # disposable, so its writes are not synced to disk.
+    with contextlib.closing(sqlite3.connect(temp_db_path)) as conn:
+        conn.executescript("""
+            PRAGMA synchronous=OFF;
+            PRAGMA wal_checkpoint(TRUNCATE);
+            PRAGMA journal_mode=DELETE;
+        """)
+        
+        if profile.prepare_copy is not None:
+            profile.prepare_copy(conn)
+            conn.commit()
+
+
+def _remove_scratch_copy(temp_db_path: str) -> None:
+    """
+    Remove a scratch copy of a database along with any files SQLite left next to it
+    
+    Args:
+        temp_db_path: Path of the copy
+    """
+    for path in (temp_db_path, f"{temp_db_path}-wal", f"{temp_db_path}-shm", f"{temp_db_path}-journal"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Error cleaning up temporary files: {e}")
+
+
+def _load_clonefile() -> Optional[Any]:
+    """
+    Look up the macOS clonefile system call
+    
+    Returns:
+        ctypes function for clonefile(src, dst, flags), or None if unavailable
+    """
+    if sys.platform != 'darwin':
+        return None
+    
+    try:
+        clonefile = ctypes.CDLL('/usr/lib/libSystem.dylib', use_errno=True).clonefile
+    except (OSError, AttributeError):
+        return None
+    
+    clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+    clonefile.restype = ctypes.c_int
+    return clonefile
+
+
+# clonefile system call on macOS 10.12+, looked up once
+_clonefile = _load_clonefile()
+
+
+def fast_copy(src: str, dst: str) -> None:
+    """
+    Copy a file and its timestamps, keeping the data inside the kernel
+    
+    On APFS the file is cloned with clonefile, which shares the data blocks
+    until either copy changes. On Linux the data is moved with
+    os.copy_file_range, which can also share extents on filesystems that
+    support reflinks. Otherwise shutil.copyfile is used, which itself copies
+    with sendfile on Linux.
+    
+    Args:
+        src: Path to the source file
+        dst: Path to the destination file
+    """
+    src_stat = os.stat(src)
+    
+    copied = False
+    if _clonefile is not None:
+        copied = _clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+        if not copied:
+            # Not APFS, or source and destination are on different volumes
+            logger.debug(f"clonefile unavailable for {src}, falling back to copyfile: "
+                         f"{os.strerror(ctypes.get_errno())}")
+    
+    if not copied and hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                remaining = src_stat.st_size
+                while remaining > 0:
+                    count = os.copy_file_range(src_file.fileno(), dst_file.fileno(), remaining)
+                    if count == 0:
+                        break
+                    remaining -= count
+            copied = True
+        except OSError as e:
+            logger.debug(f"copy_file_range unavailable for {src}, falling back to copyfile: {e}")
+    
+    if not copied:
+        shutil.copyfile(src, dst)
+    
+    # Keep the source timestamps on the copy, as shutil.copy2 did
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+
+def _retire_pooled_connection(pooled: PooledConnection) -> None:
+    """
+    Mark a connection evicted from the pool as closed
+    
+    Called with the pool lock held, so it never waits for a thread still
+    using the connection: the last such thread closes it on release instead.
+    
+    Args:
+        pooled: Pooled connection removed from the pool
+    """
+    pooled.closed = True
+    if pooled.users == 0:
+        _close_pooled_connection(pooled)
+
+
+def _close_pooled_connection(pooled: PooledConnection) -> None:
+    """
+    Close a retired pooled connection nobody uses any more, keeping its
+    copy, if any, for reuse unless it is out of date
+    
+    Called with the pool lock held.
+    
+    Args:
+        pooled: Pooled connection to close
+    """
+    pooled.conn.close()
+    if pooled.temp_path is None:
+        return
+    
+    # A connection opened since this one was evicted may read the same copy
+    current = _connection_pool.get(pooled.key)
+    if current is not None and current.temp_path == pooled.temp_path:
+        return
+    
+    if pooled.discard_copy:
+        _remove_scratch_copy(pooled.temp_path)
+        return
+    
+    _retained_copies[pooled.temp_path] = None
+    while len(_retained_copies) > SCRATCH_COPY_LIMIT:
+        temp_path, _ = _retained_copies.popitem(last=False)
+        _remove_scratch_copy(temp_path)
+
+
+@atexit.register
+def _close_all_pooled_connections() -> None:
+    """
+    Close every pooled connection and remove the scratch directory on
+    interpreter shutdown
+    """
+    with _connection_pool_lock:
+        while _connection_pool:
+            _, pooled = _connection_pool.popitem()
+            _retire_pooled_connection(pooled)
+    
+    shutil.rmtree(_SCRATCH_DIR, ignore_errors=True)
+
+
+def database_fingerprint(db_path: str) -> Tuple[int, ...]:
+    """
+    Fingerprint a database and its WAL file by modification time and size
+    
+    Args:
+        db_path: Path to the database
+        
+    Returns:
+        Tuple of (database mtime_ns, database size, WAL mtime_ns, WAL size),
+        with zeros for a missing WAL
+    """
+    db_stat = os.stat(db_path)
+    try:
+        wal_stat = os.stat(f"{db_path}-wal")
+        wal_fingerprint = (wal_stat.st_mtime_ns, wal_stat.st_size)
+    except FileNotFoundError:
+        wal_fingerprint = (0, 0)
+    
+    return (db_stat.st_mtime_ns, db_stat.st_size) + wal_fingerprint
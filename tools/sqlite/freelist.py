@@ -1,18 +1,55 @@
 # tools/sqlite/freelist.py - SQLite freelist and deleted record recovery
 
 import os
+import heapq
+import mmap
 import struct
 import sqlite3
 import logging
 import tempfile
 import shutil
 import re
+import functools
 from typing import Dict, List, Optional, Any, Tuple, Union, BinaryIO
 from datetime import datetime
 
+try:
+    # Hyperscan finds every printable run on a page in one vectorised pass
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Minimum length of a printable run to be reported as a text fragment
+_MIN_FRAGMENT_LENGTH = 4
+
+# Number of fragments reported, longest first
+_MAX_FRAGMENTS = 100
+
+# Byte-level patterns, run directly on page buffers: printable ASCII runs
+# and alphanumeric characters
+_FRAG_RE = re.compile(rb'[\x20-\x7E]{%d,}' % _MIN_FRAGMENT_LENGTH)
+_ALNUM_RE = re.compile(rb'[A-Za-z0-9]')
+
+# Text-level patterns, run on decoded record payloads so values in any
+# script are kept: separators between fields, and alphanumeric characters
+_FIELD_SPLIT_RE = re.compile(r'[\x00-\x1F\x7F-\xFF]+')
+_FIELD_ALNUM_RE = re.compile(r'[a-zA-Z0-9]')
+
+# Freelist trunk page header: next trunk page number, leaf page count
+_TRUNK_HEADER = struct.Struct('>II')
+
+# Big-endian page number, as stored in freelist trunk pages
+_PAGE_NUMBER = struct.Struct('>I')
+
+# Text encodings by header value, named as PRAGMA encoding reports them
+_HEADER_TEXT_ENCODINGS = {1: 'UTF-8', 2: 'UTF-16le', 3: 'UTF-16be'}
+
+# Page sizes to try, in order, when the header does not hold a valid one
+_COMMON_PAGE_SIZES = (4096, 8192, 16384, 32768, 1024, 2048, 512)
+
 
 class SQLiteFreelistParser:
     """
@@ -36,6 +73,45 @@ class SQLiteFreelistParser:
         """
         Initialize the SQLite freelist parser
         
+        Args:
+            db_path: Path to the SQLite database
+        """
+        self._init_state(db_path)
+        
+        # Initialize database metadata
+        self._init_database_metadata()
+    
+    @classmethod
+    def from_raw(cls, db_path: str, page_size: int = 0) -> 'SQLiteFreelistParser':
+        """
+        Create a parser over the raw file without reading database metadata
+        
+        Carving only needs page bytes, so this skips the temporary copy and
+        sqlite connection the regular constructor uses for schema details.
+        
+        Args:
+            db_path: Path to the SQLite database
+            page_size: Page size to use, or 0 to detect it from the file
+            
+        Returns:
+            Parser with an empty freelist and table map
+        """
+        parser = cls.__new__(cls)
+        parser._init_state(db_path)
+        parser.page_size = page_size or _detect_page_size(parser._mv)
+        
+        # Text encoding is stored in the header (bytes 56-59)
+        header_data = parser._mv[:60]
+        if len(header_data) == 60:
+            text_encoding = struct.unpack('>I', header_data[56:60])[0]
+            parser.encoding = _HEADER_TEXT_ENCODINGS.get(text_encoding, parser.encoding)
+        
+        return parser
+    
+    def _init_state(self, db_path: str):
+        """
+        Set up parser state and map the database file
+        
         Args:
             db_path: Path to the SQLite database
         """
@@ -47,8 +123,60 @@ class SQLiteFreelistParser:
         self.free_pages = []
         self.tables = {}
         
-        # Initialize database metadata
-        self._init_database_metadata()
+        # Map the database file once; pages are sliced out of the mapping
+        # instead of being re-read with seek/read
+        self._fd = -1
+        self._mm = None
+        self._mv = None
+        self._map_database()
+    
+    def __del__(self):
+        """Clean up resources on deletion"""
+        self.close()
+    
+    def _map_database(self):
+        """Open the database file and map it read-only into memory"""
+        self._fd = os.open(self.db_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            # Zero-length files cannot be mapped
+            if os.fstat(self._fd).st_size > 0:
+                self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+                self._mv = memoryview(self._mm)
+            else:
+                self._mv = memoryview(b'')
+        except Exception:
+            self.close()
+            raise
+    
+    def close(self):
+        """Release the memory map and file descriptor of the database"""
+        if getattr(self, '_mv', None) is not None:
+            self._mv.release()
+            self._mv = None
+        if getattr(self, '_mm', None) is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # Page slices are still referenced; the mapping is closed
+                # once they are garbage collected
+                pass
+            self._mm = None
+        if getattr(self, '_fd', -1) >= 0:
+            os.close(self._fd)
+            self._fd = -1
+    
+    def _page(self, page_num: int) -> memoryview:
+        """
+        Get a zero-copy view of a database page
+        
+        Args:
+            page_num: 1-based page number
+            
+        Returns:
+            Memoryview over the page (shorter or empty past the end of file)
+        """
+        offset = (page_num - 1) * self.page_size
+        return self._mv[offset:offset + self.page_size]
     
     def _init_database_metadata(self):
         """Initialize database metadata by reading the database header and tables"""
@@ -131,30 +259,29 @@ class SQLiteFreelistParser:
     def _read_database_header(self):
         """Read the SQLite database header to get freelist information"""
         try:
-            with open(self.db_path, 'rb') as f:
-                # Read header (first 100 bytes)
-                header_data = f.read(100)
-                
-                # Bytes 16-17: Size of the database page in bytes
-                page_size = struct.unpack('>H', header_data[16:18])[0]
-                if page_size == 1:
-                    # Page size is 65536 if stored as 1
-                    page_size = 65536
-                
-                # Bytes 32-35: Page number of the first freelist trunk page
-                freelist_trunk_page = struct.unpack('>I', header_data[32:36])[0]
-                
-                # Bytes 36-39: Total number of freelist pages
-                total_freelist_pages = struct.unpack('>I', header_data[36:40])[0]
-                
-                logger.info(f"Database header: page_size={page_size}, freelist_trunk_page={freelist_trunk_page}, total_freelist_pages={total_freelist_pages}")
-                
-                # Store freelist information
-                self.page_size = page_size if page_size > 0 else self.page_size
-                
-                # If there are freelist pages, collect them
-                if freelist_trunk_page > 0 and total_freelist_pages > 0:
-                    self._collect_freelist_pages(freelist_trunk_page)
+            # Header is the first 100 bytes of the mapping
+            header_data = self._mv[:100]
+            
+            # Bytes 16-17: Size of the database page in bytes
+            page_size = struct.unpack('>H', header_data[16:18])[0]
+            if page_size == 1:
+                # Page size is 65536 if stored as 1
+                page_size = 65536
+            
+            # Bytes 32-35: Page number of the first freelist trunk page
+            freelist_trunk_page = struct.unpack('>I', header_data[32:36])[0]
+            
+            # Bytes 36-39: Total number of freelist pages
+            total_freelist_pages = struct.unpack('>I', header_data[36:40])[0]
+            
+            logger.info(f"Database header: page_size={page_size}, freelist_trunk_page={freelist_trunk_page}, total_freelist_pages={total_freelist_pages}")
+            
+            # Store freelist information
+            self.page_size = page_size if page_size > 0 else self.page_size
+            
+            # If there are freelist pages, collect them
+            if freelist_trunk_page > 0 and total_freelist_pages > 0:
+                self._collect_freelist_pages(freelist_trunk_page)
         
         except Exception as e:
             logger.error(f"Error reading database header: {e}")
@@ -163,45 +290,38 @@ class SQLiteFreelistParser:
         """
         Collect all pages in the freelist
         
+        Each trunk page starts with the number of the next trunk page and
+        the count of leaf page numbers that follow it.
+        
         Args:
             trunk_page: First freelist trunk page number
         """
         try:
-            with open(self.db_path, 'rb') as f:
-                # Navigate to the trunk page
-                f.seek((trunk_page - 1) * self.page_size)
-                
-                # Read trunk page header
-                trunk_data = f.read(8)
+            visited = set()
+            
+            # Follow the trunk chain; stop on a cycle in a corrupt freelist
+            while trunk_page > 0 and trunk_page not in visited:
+                visited.add(trunk_page)
                 
-                # First 4 bytes: Page type (should be 0 for freelist trunk)
-                page_type = struct.unpack('>I', trunk_data[0:4])[0]
+                # View of the trunk page
+                trunk_data = self._page(trunk_page)
+                if len(trunk_data) < 8:
+                    logger.warning(f"Freelist trunk page {trunk_page} is beyond the end of the file")
+                    break
                 
-                # Next 4 bytes: Number of leaf pages in this trunk
-                num_leaves = struct.unpack('>I', trunk_data[4:8])[0]
+                next_trunk, num_leaves = _TRUNK_HEADER.unpack_from(trunk_data)
                 
-                logger.info(f"Freelist trunk page {trunk_page}: page_type={page_type}, num_leaves={num_leaves}")
+                logger.info(f"Freelist trunk page {trunk_page}: next_trunk={next_trunk}, num_leaves={num_leaves}")
                 
                 # Add trunk page to freelist
                 self.free_pages.append(trunk_page)
                 
-                # Read leaf page numbers (each is 4 bytes)
-                for i in range(num_leaves):
-                    leaf_page_offset = 8 + (i * 4)
-                    if leaf_page_offset + 4 <= self.page_size:
-                        f.seek((trunk_page - 1) * self.page_size + leaf_page_offset)
-                        leaf_page = struct.unpack('>I', f.read(4))[0]
-                        if leaf_page > 0:
-                            self.free_pages.append(leaf_page)
+                # Unpack all leaf page numbers that fit on the page in one pass
+                num_leaves = min(num_leaves, (len(trunk_data) - 8) // 4)
+                leaves = trunk_data[8:8 + num_leaves * 4]
+                self.free_pages.extend(leaf_page for (leaf_page,) in _PAGE_NUMBER.iter_unpack(leaves) if leaf_page > 0)
                 
-                # Check if there's another trunk page
-                next_trunk_offset = 8 + (num_leaves * 4)
-                if next_trunk_offset + 4 <= self.page_size:
-                    f.seek((trunk_page - 1) * self.page_size + next_trunk_offset)
-                    next_trunk = struct.unpack('>I', f.read(4))[0]
-                    if next_trunk > 0:
-                        # Recursively collect pages from next trunk
-                        self._collect_freelist_pages(next_trunk)
+                trunk_page = next_trunk
         
         except Exception as e:
             logger.error(f"Error collecting freelist pages: {e}")
@@ -224,37 +344,35 @@ class SQLiteFreelistParser:
         }
         
         try:
-            with open(self.db_path, 'rb') as f:
-                # Scan each free page
-                for page_num in self.free_pages:
-                    # Skip page 1 (database header)
-                    if page_num <= 1:
-                        continue
-                    
-                    # Read the page
-                    f.seek((page_num - 1) * self.page_size)
-                    page_data = f.read(self.page_size)
-                    
-                    # Analyze the page
-                    page_type = self._get_page_type(page_data)
-                    
-                    page_result = {
-                        'page_number': page_num,
-                        'page_type': page_type,
-                        'recovered_records': []
-                    }
-                    
-                    # If this is a leaf table page, try to recover records
-                    if page_type == self.BTREE_LEAF_TABLE:
-                        records = self._extract_records_from_page(page_data)
-                        page_result['recovered_records'] = records
-                    
-                    # Add text fragments found on the page
-                    text_fragments = self._extract_text_fragments(page_data)
-                    if text_fragments:
-                        page_result['text_fragments'] = text_fragments
-                    
-                    scan_results['recovered_data'].append(page_result)
+            # Scan each free page
+            for page_num in self.free_pages:
+                # Skip page 1 (database header)
+                if page_num <= 1:
+                    continue
+                
+                # View the page
+                page_data = self._page(page_num)
+                
+                # Analyze the page
+                page_type = self._get_page_type(page_data)
+                
+                page_result = {
+                    'page_number': page_num,
+                    'page_type': page_type,
+                    'recovered_records': []
+                }
+                
+                # If this is a leaf table page, try to recover records
+                if page_type == self.BTREE_LEAF_TABLE:
+                    records = self._extract_records_from_page(page_data)
+                    page_result['recovered_records'] = records
+                
+                # Add text fragments found on the page
+                text_fragments = self._extract_text_fragments(page_data)
+                if text_fragments:
+                    page_result['text_fragments'] = text_fragments
+                
+                scan_results['recovered_data'].append(page_result)
             
             logger.info(f"Scanned {len(self.free_pages)} freelist pages")
             return scan_results
@@ -320,19 +438,17 @@ class SQLiteFreelistParser:
             # Bytes 5-6: Offset to first cell content
             first_cell_offset = struct.unpack('>H', page_data[5:7])[0]
             
-            # Extract cell pointers (2 bytes each, pointing to cell content)
-            cell_pointers = []
-            for i in range(num_cells):
-                pointer_offset = header_size + (i * 2)
-                if pointer_offset + 2 <= len(page_data):
-                    cell_offset = struct.unpack('>H', page_data[pointer_offset:pointer_offset+2])[0]
-                    if 0 < cell_offset < self.page_size:
-                        cell_pointers.append(cell_offset)
+            # Extract cell pointers (2 bytes each, pointing to cell content),
+            # unpacking every pointer that fits on the page in one call
+            num_pointers = max(0, min(num_cells, (len(page_data) - header_size) // 2))
+            page_length = min(len(page_data), self.page_size)
+            cell_pointers = [
+                cell_offset for cell_offset in struct.unpack_from(f'>{num_pointers}H', page_data, header_size)
+                if 0 < cell_offset < page_length
+            ]
             
             # Process each cell
             for cell_offset in cell_pointers:
-                if cell_offset >= len(page_data):
-                    continue
                 
                 # Extract record data
                 record = self._parse_cell(page_data, cell_offset)
@@ -403,18 +519,27 @@ class SQLiteFreelistParser:
         Returns:
             Tuple of (value, bytes_read)
         """
-        value = 0
-        for i in range(9):  # SQLite varints are at most 9 bytes
-            if offset + i >= len(data):
-                break
+        end = min(offset + 9, len(data))  # SQLite varints are at most 9 bytes
+        if offset >= end:
+            return 0, 1
+        
+        # Payload sizes and rowids are usually small enough for a single byte
+        byte = data[offset]
+        if byte < 0x80:
+            return byte, 1
+        
+        value = byte & 0x7F
+        for i in range(offset + 1, end):
+            byte = data[i]
+            if i - offset == 8:
+                # The ninth byte contributes all eight of its bits
+                return (value << 8) | byte, 9
             
-            byte = data[offset + i]
             value = (value << 7) | (byte & 0x7F)
-            
-            if not (byte & 0x80):
-                return value, i + 1
+            if byte < 0x80:
+                return value, i - offset + 1
         
-        # If we get here, something went wrong
+        # If we get here, the varint runs past the end of the data
         return 0, 1
     
     def _extract_text_from_payload(self, payload_data: bytes) -> Dict[str, str]:
@@ -429,23 +554,14 @@ class SQLiteFreelistParser:
         """
         text_values = {}
         
-        # Try to identify text strings in the payload
-        for encoding in [self.encoding, 'utf-8', 'utf-16', 'ascii', 'latin1']:
-            try:
-                # Convert to string
-                text = payload_data.decode(encoding, errors='ignore')
-                
-                # Split into potential fields
-                for i, part in enumerate(re.split(r'[\x00-\x1F\x7F-\xFF]+', text)):
-                    # Keep only parts that look like text
-                    if len(part) >= 3 and re.search(r'[a-zA-Z0-9]', part):
-                        text_values[f'field_{i}'] = part
-                
-                # If we found text, stop trying different encodings
-                if text_values:
-                    break
-            except Exception:
-                continue
+        # Decode once in the database encoding, so non-Latin text survives
+        text = str(payload_data, self.encoding, errors='ignore')
+        
+        # Split into potential fields
+        for i, part in enumerate(_FIELD_SPLIT_RE.split(text)):
+            # Keep only parts that look like text
+            if len(part) >= 3 and _FIELD_ALNUM_RE.search(part):
+                text_values[f'field_{i}'] = part
         
         return text_values
     
@@ -459,29 +575,101 @@ class SQLiteFreelistParser:
         Returns:
             List of text fragments
         """
-        fragments = []
+        # Find printable runs and keep only those that look meaningful
+        return [
+            fragment.decode('ascii') for fragment in _find_printable_runs(self._ascii_text(page_data))
+            if _ALNUM_RE.search(fragment)
+        ]
+    
+    def _ascii_text(self, data: bytes) -> bytes:
+        """
+        Get a buffer in which text is stored as single-byte ASCII
         
-        # Try different encodings
-        for encoding in [self.encoding, 'utf-8', 'utf-16', 'ascii', 'latin1']:
-            try:
-                # Convert to string
-                text = page_data.decode(encoding, errors='ignore')
-                
-                # Find text fragments (at least 4 printable chars)
-                for match in re.finditer(r'[ -~]{4,}', text):
-                    fragment = match.group()
-                    
-                    # Keep only fragments that look meaningful
-                    if len(fragment) >= 4 and re.search(r'[a-zA-Z0-9]', fragment):
-                        fragments.append(fragment)
-                
-                # If we found fragments, stop trying different encodings
-                if fragments:
-                    break
-            except Exception:
-                continue
+        Printable ASCII is the same in UTF-8, ASCII and Latin-1, so those
+        databases are scanned as-is; only UTF-16 text has to be re-encoded.
+        
+        Args:
+            data: Raw page data
+            
+        Returns:
+            Buffer suitable for the byte-level text patterns
+        """
+        if self.encoding.upper().startswith('UTF-16'):
+            return str(data, self.encoding, errors='ignore').encode('utf-8')
+        return data
+
+
+def _find_printable_runs(data: bytes) -> List[bytes]:
+    """
+    Find the runs of printable ASCII long enough to be text fragments
+    
+    Args:
+        data: Raw page data
+        
+    Returns:
+        List of printable runs, in the order they appear
+    """
+    if hyperscan is None:
+        return _FRAG_RE.findall(data)
+    
+    data = bytes(data)
+    runs = []
+    
+    def on_match(run_id: int, start: int, end: int, match_flags: int, context: Any) -> None:
+        # Runs closed by a non-printable byte include that byte in the match
+        runs.append(data[start:end - 1 if run_id == 0 else end])
+    
+    _build_hyperscan_run_database().scan(data, match_event_handler=on_match)
+    return runs
+
+
+@functools.lru_cache(maxsize=None)
+def _build_hyperscan_run_database():
+    """
+    Build the Hyperscan database used to find printable runs
+    
+    Returns:
+        Hyperscan block-mode database matching each run exactly once
+    """
+    run = rb'[\x20-\x7E]{%d,}' % _MIN_FRAGMENT_LENGTH
+    
+    # Anchoring a run to the byte after it (or to the end of the data)
+    # reports it once, rather than at every byte past the minimum length
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        expressions=[run + rb'[^\x20-\x7E]', run + rb'\z'],
+        ids=[0, 1],
+        elements=2,
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * 2
+    )
+    return database
+
+
+def _detect_page_size(db_data: bytes) -> int:
+    """
+    Determine the page size of a database file
+    
+    Args:
+        db_data: Raw database file contents
         
-        return fragments
+    Returns:
+        Page size from the header, or a best guess if the header is invalid
+    """
+    # Try to get page size from database header
+    if len(db_data) >= 18:
+        header_page_size = struct.unpack('>H', db_data[16:18])[0]
+        if header_page_size == 1:
+            return 65536
+        if header_page_size >= 512:
+            return header_page_size
+    
+    # If we couldn't get page size from header, use common sizes
+    for size in _COMMON_PAGE_SIZES:
+        if len(db_data) % size == 0:
+            return size
+    
+    # If we still don't have a page size, default to 4096
+    return 4096
 
 
 def recover_deleted_records(db_path: str, table_name: Optional[str] = None) -> Dict[str, Any]:
@@ -499,7 +687,10 @@ def recover_deleted_records(db_path: str, table_name: Optional[str] = None) -> D
     
     try:
         parser = SQLiteFreelistParser(db_path)
-        scan_results = parser.scan_freelist()
+        try:
+            scan_results = parser.scan_freelist()
+        finally:
+            parser.close()
         
         # Organize results by potential table
         recovery_results = {
@@ -509,8 +700,8 @@ def recover_deleted_records(db_path: str, table_name: Optional[str] = None) -> D
             'text_fragments': []
         }
         
-        # Collect all text fragments
-        all_fragments = []
+        # Collect all unique text fragments; a dict keeps first-seen order
+        all_fragments = {}
         for page_result in scan_results.get('recovered_data', []):
             # Add records
             for record in page_result.get('recovered_records', []):
@@ -532,13 +723,10 @@ def recover_deleted_records(db_path: str, table_name: Optional[str] = None) -> D
                 })
             
             # Add text fragments
-            for fragment in page_result.get('text_fragments', []):
-                if fragment not in all_fragments:
-                    all_fragments.append(fragment)
+            all_fragments.update(dict.fromkeys(page_result.get('text_fragments', [])))
         
-        # Sort fragments by length (longest first) and add to results
-        all_fragments.sort(key=len, reverse=True)
-        recovery_results['text_fragments'] = all_fragments[:100]  # Limit to 100 fragments
+        # Keep the longest fragments (ties stay in first-seen order)
+        recovery_results['text_fragments'] = heapq.nlargest(_MAX_FRAGMENTS, all_fragments, key=len)
         
         return recovery_results
     
@@ -568,33 +756,13 @@ def carve_deleted_tables(db_path: str) -> Dict[str, Any]:
     """
     logger.info(f"Carving deleted tables from {db_path}")
     
+    parser = None
     try:
-        # Read the database file
-        with open(db_path, 'rb') as f:
-            db_data = f.read()
-        
-        # Look for SQLite leaf table pages (header byte 0x0D = 13)
-        page_size = 0
-        
-        # Try to get page size from database header
-        if len(db_data) >= 16:
-            header_page_size = struct.unpack('>H', db_data[16:18])[0]
-            if header_page_size == 1:
-                page_size = 65536
-            elif header_page_size >= 512:
-                page_size = header_page_size
-        
-        # If we couldn't get page size from header, use common sizes
-        if page_size == 0:
-            # Try common page sizes
-            for size in [4096, 8192, 16384, 32768, 1024, 2048, 512]:
-                if len(db_data) % size == 0:
-                    page_size = size
-                    break
-        
-        # If we still don't have a page size, default to 4096
-        if page_size == 0:
-            page_size = 4096
+        # One parser for the whole file; carving needs no schema metadata,
+        # and pages are slices of the parser's memory map
+        parser = SQLiteFreelistParser.from_raw(db_path)
+        db_data = parser._mv
+        page_size = parser.page_size
         
         logger.info(f"Using page size: {page_size}")
         
@@ -608,35 +776,32 @@ def carve_deleted_tables(db_path: str) -> Dict[str, Any]:
         
         # Scan the file for leaf table pages
         page_count = len(db_data) // page_size
-        all_fragments = []
         
-        for i in range(page_count):
+        # Gather the first byte of every page in one strided copy and only
+        # parse the pages marked as leaf table pages (0x0D)
+        first_bytes = db_data[:page_count * page_size:page_size].tobytes()
+        i = first_bytes.find(b'\x0d')
+        while i != -1:
             page_offset = i * page_size
-            page_data = db_data[page_offset:page_offset + page_size]
+            records = parser._extract_records_from_page(db_data[page_offset:page_offset + page_size])
             
-            # Check for leaf table page marker (0x0D)
-            if len(page_data) > 0 and page_data[0] == 13:
-                # This looks like a leaf table page
-                parser = SQLiteFreelistParser(db_path)
-                records = parser._extract_records_from_page(page_data)
-                
-                if records:
-                    carved_page = {
-                        'page_offset': page_offset,
-                        'page_index': i + 1,
-                        'records': records
-                    }
-                    carving_results['carved_pages'].append(carved_page)
-            
-            # Extract text fragments from every page
-            text_fragments = SQLiteFreelistParser(db_path)._extract_text_fragments(page_data)
-            for fragment in text_fragments:
-                if fragment not in all_fragments:
-                    all_fragments.append(fragment)
-        
-        # Sort fragments by length (longest first) and add to results
-        all_fragments.sort(key=len, reverse=True)
-        carving_results['text_fragments'] = all_fragments[:100]  # Limit to 100 fragments
+            if records:
+                carved_page = {
+                    'page_offset': page_offset,
+                    'page_index': i + 1,
+                    'records': records
+                }
+                carving_results['carved_pages'].append(carved_page)
+            
+            i = first_bytes.find(b'\x0d', i + 1)
+        
+        # Extract text fragments from every page
+        all_fragments = {}
+        for page_offset in range(0, page_count * page_size, page_size):
+            all_fragments.update(dict.fromkeys(parser._extract_text_fragments(db_data[page_offset:page_offset + page_size])))
+        
+        # Keep the longest fragments (ties stay in first-seen order)
+        carving_results['text_fragments'] = heapq.nlargest(_MAX_FRAGMENTS, all_fragments, key=len)
         
         return carving_results
     
@@ -648,3 +813,6 @@ def carve_deleted_tables(db_path: str) -> Dict[str, Any]:
             'carved_pages': [],
             'text_fragments': []
         }
+    finally:
+        if parser is not None:
+            parser.close()
@@ -2,7 +2,7 @@
 
 import os
 import re
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 def normalize_path(path: str) -> str:
     """
@@ -131,33 +131,67 @@ def find_files_by_extension(base_path: str, extensions: List[str], recursive: bo
     Returns:
         List of matching file paths
     """
+    return list(iter_files_by_extension(base_path, extensions, recursive))
+
+
+def iter_files_by_extension(base_path: str, extensions: Iterable[str], recursive: bool = True) -> Iterator[str]:
+    """
+    Find files with specific extensions in a directory, yielding each as it is found
+    
+    Files are yielded in the same order as find_files_by_extension returns
+    them, so callers can start working on the first matches while the rest
+    of the tree is still being listed.
+    
+    Args:
+        base_path: The base directory to search in
+        extensions: File extensions to find (without dot)
+        recursive: Whether to search recursively
+        
+    Yields:
+        Matching file paths
+    """
     if not os.path.isdir(base_path):
         raise ValueError(f"Base path is not a directory: {base_path}")
     
     # Normalize extensions by adding dot if needed
-    normalized_extensions = []
-    for ext in extensions:
-        if not ext.startswith('.'):
-            ext = '.' + ext
-        normalized_extensions.append(ext.lower())
-    
-    matching_files = []
+    normalized_extensions = frozenset(
+        (ext if ext.startswith('.') else '.' + ext).lower() for ext in extensions
+    )
     
-    if recursive:
-        for root, _, files in os.walk(base_path):
-            for filename in files:
-                _, ext = os.path.splitext(filename.lower())
-                if ext in normalized_extensions:
-                    matching_files.append(os.path.join(root, filename))
-    else:
-        for item in os.listdir(base_path):
-            item_path = os.path.join(base_path, item)
-            if os.path.isfile(item_path):
-                _, ext = os.path.splitext(item.lower())
-                if ext in normalized_extensions:
-                    matching_files.append(item_path)
-    
-    return matching_files
+    # Directories still to list, the next one last; like os.walk, symlinks
+    # to directories are not followed and unreadable directories are skipped
+    # when searching recursively. A non-recursive search lists only the base
+    # directory and, like os.listdir, raises if it cannot be read.
+    pending = [base_path]
+    while pending:
+        directory = pending.pop()
+        subdirectories = []
+        
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    
+                    if is_dir:
+                        if recursive and not entry.is_symlink():
+                            subdirectories.append(entry.path)
+                        continue
+                    
+                    if not recursive and not entry.is_file():
+                        continue
+                    
+                    _, ext = os.path.splitext(entry.name.lower())
+                    if ext in normalized_extensions:
+                        yield entry.path
+        except OSError:
+            if not recursive:
+                raise
+            continue
+        
+        pending.extend(reversed(subdirectories))
 
 
 def get_relative_path(full_path: str, base_path: str) -> str: